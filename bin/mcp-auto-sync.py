@@ -18,7 +18,7 @@ MCP Auto Sync (macOS/Linux)
   claude mcp add --transport stdio --env KEY=VAL ... -s user <name> -- <command> <args>
 """
 
-import json, os, re, shutil, subprocess, sys, platform
+import contextlib, json, os, re, shutil, subprocess, sys, platform
 from pathlib import Path
 import time
 import logging
@@ -33,6 +33,57 @@ try:
 except Exception:
     _CLI_U = None
 
+# 持久化写入：唯一临时文件 + fsync + 原子替换；sync 全部目标时合并目录 fsync
+try:
+    from mcp_cli import atomic as _ATOMIC  # type: ignore
+except Exception:
+    _ATOMIC = None
+
+try:
+    from mcp_cli import locks as _LOCKS  # type: ignore
+except Exception:
+    _LOCKS = None
+
+# claude 注册表命令的有界并行执行器（不可用时退回串行 subprocess.run）
+try:
+    from mcp_cli import procs as _PROCS  # type: ignore
+except Exception:
+    _PROCS = None
+
+# Claude local/project scope 注册表的原生文件读写（不可用时退回 claude CLI）
+try:
+    from mcp_cli import targets as _TARGETS  # type: ignore
+except Exception:
+    _TARGETS = None
+
+try:
+    from mcp_cli import toml_spans as _TOML  # type: ignore
+except Exception:
+    _TOML = None
+
+# 共享渲染缓存：每个 (server 内容, client) 只渲染一次（多个客户端共用同一渲染结果）
+try:
+    from mcp_cli import spec as _SPEC  # type: ignore
+except Exception:
+    _SPEC = None
+
+def _write_text(p: Path, content: str):
+    if _ATOMIC is not None and isinstance(p, Path):
+        _ATOMIC.write_text(p, content)
+    else:
+        p.write_text(content, encoding='utf-8')
+
+def _locked(p: Path):
+    # 跨进程写锁（与 mcp run/central/ui 共用 ~/.mcp-central/locks），读-改-写期间持有
+    if _LOCKS is not None and isinstance(p, Path):
+        return _LOCKS.locked(p)
+    return contextlib.nullcontext()
+
+def _group_commit():
+    if _ATOMIC is not None:
+        return _ATOMIC.group_commit()
+    return contextlib.nullcontext()
+
 # Import validation module with graceful fallback
 try:
     from mcp_validation import (
@@ -65,9 +116,13 @@ def log_err(m):  print(f"{RED}✗{NC} {m}")
 def backup(p: Path):
     if not p.exists():
         return None
-    # 单槽备份（覆盖写），避免备份堆积；可用 `mcp undo <file>.backup` 回滚
-    b = p.with_name(p.name + '.backup')
-    shutil.copy2(p, b)
+    if _CLI_U is not None:
+        # 登记到 ~/.mcp-central/backups（内容寻址去重），并保留兼容的 <file>.backup；
+        # 可用 `mcp undo --list` / `mcp undo <file>` 回滚
+        b = _CLI_U.backup(p)
+    else:
+        b = p.with_name(p.name + '.backup')
+        shutil.copy2(p, b)
     log_info(f'已备份: {b.name}')
     return b
 
@@ -78,13 +133,11 @@ def load_central():
         sys.exit(1)
     
     # Try to validate the configuration
-    validation_passed = False
     config_data = {}
     
     if VALIDATION_AVAILABLE:
         try:
             config_data = validate_mcp_servers_config(CENTRAL)
-            validation_passed = True
             log_info('中央配置已通过 schema 验证')
         except (MCPValidationError, MCPSchemaError) as e:
             log_warn('Schema 验证失败')
@@ -106,13 +159,7 @@ def load_central():
         servers = {}
     
     # Validate individual servers if validation is available
-    if VALIDATION_AVAILABLE and validation_passed:
-        from mcp_validation import validate_server_config
-        for server_name, server_info in servers.items():
-            try:
-                validate_server_config(server_name, server_info)
-            except MCPValidationError as e:
-                log_warn(f'服务器配置警告 - {server_name}: {e}')
+    # validate_mcp_servers_config 已单遍校验过全部 server，无需再逐个复核
     
     return servers
 
@@ -163,6 +210,9 @@ def _to_target(info: dict, client: str | None) -> dict:
     if _CLI_U is None:
         return info or {}
     try:
+        if _SPEC is not None:
+            _SPEC.load_specs(SERVERS)  # 按 SERVERS 身份记忆化：条目登记后渲染不再重复哈希
+            return _SPEC.render(info or {}, client)
         return _CLI_U.to_target_server_info(info or {}, client=client)
     except Exception:
         return info or {}
@@ -174,49 +224,57 @@ def sync_codex():
     if not p.exists():
         log_warn(f'Codex 配置不存在: {p}')
         return False
-    backup(p)
-    content = p.read_text(encoding='utf-8')
-    lines = ["\n# === MCP Servers 配置（由 MCP Local Manager 生成）==="]
-    for name,info in SERVERS.items():
-        if not info.get('enabled', True):
-            continue
-        info = _to_target(info or {}, client="codex")
-        lines.append(f"\n[mcp_servers.{name}]")
-        # Codex 默认 startup=10s/tool=60s 对索引型 MCP 偏紧：优先尊重 central 的 timeout（秒）。
-        timeout = (info or {}).get("timeout")
-        try:
-            timeout_sec = int(timeout) if timeout is not None else 60
-        except Exception:
-            timeout_sec = 60
-        if timeout_sec < 1:
-            timeout_sec = 60
-        lines.append(f"startup_timeout_sec = {timeout_sec}")
-        lines.append(f"tool_timeout_sec = {timeout_sec}")
-        cmd, args = _expand_cmd_args(info)
-        lines.append(f"command = \"{cmd}\"")
-        if args:
-            lines.append('args = ' + json.dumps(args))
-        env = info.get('env') or {}
-        if env:
-            lines.append(f"\n[mcp_servers.{name}.env]")
-            for k,v in env.items():
-                lines.append(f"{k} = \"{v}\"")
-    new_block = '\n'.join(lines)
-    # 1) 移除所有旧的 MCP 标记块（Local Manager / Central）
-    for pat in [
-        r"\n*# === MCP Servers 配置（由 MCP Local Manager 生成）===\n(?:.|\n)*?(?=\n?# ===|\Z)",
-        r"\n*# === MCP Servers 配置（由 MCP Central 生成）===\n(?:.|\n)*?(?=\n?# ===|\Z)"
-    ]:
-        content = re.sub(pat, "\n", content)
-    # 2) 保险起见：清理所有 [mcp_servers.*] 段
-    content = re.sub(r"(?ms)^\[mcp_servers\.[^\]]+\][\s\S]*?(?=^\[|\Z)", "", content)
-    # 3) 追加一次新的块
-    content = content.rstrip()+"\n"+new_block+"\n"
-    p.write_text(content, encoding='utf-8')
-    log_ok(f'Codex 配置已更新: {p}')
-    return True
+    with _locked(p):
+        content = original = p.read_text(encoding='utf-8')
+        lines = ["\n# === MCP Servers 配置（由 MCP Local Manager 生成）==="]
+        for name,info in SERVERS.items():
+            if not info.get('enabled', True):
+                continue
+            info = _to_target(info or {}, client="codex")
+            lines.append(f"\n[mcp_servers.{name}]")
+            # Codex 默认 startup=10s/tool=60s 对索引型 MCP 偏紧：优先尊重 central 的 timeout（秒）。
+            timeout = (info or {}).get("timeout")
+            try:
+                timeout_sec = int(timeout) if timeout is not None else 60
+            except Exception:
+                timeout_sec = 60
+            if timeout_sec < 1:
+                timeout_sec = 60
+            lines.append(f"startup_timeout_sec = {timeout_sec}")
+            lines.append(f"tool_timeout_sec = {timeout_sec}")
+            cmd, args = _expand_cmd_args(info)
+            lines.append(f"command = \"{cmd}\"")
+            if args:
+                lines.append('args = ' + json.dumps(args))
+            env = info.get('env') or {}
+            if env:
+                lines.append(f"\n[mcp_servers.{name}.env]")
+                for k,v in env.items():
+                    lines.append(f"{k} = \"{v}\"")
+        new_block = '\n'.join(lines)
+        if _TOML is not None:
+            # 1+2) 区间索引编辑：只删除段标记与 [mcp_servers.*] 表，其余字节原样保留
+            content = _TOML.strip_managed(content)
+        else:
+            # 1) 移除所有旧的 MCP 标记块（Local Manager / Central）
+            for pat in [
+                r"\n*# === MCP Servers 配置（由 MCP Local Manager 生成）===\n(?:.|\n)*?(?=\n?# ===|\Z)",
+                r"\n*# === MCP Servers 配置（由 MCP Central 生成）===\n(?:.|\n)*?(?=\n?# ===|\Z)"
+            ]:
+                content = re.sub(pat, "\n", content)
+            # 2) 保险起见：清理所有 [mcp_servers.*] 段
+            content = re.sub(r"(?ms)^\[mcp_servers\.[^\]]+\][\s\S]*?(?=^\[|\Z)", "", content)
+        # 3) 追加一次新的块
+        content = content.rstrip()+"\n"+new_block+"\n"
+        if content == original:
+            log_info(f'Codex 配置未变化，跳过写入: {p}')
+            return True
+        backup(p)
+        _write_text(p, content)
+        log_ok(f'Codex 配置已更新: {p}')
+        return True
 
-# ------------ JSON helpers ------------
+    # ------------ JSON helpers ------------
 def write_json(path: Path, obj: dict, max_retries: int = 3, retry_delay: float = 0.1):
     """Write JSON file with retry logic and enhanced error handling.
     
@@ -231,7 +289,7 @@ def write_json(path: Path, obj: dict, max_retries: int = 3, retry_delay: float =
             path.parent.mkdir(parents=True, exist_ok=True)
             backup(path)
             content = json.dumps(obj, ensure_ascii=False, indent=2)
-            path.write_text(content, encoding='utf-8')
+            _write_text(path, content)
             return True
         except PermissionError as e:
             if attempt < max_retries:
@@ -254,6 +312,19 @@ def write_json(path: Path, obj: dict, max_retries: int = 3, retry_delay: float =
             return False
     return False
 
+def _canonical_json(obj) -> str:
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+def _same_json(path: Path, obj: dict) -> bool:
+    """目标文件已与 obj 规范等价（键顺序无关）时返回 True：不备份、不改写、mtime 不变。"""
+    if not isinstance(path, Path):
+        return False
+    try:
+        cur = json.loads(path.read_text(encoding='utf-8'))
+    except Exception:
+        return False
+    return _canonical_json(cur) == _canonical_json(obj)
+
 def write_json_with_retry(path: Path, obj: dict, label: str = "", max_retries: int = 3):
     """Write JSON file with retry logic and logging.
     
@@ -263,6 +334,9 @@ def write_json_with_retry(path: Path, obj: dict, label: str = "", max_retries: i
         label: Label for logging purposes
         max_retries: Maximum number of retry attempts
     """
+    if _same_json(path, obj):
+        log_info(f'{label or "配置"} 未变化，跳过写入: {path}')
+        return True
     success = write_json(path, obj, max_retries)
     if success:
         if label:
@@ -295,39 +369,40 @@ def build_mcpServers(client: str | None = None):
     return out
 
 def sync_json_map(label, p: Path, key='mcpServers', allowed=False, key_client: str | None = None):
-    """Sync JSON configuration with enhanced error handling and retry logic.
+    with _locked(p):
+        """Sync JSON configuration with enhanced error handling and retry logic.
     
-    Args:
-        label: Label for logging
-        p: Path to the configuration file
-        key: Key to use for MCP servers
-        allowed: Whether to set allowed list for Gemini
+        Args:
+            label: Label for logging
+            p: Path to the configuration file
+            key: Key to use for MCP servers
+            allowed: Whether to set allowed list for Gemini
         
-    Returns:
-        bool: True if successful
-    """
-    obj = {}
-    if p.exists():
-        try:
-            content = p.read_text(encoding='utf-8')
-            if not content.strip():
-                log_warn(f'{label} 文件为空，将重写: {p}')
+        Returns:
+            bool: True if successful
+        """
+        obj = {}
+        if p.exists():
+            try:
+                content = p.read_text(encoding='utf-8')
+                if not content.strip():
+                    log_warn(f'{label} 文件为空，将重写: {p}')
+                    obj = {}
+                else:
+                    obj = json.loads(content)
+            except json.JSONDecodeError as e:
+                log_warn(f'{label} JSON 解析失败，将重写: {e}')
+                log_warn(f'错误位置: 行 {e.lineno}, 列 {e.colno}')
                 obj = {}
-            else:
-                obj = json.loads(content)
-        except json.JSONDecodeError as e:
-            log_warn(f'{label} JSON 解析失败，将重写: {e}')
-            log_warn(f'错误位置: 行 {e.lineno}, 列 {e.colno}')
-            obj = {}
-        except Exception as e:
-            log_warn(f'{label} 读取失败，将重写: {e}')
-            obj = {}
-    obj[key] = build_mcpServers(client=key_client)
-    if allowed:
-        obj.setdefault('mcp', {})['allowed'] = sorted(obj[key].keys())
+            except Exception as e:
+                log_warn(f'{label} 读取失败，将重写: {e}')
+                obj = {}
+        obj[key] = build_mcpServers(client=key_client)
+        if allowed:
+            obj.setdefault('mcp', {})['allowed'] = sorted(obj[key].keys())
     
-    # Use retry-enabled write function
-    return write_json_with_retry(p, obj, label)
+        # Use retry-enabled write function
+        return write_json_with_retry(p, obj, label)
 
 def sync_gemini():
     return sync_json_map(
@@ -375,17 +450,21 @@ def sync_vscode():
 # ------------ Claude (文件为主，命令兜底) ------------
 def sync_claude_file():
     p = HOME/'.claude'/'settings.json'
-    obj = {}
-    if p.exists():
-        try:
-            obj = json.loads(p.read_text(encoding='utf-8'))
-        except Exception as e:
-            log_warn(f'Claude settings 解析失败，将重写: {e}')
-            obj = {}
-    obj['mcpServers'] = build_mcpServers(client="claude-file")
-    write_json(p, obj)
-    log_ok(f'Claude(文件) 配置已更新: {p}')
-    return True
+    with _locked(p):
+        obj = {}
+        if p.exists():
+            try:
+                obj = json.loads(p.read_text(encoding='utf-8'))
+            except Exception as e:
+                log_warn(f'Claude settings 解析失败，将重写: {e}')
+                obj = {}
+        obj['mcpServers'] = build_mcpServers(client="claude-file")
+        if _same_json(p, obj):
+            log_info(f'Claude(文件) 配置未变化，跳过写入: {p}')
+            return True
+        write_json(p, obj)
+        log_ok(f'Claude(文件) 配置已更新: {p}')
+        return True
 
 
 def _claude_scope() -> str:
@@ -424,10 +503,23 @@ def _claude_user_mcp_servers() -> set[str]:
     m = obj.get("mcpServers") if isinstance(obj, dict) else None
     return set(m.keys()) if isinstance(m, dict) else set()
 
+def _claude_native(scope):
+    """local/project scope 可直接读写落盘文件时返回 mcp_cli 的 Claude 适配器，否则 None（走 claude CLI）。"""
+    if _TARGETS is None:
+        return None
+    try:
+        claude = _TARGETS.get('claude')
+        return claude if claude.native_registry(scope) else None
+    except Exception:
+        return None
+
 def claude_registered():
     scope = _claude_scope()
     if scope == "user":
         return _claude_user_mcp_servers()
+    claude = _claude_native(scope)
+    if claude is not None:
+        return set(claude.registry_entries(scope).keys())
     try:
         out = subprocess.run(['claude','mcp','list'], capture_output=True, text=True, timeout=10)
         text = (out.stdout or '') + "\n" + (out.stderr or '')
@@ -447,7 +539,18 @@ def sync_claude_cmd():
     want = {k for k,v in SERVERS.items() if v.get('enabled', True)}
     have = claude_registered()
     missing = sorted(want - have)
+    claude = _claude_native(scope)
+    if claude is not None:
+        # local/project scope：直接写 ~/.claude.json projects[<cwd>] / ./.mcp.json，不启动 claude 子进程
+        put = {n: claude.registry_entry(_to_target(SERVERS[n] or {}, client="claude-reg")) for n in missing}
+        try:
+            claude.write_registry(scope, put)
+        except Exception as e:
+            log_warn(f'Claude 同步失败: {e}')
+            return False
+        return _claude_cmd_done(True)
     ok = True
+    tasks = []
     for name in missing:
         info = _to_target(SERVERS[name] or {}, client="claude-reg")
         cmd = ['claude','mcp','add','--transport','stdio']
@@ -457,11 +560,24 @@ def sync_claude_cmd():
         # 展开路径中的 ~，并保证 args 为字符串
         cmd += ['--', _expand_tilde(info.get('command',''))]
         cmd += [_expand_tilde(str(a)) for a in (info.get('args') or [])]
+        tasks.append((name, cmd, 15))
+    if _PROCS is not None and len(tasks) > 1:
+        # claude CLI 读改写 ~/.claude.json 不加锁（任一 scope），并发会丢失写入：串行执行，
+        # 重试/总截止时间见 mcp_cli.procs
+        for r in _PROCS.run_all(tasks, jobs=1):
+            if not r['ok'] and r['returncode'] is None:
+                log_warn(f"Claude 同步 {r['key']} 失败: {r['error']}")
+                ok = False
+        return _claude_cmd_done(ok)
+    for name, cmd, timeout in tasks:
         try:
-            subprocess.run(cmd, check=False, timeout=15)
+            subprocess.run(cmd, check=False, timeout=timeout)
         except Exception as e:
             log_warn(f'Claude 同步 {name} 失败: {e}')
             ok=False
+    return _claude_cmd_done(ok)
+
+def _claude_cmd_done(ok):
     if ok:
         log_ok('Claude 命令兜底：已补齐缺失项或不需要补齐')
     return ok
@@ -475,15 +591,16 @@ def sync_all():
     print("\n"+"="*80)
     print("  MCP Local Manager - 同步（只改 MCP 配置）")
     print("="*80+"\n")
-    res = {
-        'codex': sync_codex(),
-        'gemini': sync_gemini(),
-        'iflow': sync_iflow(),
-        'droid': sync_droid(),
-        'claude': sync_claude(),
-        'cursor': sync_cursor(),
-        'vscode': sync_vscode(),
-    }
+    with _group_commit():
+        res = {
+            'codex': sync_codex(),
+            'gemini': sync_gemini(),
+            'iflow': sync_iflow(),
+            'droid': sync_droid(),
+            'claude': sync_claude(),
+            'cursor': sync_cursor(),
+            'vscode': sync_vscode(),
+        }
     okc = sum(1 for v in res.values() if v)
     log_ok(f'成功执行: {okc}/{len(res)} 个目标')
     return 0
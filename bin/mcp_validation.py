@@ -22,11 +22,50 @@ except ImportError:
     JSONSCHEMA_AVAILABLE = False
     JSONSchemaValidationError = Exception
 
+# Share the precompiled validator with mcp_cli (central._validate uses the same instance).
+# The repository root is added to sys.path so this works when run from any directory.
+try:
+    _REPO_ROOT = Path(__file__).resolve().parents[1]
+    if str(_REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(_REPO_ROOT))
+    from mcp_cli import validation as _SHARED  # type: ignore
+except Exception:
+    _SHARED = None
+
+_SCHEMA_PATH = Path(__file__).parent.parent / 'config' / 'mcp-servers.schema.json'
+_LOCAL_VALIDATOR = None
+
+
+def get_schema_validator():
+    """Return the compiled Draft7Validator shared across all validation entry points.
+
+    The schema is read, checked and compiled once per process. Returns None when
+    jsonschema or the schema file is unavailable.
+    """
+    global _LOCAL_VALIDATOR
+    if not JSONSCHEMA_AVAILABLE:
+        return None
+    if _SHARED is not None:
+        return _SHARED.schema_validator()
+    if _LOCAL_VALIDATOR is None and _SCHEMA_PATH.exists():
+        with open(_SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+        Draft7Validator.check_schema(schema)
+        _LOCAL_VALIDATOR = Draft7Validator(schema)
+    return _LOCAL_VALIDATOR
+
 
 # Custom exception classes
 class MCPValidationError(Exception):
-    """Base exception for MCP configuration validation errors."""
-    pass
+    """Base exception for MCP configuration validation errors.
+
+    ``errors`` holds every problem found as ``(json_pointer, message)`` pairs when the
+    single-pass validator is used; ``str(error)`` is the first message.
+    """
+
+    def __init__(self, message: str = "", errors: Optional[list] = None):
+        super().__init__(message)
+        self.errors = list(errors or [])
 
 
 class MCPSchemaError(MCPValidationError):
@@ -88,19 +127,31 @@ def validate_mcp_servers_config(config_path: Union[str, Path]) -> Dict[str, Any]
     except Exception as e:
         raise MCPConfigError(f"读取配置文件失败: {e}")
     
+    # Single pass over the manifest: schema + content rules, every error collected once
+    if _SHARED is not None:
+        try:
+            issues = _SHARED.collect_errors(config_data)
+        except Exception as e:
+            print(f"⚠️  警告: Schema 验证过程出错: {e}", file=sys.stderr)
+            issues = None
+        if issues is not None:
+            if issues:
+                cls = MCPSchemaError if JSONSCHEMA_AVAILABLE else MCPConfigError
+                prefix = "Schema 验证失败: " if JSONSCHEMA_AVAILABLE else ""
+                raise cls(f"{prefix}{issues[0][1]}", issues)
+            return config_data
+
     # If jsonschema is available, perform schema validation
     if JSONSCHEMA_AVAILABLE:
         try:
-            schema_path = Path(__file__).parent.parent / 'config' / 'mcp-servers.schema.json'
-            if schema_path.exists():
-                with open(schema_path, 'r', encoding='utf-8') as f:
-                    schema = json.load(f)
-                
-                # Validate against schema
-                validate(instance=config_data, schema=schema)
-                
+            validator = get_schema_validator()
+            if validator is not None:
+                # Validate against the precompiled schema (same rules as jsonschema.validate)
+                error = jsonschema.exceptions.best_match(validator.iter_errors(config_data))
+                if error is not None:
+                    raise error
             else:
-                print(f"⚠️  警告: Schema 文件不存在: {schema_path}", file=sys.stderr)
+                print(f"⚠️  警告: Schema 文件不存在: {_SCHEMA_PATH}", file=sys.stderr)
         except JSONSchemaValidationError as e:
             raise MCPSchemaError(f"Schema 验证失败: {e}")
         except Exception as e:
@@ -128,6 +179,12 @@ def validate_server_config(server_name: str, server_info: Dict[str, Any]) -> Non
     Raises:
         MCPValidationError: If server configuration is invalid
     """
+    if _SHARED is not None:
+        issues = _SHARED.server_errors(server_name, server_info)
+        if issues:
+            raise MCPValidationError(issues[0][1], issues)
+        return
+
     if not isinstance(server_info, dict):
         raise MCPValidationError(f"服务器 '{server_name}' 配置必须是对象格式")
     
@@ -198,6 +255,12 @@ def validate_central_config_format(config_data: Dict[str, Any]) -> Dict[str, Any
     Raises:
         MCPConfigError: If configuration structure is invalid
     """
+    if _SHARED is not None:
+        issues = _SHARED.collect_errors(config_data)
+        if issues:
+            raise MCPConfigError(issues[0][1], issues)
+        return config_data
+
     if not isinstance(config_data, dict):
         raise MCPConfigError("配置文件必须是对象格式")
     
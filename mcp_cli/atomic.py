@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""崩溃安全的持久化写入（central 与各目标端配置统一使用）。
+
+`write_bytes/write_text/write_json` 的步骤：
+1) 在目标同目录创建唯一临时文件（mkstemp，避免并发写入者共用固定的 .tmp 名）；
+2) 写入并 fsync 文件内容；
+3) os.replace 原子替换目标（目标为符号链接时替换其指向的真实文件，保留链接）；
+4) fsync 所在目录，使 rename 本身落盘。
+
+任一步骤失败都会清理临时文件，目标文件要么是旧内容、要么是完整的新内容。
+
+组提交：在 `with group_commit():` 内的写入仍逐个 fsync 文件内容，但目录 fsync 推迟到
+退出时按目录去重执行——一次落地多个文件（clear/同步全部目标）时每个目录只付一次代价。
+
+设置 MCP_FSYNC=0 可跳过 fsync（仍保持原子替换；用于临时目录/CI 等不在意掉电的场景）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import stat
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+_LOCAL = threading.local()
+
+
+def _fsync_enabled() -> bool:
+    return os.environ.get("MCP_FSYNC", "1") != "0"
+
+
+def _read_umask() -> int:
+    # 读取 umask 只能“设置再恢复”：期间其它线程新建的文件会得到 0666/0777，
+    # 因此只在导入时（尚未启动 UI 等多线程服务）读取一次并缓存
+    old = os.umask(0)
+    os.umask(old)
+    return old
+
+
+_UMASK = _read_umask()
+
+
+def _umask() -> int:
+    return _UMASK
+
+
+def fsync_dir(d: Path) -> None:
+    """fsync 目录项（不支持目录 fsync 的平台上静默跳过）。"""
+    if not _fsync_enabled():
+        return
+    try:
+        fd = os.open(str(d), os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def group_commit() -> Iterator[None]:
+    """批量写入期间推迟目录 fsync，退出时每个目录只 fsync 一次（可嵌套，以最外层为准）。"""
+    if getattr(_LOCAL, "dirs", None) is not None:
+        yield
+        return
+    _LOCAL.dirs = set()
+    try:
+        yield
+    finally:
+        dirs: set[str] = _LOCAL.dirs
+        _LOCAL.dirs = None
+        for d in sorted(dirs):
+            fsync_dir(Path(d))
+
+
+def write_bytes(path: Path, data: bytes) -> None:
+    path = Path(path)
+    if path.is_symlink():
+        path = path.resolve()
+    d = path.parent
+    d.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_umask()
+
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(d))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            if _fsync_enabled():
+                os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+    pending: set[str] | None = getattr(_LOCAL, "dirs", None)
+    if pending is not None:
+        pending.add(str(d))
+    else:
+        fsync_dir(d)
+
+
+def write_text(path: Path, text: str, encoding: str = "utf-8") -> None:
+    write_bytes(path, text.encode(encoding))
+
+
+def write_json(path: Path, obj: Any) -> None:
+    write_text(path, json.dumps(obj, ensure_ascii=False, indent=2))
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""内容寻址的备份库（~/.mcp-central/backups/）。
+
+布局：
+- objects/<sha[:2]>/<sha[2:]>       原始内容（各文件的最新版本，便于快速恢复）
+- objects/<sha[:2]>/<sha[2:]>.gz    较旧版本压缩存放
+- index.jsonl                       追加式索引，每行 {"path", "ts", "sha256", "size"}
+- summary.json                      索引摘要：blob 合计字节数、各文件版本数与最新记录，
+                                    按 index.jsonl 的 (inode, size, mtime_ns) 校验，不符时全量重建
+
+约定：
+- 相同内容只存一份（按 sha256 去重）；与该文件上一版本内容相同则不新增版本；
+- 保留预算：每个文件最多保留 MCP_BACKUP_KEEP 个版本（默认 50），所有 blob 合计不超过
+  MCP_BACKUP_MAX_BYTES（默认 50MB，超出时从最旧版本开始淘汰，但始终保留每个文件的最新版本）；
+- 登记快照只读写摘要（不重读索引、不逐个 stat blob）；仅当版本数或 blob 合计超出预算时
+  才全量扫描并淘汰；
+- list/restore 只读索引，不扫描文件系统。
+
+写入方无需直接调用本模块：utils.backup() 会在写入前登记快照，并保留兼容的 `<file>.backup`。
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from . import atomic as ATOMIC
+from . import locks as LOCKS
+
+INDEX = "index.jsonl"
+SUMMARY = "summary.json"
+_SUMMARY_VERSION = 1
+
+
+def _keep() -> int:
+    try:
+        return max(1, int(os.environ.get("MCP_BACKUP_KEEP", "50")))
+    except ValueError:
+        return 50
+
+
+def _max_bytes() -> int:
+    try:
+        return max(0, int(os.environ.get("MCP_BACKUP_MAX_BYTES", str(50 * 1024 * 1024))))
+    except ValueError:
+        return 50 * 1024 * 1024
+
+
+def _blob(root: Path, sha: str) -> Path:
+    return root / "objects" / sha[:2] / sha[2:]
+
+
+def _gz(blob: Path) -> Path:
+    return blob.with_name(blob.name + ".gz")
+
+
+def _key(path: Path) -> str:
+    return str(Path(path).expanduser().absolute())
+
+
+def read_index(root: Path) -> list[dict[str, Any]]:
+    """按写入顺序（旧→新）返回索引记录；损坏的行被忽略。"""
+    try:
+        lines = (root / INDEX).read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    out: list[dict[str, Any]] = []
+    for line in lines:
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(rec, dict) and isinstance(rec.get("sha256"), str) and rec.get("path"):
+            out.append(rec)
+    return out
+
+
+def _write_private(p: Path, data: bytes) -> None:
+    # 备份可能含 env 中的密钥：目录 0700、blob 0600
+    p.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    ATOMIC.write_bytes(p, data)
+    os.chmod(p, 0o600)
+
+
+def _store(root: Path, sha: str, data: bytes) -> tuple[Path, int]:
+    """写入 blob（已存在则跳过），返回 (blob 路径, blob 合计字节数的变化)。"""
+    blob = _blob(root, sha)
+    if blob.exists():
+        return blob, 0
+    added = len(data)
+    gz = _gz(blob)
+    if gz.exists():
+        # 旧版本再次成为最新：解压回原始形态，便于快速恢复
+        added -= _blob_size(root, sha)
+        gz.unlink()
+    _write_private(blob, data)
+    return blob, added
+
+
+def _index_sig(root: Path) -> list[int] | None:
+    try:
+        st = (root / INDEX).stat()
+    except OSError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def _summarize(root: Path, records: list[dict[str, Any]]) -> dict[str, Any]:
+    """由索引记录全量重建摘要（stat 每个被引用的 blob）。"""
+    counts: dict[str, int] = {}
+    for r in records:
+        counts[r["path"]] = counts.get(r["path"], 0) + 1
+    return {
+        "bytes": sum(_blob_size(root, s) for s in {r["sha256"] for r in records}),
+        "counts": counts,
+        "latest": {r["path"]: r for r in records},
+    }
+
+
+def _load_summary(root: Path) -> dict[str, Any]:
+    """读取摘要；缺失、损坏或与索引不一致（旧版本/外部改动）时全量重建。"""
+    try:
+        obj = json.loads((root / SUMMARY).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        obj = None
+    if (
+        isinstance(obj, dict)
+        and obj.get("version") == _SUMMARY_VERSION
+        and obj.get("index") == _index_sig(root)
+        and isinstance(obj.get("bytes"), int)
+        and isinstance(obj.get("counts"), dict)
+        and isinstance(obj.get("latest"), dict)
+    ):
+        return obj
+    return _summarize(root, read_index(root))
+
+
+def _save_summary(root: Path, summary: dict[str, Any]) -> None:
+    summary.update(version=_SUMMARY_VERSION, index=_index_sig(root))
+    _write_private(root / SUMMARY, json.dumps(summary, ensure_ascii=False).encode("utf-8"))
+
+
+def snapshot(root: Path, path: Path) -> tuple[dict[str, Any], Path] | None:
+    """登记 path 当前内容为一个版本，返回 (索引记录, blob 路径)；文件不存在返回 None。"""
+    try:
+        data = Path(path).read_bytes()
+    except OSError:
+        return None
+    sha = hashlib.sha256(data).hexdigest()
+    key = _key(path)
+    # 索引/摘要的追加与淘汰重写需与其它进程互斥
+    with LOCKS.locked(root / INDEX):
+        summary = _load_summary(root)
+        last = summary["latest"].get(key)
+        blob, added = _store(root, sha, data)
+        summary["bytes"] += added
+        if last is not None and last["sha256"] == sha:
+            if added:
+                _save_summary(root, summary)
+            return last, blob
+        rec = {"path": key, "ts": time.time(), "sha256": sha, "size": len(data)}
+        root.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with open(root / INDEX, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        summary["latest"][key] = rec
+        summary["counts"][key] = summary["counts"].get(key, 0) + 1
+        budget = _max_bytes()
+        if summary["counts"][key] > _keep() or (budget and summary["bytes"] > budget):
+            summary = _summarize(root, _prune(root, read_index(root)))
+        elif last is not None and last["sha256"] not in {
+            r["sha256"] for r in summary["latest"].values()
+        }:
+            # 上一版本已不是任何文件的最新版本：压缩其 blob
+            summary["bytes"] += _compress(root, last["sha256"])
+        _save_summary(root, summary)
+    return rec, blob
+
+
+def _latest_by_path(records: list[dict[str, Any]]) -> dict[str, str]:
+    return {r["path"]: r["sha256"] for r in records}
+
+
+def _compress(root: Path, sha: str) -> int:
+    """压缩 blob，返回 blob 合计字节数的变化。"""
+    blob = _blob(root, sha)
+    try:
+        data = blob.read_bytes()
+    except OSError:
+        return 0
+    packed = gzip.compress(data, mtime=0)
+    _write_private(_gz(blob), packed)
+    try:
+        blob.unlink()
+    except OSError:
+        return len(packed)
+    return len(packed) - len(data)
+
+
+def _blob_size(root: Path, sha: str) -> int:
+    blob = _blob(root, sha)
+    for p in (blob, _gz(blob)):
+        try:
+            return p.stat().st_size
+        except OSError:
+            continue
+    return 0
+
+
+def _prune(root: Path, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """按保留预算淘汰旧版本，重写索引并删除不再被引用的 blob；返回保留的记录。"""
+    keep = _keep()
+    latest = _latest_by_path(records)
+    counts: dict[str, int] = {}
+    kept_rev: list[dict[str, Any]] = []
+    for r in reversed(records):
+        n = counts.get(r["path"], 0)
+        if n < keep:
+            kept_rev.append(r)
+        counts[r["path"]] = n + 1
+    kept = list(reversed(kept_rev))
+
+    budget = _max_bytes()
+    if budget:
+        sizes = {s: _blob_size(root, s) for s in {r["sha256"] for r in kept}}
+        total = sum(sizes.values())
+        i = 0
+        while total > budget and i < len(kept):
+            r = kept[i]
+            if latest.get(r["path"]) == r["sha256"]:
+                i += 1
+                continue
+            kept.pop(i)
+            if all(x["sha256"] != r["sha256"] for x in kept):
+                total -= sizes.get(r["sha256"], 0)
+
+    text = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in kept)
+    ATOMIC.write_text(root / INDEX, text)
+
+    live = {r["sha256"] for r in kept}
+    current = set(latest.values())
+    for sha in {r["sha256"] for r in records}:
+        blob = _blob(root, sha)
+        if sha not in live:
+            for p in (blob, _gz(blob)):
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+        elif sha not in current and blob.exists():
+            _compress(root, sha)
+    return kept
+
+
+def versions(root: Path, path: Path | None = None) -> list[dict[str, Any]]:
+    """列出版本（新→旧）；给出 path 时只列该文件。"""
+    records = read_index(root)
+    if path is not None:
+        key = _key(path)
+        records = [r for r in records if r["path"] == key]
+    return list(reversed(records))
+
+
+def read_blob(root: Path, sha: str) -> bytes:
+    blob = _blob(root, sha)
+    try:
+        data = blob.read_bytes()
+    except FileNotFoundError:
+        data = gzip.decompress(_gz(blob).read_bytes())
+    if hashlib.sha256(data).hexdigest() != sha:
+        raise ValueError(f"备份内容损坏: {sha[:12]}")
+    return data
+
+
+def resolve(root: Path, path: Path, ref: str | None = None) -> dict[str, Any] | None:
+    """定位要恢复的版本：ref 为 sha256 前缀；缺省为“与当前内容不同的最近版本”。"""
+    recs = versions(root, path)
+    if ref:
+        hits = [r for r in recs if r["sha256"].startswith(ref)]
+        if len({r["sha256"] for r in hits}) > 1:
+            raise ValueError(f"版本前缀不唯一: {ref}")
+        return hits[0] if hits else None
+    try:
+        cur = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        cur = None
+    return next((r for r in recs if r["sha256"] != cur), None)
+
+
+def restore(root: Path, path: Path, rec: dict[str, Any], dest: Path | None = None) -> Path:
+    """把 rec 对应的内容写回 dest（默认原路径）；写前为当前内容登记快照，恢复本身可再撤销。"""
+    data = read_blob(root, rec["sha256"])
+    target = Path(dest) if dest is not None else Path(rec["path"])
+    # 与其它写入方互斥：登记的快照必须是被覆盖前的内容
+    with LOCKS.locked(target):
+        snapshot(root, target)
+        ATOMIC.write_bytes(target, data)
+    return target
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""central 清单的「已解析 + 已校验」缓存。
+
+缓存键：(inode, size, mtime_ns, schema 哈希)。
+- 进程内：缓存解析结果与各校验器的结论（UI 等常驻进程重复读取时近乎零成本）。
+- 磁盘：~/.mcp-central/cache/central.json 仅记录校验结论与内容摘要，
+  跨进程复用（CLI 每次启动都可跳过 schema 校验）。
+
+约定：
+- `load()` 返回的 data 为共享对象，调用方只读；需要修改请先复制。
+- 任何经 central._save_central 的写入都会先 `invalidate()`，再以 `prime()` 登记新内容的
+  校验结论（增量校验只需校验变更条目），无需调用方关心。
+- 设置 MCP_CENTRAL_CACHE=0 可完全关闭缓存（排障用）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+SCHEMA_PATH = Path(__file__).resolve().parents[1] / "config" / "mcp-servers.schema.json"
+
+# mtime 距今小于该值的文件视为“racy”：同一时间粒度内可能被再次改写而 stat 不变，
+# 命中时需比对内容字节（思路同 git index 的 racy 检测）。
+_RACY_NS = 2_000_000_000
+
+# path -> {"key": tuple, "raw": bytes, "data": Any, "verdicts": {tag: (ok, msg)}}
+_MEM: dict[str, dict[str, Any]] = {}
+_SCHEMA_HASH: tuple[tuple[int, int] | None, str] | None = None
+
+
+def enabled() -> bool:
+    return os.environ.get("MCP_CENTRAL_CACHE", "1") != "0"
+
+
+def schema_hash() -> str:
+    """schema 文件内容的 sha256（按 schema 文件的 stat 记忆化）。"""
+    global _SCHEMA_HASH
+    try:
+        st = SCHEMA_PATH.stat()
+        sig: tuple[int, int] | None = (st.st_size, st.st_mtime_ns)
+    except OSError:
+        sig = None
+    if _SCHEMA_HASH is not None and _SCHEMA_HASH[0] == sig:
+        return _SCHEMA_HASH[1]
+    if sig is None:
+        digest = "none"
+    else:
+        digest = hashlib.sha256(SCHEMA_PATH.read_bytes()).hexdigest()
+    _SCHEMA_HASH = (sig, digest)
+    return digest
+
+
+def fingerprint(path: Path) -> tuple[int, int, int, str] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns, schema_hash())
+
+
+def _is_racy(key: tuple[int, int, int, str]) -> bool:
+    return time.time_ns() - key[2] < _RACY_NS
+
+
+def _disk_path(path: Path) -> Path:
+    # ~/.mcp-central/config/mcp-servers.json -> ~/.mcp-central/cache/central.json
+    return path.parent.parent / "cache" / "central.json"
+
+
+def _read_disk(path: Path) -> dict[str, Any]:
+    try:
+        obj = json.loads(_disk_path(path).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    if not isinstance(obj, dict) or obj.get("path") != str(path):
+        return {}
+    return obj
+
+
+def _write_disk(path: Path, entry: dict[str, Any]) -> None:
+    dp = _disk_path(path)
+    payload = {
+        "path": str(path),
+        "key": list(entry["key"]),
+        "sha256": hashlib.sha256(entry["raw"]).hexdigest(),
+        "verdicts": {k: list(v) for k, v in entry["verdicts"].items()},
+    }
+    try:
+        dp.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dp.with_name(f"{dp.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, dp)
+    except Exception:
+        # 缓存写失败不影响主流程
+        pass
+
+
+def load(path: Path) -> dict[str, Any] | None:
+    """读取并解析 central，返回缓存条目（含 data/verdicts）；文件缺失或非法 JSON 返回 None。
+
+    返回的 entry["data"] 为共享对象，调用方不得原地修改。
+    """
+    key = fingerprint(path)
+    if key is None:
+        _MEM.pop(str(path), None)
+        return None
+
+    cached = _MEM.get(str(path)) if enabled() else None
+    if cached is not None and cached["key"] == key and not _is_racy(key):
+        return cached
+
+    try:
+        raw = path.read_bytes()
+    except OSError:
+        return None
+    if cached is not None and cached["key"] == key and cached["raw"] == raw:
+        return cached
+
+    try:
+        data = json.loads(raw.decode("utf-8")) if raw.strip() else None
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    if data is None:
+        return None
+
+    entry: dict[str, Any] = {"key": key, "raw": raw, "data": data, "verdicts": {}}
+    if enabled():
+        disk = _read_disk(path)
+        if (
+            disk.get("key") == list(key)
+            and disk.get("sha256") == hashlib.sha256(raw).hexdigest()
+            and isinstance(disk.get("verdicts"), dict)
+        ):
+            entry["verdicts"] = {
+                str(k): (bool(v[0]), str(v[1]))
+                for k, v in disk["verdicts"].items()
+                if isinstance(v, list) and len(v) == 2
+            }
+        _MEM[str(path)] = entry
+    return entry
+
+
+def get_verdict(entry: dict[str, Any], tag: str) -> tuple[bool, str] | None:
+    """取缓存的校验结论；tag 区分不同校验器（如 central / schema）。"""
+    if not enabled():
+        return None
+    return entry["verdicts"].get(tag)
+
+
+def put_verdict(path: Path, entry: dict[str, Any], tag: str, ok: bool, msg: str) -> None:
+    if not enabled():
+        return
+    entry["verdicts"][tag] = (bool(ok), str(msg))
+    _write_disk(path, entry)
+
+
+def prime(path: Path, raw: bytes, verdicts: dict[str, tuple[bool, str]]) -> None:
+    """写入方刚把 raw 落盘且已校验通过：直接为新内容登记校验结论（免去下次全量校验）。
+
+    仅当磁盘内容与 raw 一致时登记，避免与并发写入者的结果混淆。
+    """
+    if not enabled():
+        return
+    key = fingerprint(path)
+    if key is None:
+        return
+    try:
+        if path.read_bytes() != raw:
+            return
+        data = json.loads(raw.decode("utf-8"))
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+        return
+    entry: dict[str, Any] = {
+        "key": key,
+        "raw": raw,
+        "data": data,
+        "verdicts": {str(k): (bool(v[0]), str(v[1])) for k, v in verdicts.items()},
+    }
+    _MEM[str(path)] = entry
+    _write_disk(path, entry)
+
+
+def invalidate(path: Path) -> None:
+    """丢弃 path 的进程内与磁盘缓存（central 写入后调用）。"""
+    _MEM.pop(str(path), None)
+    try:
+        _disk_path(path).unlink()
+    except FileNotFoundError:
+        pass
+    except OSError:
+        pass
@@ -2,6 +2,7 @@
 """mcp central 子命令：管理 ~/.mcp-central/config/mcp-servers.json（CRUD/模板/导入导出/校验/体检）。
 
 特性：
+- `batch` 从文件/stdin 读取多条操作，内存中应用后只校验、备份、写入一次（全部成功或全部不写）。
 - 所有写操作均支持 dry-run（args._dry_run 或 MCP_FORCE_DRY_RUN=1）与自动备份。
 - 写入采用临时文件 + 原子替换，降低并发风险。
 - 所有子命令支持 --json 输出（结构化结果），默认人类可读输出。
@@ -9,13 +10,21 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import os
 import re
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
+from .. import atomic as ATOMIC
+from .. import central_cache as CACHE
+from .. import cow as COW
+from .. import locks as LOCKS
+from .. import pathindex as PATHS
 from .. import utils as U
+from .. import validation as V
 
 
 def _dry(args) -> bool:
@@ -23,14 +32,16 @@ def _dry(args) -> bool:
     return False
 
 
-def _load_central_or_new() -> dict[str, Any]:
-    if U.CENTRAL.exists():
-        try:
-            data = U.load_json(U.CENTRAL, {})
-            if not isinstance(data, dict):
-                data = {}
-        except Exception:
-            data = {}
+def _load_central_or_new(*, shared: bool = False) -> dict[str, Any]:
+    """读取 central（经 central_cache 缓存）；不存在或非法时返回最小骨架。
+
+    shared=True 时返回与缓存共享的对象（只读场景，如 doctor/UI 状态），调用方不得原地修改；
+    默认返回写时复制快照（mcp_cli.cow）：可增删/替换 servers 中的条目后交给 _save_central，
+    但条目本身与缓存共享，修改字段须经 COW.edit/derive。
+    """
+    entry = CACHE.load(U.CENTRAL)
+    if entry is not None and isinstance(entry["data"], dict):
+        data = dict(entry["data"]) if shared else COW.snapshot(entry["data"])
     else:
         data = {}
     data.setdefault("version", "1.1.0")
@@ -40,178 +51,97 @@ def _load_central_or_new() -> dict[str, Any]:
 
 
 def _atomic_write(path: Path, content: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(".tmp")
-    tmp.write_text(content, encoding="utf-8")
-    os.replace(tmp, path)
+    ATOMIC.write_text(path, content)
 
 
-def _save_central(obj: dict[str, Any], *, dry: bool) -> None:
+def _save_central(obj: dict[str, Any], *, dry: bool, changed: set[str] | None = None) -> None:
+    """校验并写入 central。
+
+    changed 为本次修改涉及的 server 名（含被删除/改名前的名字）；给出时走增量校验，
+    否则全量校验。写入成功后为新内容预置 "central" 校验结论，下一次编辑仍可增量。
+    """
     # 写盘前强制校验（即使上层漏调 _validate，也不写入非法配置）
-    ok, msg = _validate(obj)
+    if changed is None:
+        ok, msg = _validate(obj)
+    else:
+        ok, msg = _validate_changes(obj, changed)
     if not ok:
         print(f"❌ 校验失败: {msg}")
         raise ValueError(msg)
-    try:
-        if not dry:
+    if dry:
+        return
+    with LOCKS.locked(U.CENTRAL):
+        content = ""
+        try:
             U.backup(U.CENTRAL)
-            _atomic_write(U.CENTRAL, json.dumps(obj, ensure_ascii=False, indent=2))
-    except Exception as e:
-        print(f"❌ 保存失败: {e}")
-        raise
+            content = json.dumps(obj, ensure_ascii=False, indent=2)
+            _atomic_write(U.CENTRAL, content)
+        except Exception as e:
+            print(f"❌ 保存失败: {e}")
+            raise
+        finally:
+            CACHE.invalidate(U.CENTRAL)
+        CACHE.prime(
+            U.CENTRAL, content.encode("utf-8"), {"central": (True, "ok"), "schema": (True, "ok")}
+        )
+
+
+def _central_writer(fn: Callable[..., int]) -> Callable[..., int]:
+    """读-改-写 central 的子命令：从读取到写入全程持有 central 写锁（见 mcp_cli.locks）。"""
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> int:
+        with LOCKS.locked(U.CENTRAL):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def _validated_central() -> tuple[dict[str, Any], bool, str]:
+    """读取 central 并返回 (data, ok, msg)；文件未变化时直接复用缓存的校验结论。
+
+    data 与缓存共享，仅供只读使用。
+    """
+    data = _load_central_or_new(shared=True)
+    entry = CACHE.load(U.CENTRAL)
+    if entry is None:
+        ok, msg = _validate(data)
+        return data, ok, msg
+    cached = CACHE.get_verdict(entry, "central")
+    if cached is not None:
+        return data, cached[0], cached[1]
+    ok, msg = _validate(data)
+    CACHE.put_verdict(U.CENTRAL, entry, "central", ok, msg)
+    return data, ok, msg
 
 
 def _validate(obj: dict[str, Any]) -> tuple[bool, str]:
-    """校验“待写入”的 central 对象（内存态），而不是校验磁盘现有文件。"""
-    try:
-        data = json.loads(json.dumps(obj))
-    except Exception as e:
-        return False, f"配置无法序列化为 JSON: {e}"
+    """校验“待写入”的 central 对象（内存态），而不是校验磁盘现有文件。
 
-    # 1) 基础内容校验（不依赖 jsonschema / mcp_validation），确保缺少依赖时也不会放过明显错误
+    规则见 mcp_cli.validation：单遍校验顶层信封与逐个 server，返回第一条错误；
+    未变化的 server 复用记忆化结论。jsonschema 不可用时仍执行手工校验，
+    避免“静默跳过导致写入脏配置”。
+    """
     try:
-        if not isinstance(data, dict):
-            raise ValueError("配置必须是对象格式")
-        for k in ("version", "description", "servers"):
-            if k not in data:
-                raise ValueError(f"缺少必需字段: '{k}'")
-        if not isinstance(data.get("version"), str) or not str(data.get("version")).strip():
-            raise ValueError("'version' 字段必须是非空字符串")
-        if not isinstance(data.get("description"), str) or not str(data.get("description")).strip():
-            raise ValueError("'description' 字段必须是非空字符串")
-        if not isinstance(data.get("servers"), dict):
-            raise ValueError("'servers' 字段必须是对象格式")
+        return V.validate_all(obj)
     except Exception as e:
         return False, str(e)
 
-    # 2) 额外字段（additionalProperties=false）与关键字段类型校验（覆盖 schema 里的主要约束）
-    allowed_top = {"version", "description", "servers"}
-    allowed_server = {
-        "enabled",
-        "type",
-        "command",
-        "args",
-        "env",
-        "url",
-        "timeout",
-        "headers",
-        "source",
-        "client_overrides",
-    }
-    extra_top = set(data.keys()) - allowed_top
-    if extra_top:
-        return False, f"不允许的顶层字段: {sorted(extra_top)}"
-    servers: dict[str, Any] = data.get("servers") or {}
-    for name, info in servers.items():
-        if not isinstance(info, dict):
-            return False, f"服务器 '{name}' 配置必须是对象格式"
-        extra = set(info.keys()) - allowed_server
-        if extra:
-            return False, f"服务器 '{name}' 包含不支持的字段: {sorted(extra)}"
 
-        cmd = info.get("command")
-        if not isinstance(cmd, str) or not cmd.strip():
-            return False, f"服务器 '{name}' 缺少必需字段: 'command'"
-
-        if "enabled" in info and not isinstance(info.get("enabled"), bool):
-            return False, f"服务器 '{name}' 的 'enabled' 必须是布尔值"
-
-        if "type" in info:
-            v = info.get("type")
-            if not isinstance(v, str) or not v.strip():
-                return False, f"服务器 '{name}' 的 'type' 必须是非空字符串"
-
-        if "args" in info:
-            args = info.get("args")
-            if not isinstance(args, list):
-                return False, f"服务器 '{name}' 的 'args' 必须是数组"
-            for i, arg in enumerate(args):
-                if not isinstance(arg, str):
-                    return False, f"服务器 '{name}' 的 'args[{i}]' 必须是字符串"
-
-        if "env" in info:
-            env = info.get("env")
-            if not isinstance(env, dict):
-                return False, f"服务器 '{name}' 的 'env' 必须是对象"
-            for k, v in env.items():
-                if not isinstance(v, str):
-                    return False, f"服务器 '{name}' 的环境变量 '{k}' 必须是字符串"
-
-        if "url" in info:
-            url = info.get("url")
-            if not isinstance(url, str) or not url.strip():
-                return False, f"服务器 '{name}' 的 'url' 必须是非空字符串"
-
-        if "timeout" in info:
-            timeout = info.get("timeout")
-            if isinstance(timeout, bool) or not isinstance(timeout, int):
-                return False, f"服务器 '{name}' 的 'timeout' 必须是整数（秒）"
-            if timeout < 1 or timeout > 3600:
-                return False, f"服务器 '{name}' 的 'timeout' 超出范围（1-3600）: {timeout}"
-
-        if "headers" in info:
-            headers = info.get("headers")
-            if not isinstance(headers, dict):
-                return False, f"服务器 '{name}' 的 'headers' 必须是对象"
-            for k, v in headers.items():
-                if not isinstance(v, str):
-                    return False, f"服务器 '{name}' 的 HTTP 头 '{k}' 必须是字符串"
-
-        if "source" in info:
-            source = info.get("source")
-            if not isinstance(source, str) or not source.strip():
-                return False, f"服务器 '{name}' 的 'source' 必须是非空字符串"
-
-        if "client_overrides" in info:
-            overrides = info.get("client_overrides")
-            if not isinstance(overrides, dict):
-                return False, f"服务器 '{name}' 的 'client_overrides' 必须是对象"
-            for client, override in overrides.items():
-                base = f"服务器 '{name}' 的 client_overrides.{client}"
-                if not isinstance(override, dict):
-                    return False, f"{base} 必须是对象"
-                if "command" in override:
-                    v = override.get("command")
-                    if not isinstance(v, str) or not v.strip():
-                        return False, f"{base}.command 必须是非空字符串"
-                if "args" in override:
-                    args = override.get("args")
-                    if not isinstance(args, list):
-                        return False, f"{base}.args 必须是数组"
-                    for i, arg in enumerate(args):
-                        if not isinstance(arg, str):
-                            return False, f"{base}.args[{i}] 必须是字符串"
-                if "env" in override:
-                    env = override.get("env")
-                    if not isinstance(env, dict):
-                        return False, f"{base}.env 必须是对象"
-                    for k, v in env.items():
-                        if not isinstance(v, str):
-                            return False, f"{base} 环境变量 '{k}' 必须是字符串"
-
-    # 3) 若 jsonschema 可用，则执行完整 schema 校验（更精确的类型/范围校验）
-    # 注意：mcp_validation 在 CLI 场景可用（bin 目录），但库/测试环境不一定可 import。
-    schema_path = Path(__file__).resolve().parents[2] / "config" / "mcp-servers.schema.json"
-    if schema_path.exists():
-        try:
-            import jsonschema
-        except ImportError:
-            # jsonschema 不可用：上面的手工校验已覆盖 schema 的关键约束，
-            # 避免“静默跳过导致写入脏配置”。
-            pass
-        else:
-            try:
-                schema = json.loads(schema_path.read_text(encoding="utf-8"))
-                jsonschema.validate(instance=data, schema=schema)
-            except Exception as e:
-                try:
-                    from mcp_validation import format_validation_error
-
-                    return False, format_validation_error(e)
-                except Exception:
-                    return False, str(e)
+def _validate_changes(obj: dict[str, Any], changed: set[str]) -> tuple[bool, str]:
+    """增量校验：磁盘上的 central 已通过校验时，只校验信封与 changed 中的条目。
 
-    return True, "ok"
+    基线结论来自 central_cache（进程内或 ~/.mcp-central/cache）；缺失/失败时退回全量校验。
+    """
+    base_ok = False
+    entry = CACHE.load(U.CENTRAL)
+    if entry is not None:
+        cached = CACHE.get_verdict(entry, "central")
+        base_ok = bool(cached and cached[0])
+    try:
+        return V.validate_changes(obj, changed, base_ok=base_ok)
+    except Exception as e:
+        return False, str(e)
 
 
 def _parse_kv_list(items: list[str]) -> dict[str, str]:
@@ -270,6 +200,7 @@ def _cmd_show(args) -> int:
     return 0
 
 
+@_central_writer
 def _cmd_add(args) -> int:
     dry = _dry(args)
     use_json = bool(args.json)
@@ -279,22 +210,9 @@ def _cmd_add(args) -> int:
     if name in sv:
         print(f"❌ 已存在: {name}")
         return 2
-    entry: dict[str, Any] = {}
-    entry["command"] = getattr(args, "command", None)
-    if getattr(args, "args", None):
-        entry["args"] = args.args
-    if getattr(args, "env", None):
-        entry["env"] = _parse_kv_list(args.env)
-    if getattr(args, "headers", None):
-        entry["headers"] = _parse_kv_list(args.headers)
-    if getattr(args, "type", None):
-        entry["type"] = args.type
-    if getattr(args, "url", None):
-        entry["url"] = args.url
-    if getattr(args, "enabled", None) is not None:
-        entry["enabled"] = bool(args.enabled)
+    entry = _build_entry(lambda k: getattr(args, k, None))
     sv[name] = entry
-    ok, msg = _validate(data)
+    ok, msg = _validate_changes(data, {name})
     if not ok:
         print(f"❌ 校验失败: {msg}")
         return 3
@@ -302,11 +220,104 @@ def _cmd_add(args) -> int:
         print("[DRY-RUN] 将新增服务:")
         _print_or_json({name: entry}, use_json)
         return 0
-    _save_central(data, dry=False)
+    _save_central(data, dry=False, changed={name})
     _print_or_json({"added": name, "entry": entry}, use_json)
     return 0
 
 
+def _kv(v: Any) -> dict[str, str]:
+    """KEY=VAL 列表（CLI）或对象（batch）统一为 dict。"""
+    if isinstance(v, dict):
+        return {str(k): str(x) for k, x in v.items()}
+    return _parse_kv_list(list(v or []))
+
+
+def _build_entry(get: Callable[[str], Any]) -> dict[str, Any]:
+    """按 add 的参数（command/args/env/headers/type/url/enabled）构造新条目。"""
+    entry: dict[str, Any] = {}
+    entry["command"] = get("command")
+    if get("args"):
+        entry["args"] = list(get("args"))
+    if get("env"):
+        entry["env"] = _kv(get("env"))
+    if get("headers"):
+        entry["headers"] = _kv(get("headers"))
+    if get("type"):
+        entry["type"] = get("type")
+    if get("url"):
+        entry["url"] = get("url")
+    if get("enabled") is not None:
+        entry["enabled"] = bool(get("enabled"))
+    return entry
+
+
+def _apply_update(
+    sv: dict[str, Any], name: str, get: Callable[[str], Any]
+) -> tuple[str, Any, dict[str, Any], set[str]]:
+    """按 update 的参数修改 sv[name]（写时复制），返回 (最终名称, before, after, 变更名集合)。
+
+    get(key) 取参数值，key 与 `mcp central update` 的选项同名（如 set_env/append_arg/rename）。
+    出错时抛出 ValueError，sv 保持不变。
+    """
+    if name not in sv:
+        raise ValueError(f"未找到: {name}")
+    # 写时复制：before 即原条目（不再修改），entry 为新条目，未改动字段与 before 共享
+    before = sv[name]
+    entry: dict[str, Any] = COW.derive(before)
+    changed = {name}
+
+    newn = get("rename")
+    if newn and newn != name:
+        if newn in sv:
+            raise ValueError(f"rename 冲突: 目标已存在 {newn}")
+        sv.pop(name)
+        name = newn
+        changed.add(name)
+
+    if get("command"):
+        entry["command"] = get("command")
+    if get("type"):
+        entry["type"] = get("type")
+    if get("url"):
+        entry["url"] = get("url")
+    if get("enabled") is not None:
+        entry["enabled"] = bool(get("enabled"))
+    # args 操作（仅在有改动时分配新列表）
+    prepend, append, remove = get("prepend_arg"), get("append_arg"), get("remove_arg")
+    if prepend or append or remove:
+        arr = list(entry.get("args", []))
+        if prepend:
+            arr = list(prepend) + arr
+        if append:
+            arr = arr + list(append)
+        if remove:
+            arr = [x for x in arr if x not in set(remove)]
+        if arr:
+            entry["args"] = arr
+        else:
+            entry.pop("args", None)
+    # env / headers 操作
+    for key, set_key, unset_key in (
+        ("env", "set_env", "unset_env"),
+        ("headers", "set_header", "unset_header"),
+    ):
+        to_set, to_unset = get(set_key), get(unset_key)
+        if not (to_set or to_unset):
+            continue
+        mp = dict(entry.get(key, {}))
+        mp.update(_kv(to_set))
+        for k in to_unset or []:
+            mp.pop(k, None)
+        if mp:
+            entry[key] = mp
+        else:
+            entry.pop(key, None)
+
+    sv[name] = entry
+    return name, before, entry, changed
+
+
+@_central_writer
 def _cmd_update(args) -> int:
     dry = _dry(args)
     use_json = bool(args.json)
@@ -316,63 +327,13 @@ def _cmd_update(args) -> int:
     if name not in sv:
         print(f"❌ 未找到: {name}")
         return 2
-    entry: dict[str, Any] = json.loads(json.dumps(sv[name]))  # deep copy
-    before = json.loads(json.dumps(entry))
-
-    if getattr(args, "rename", None):
-        newn = args.rename
-        if newn in sv and newn != name:
-            print(f"❌ rename 冲突: 目标已存在 {newn}")
-            return 2
-        sv.pop(name)
-        name = newn
-        sv[name] = entry
-
-    if getattr(args, "command", None):
-        entry["command"] = args.command
-    if getattr(args, "type", None):
-        entry["type"] = args.type
-    if getattr(args, "url", None):
-        entry["url"] = args.url
-    if getattr(args, "enabled", None) is not None:
-        entry["enabled"] = bool(args.enabled)
-    # args 操作
-    arr = list(entry.get("args", []))
-    if getattr(args, "prepend_arg", None):
-        arr = args.prepend_arg + arr
-    if getattr(args, "append_arg", None):
-        arr = arr + args.append_arg
-    if getattr(args, "remove_arg", None):
-        arr = [x for x in arr if x not in set(args.remove_arg)]
-    if arr:
-        entry["args"] = arr
-    elif (args.prepend_arg or args.append_arg or args.remove_arg) and not arr:
-        entry.pop("args", None)
-    # env 操作
-    env = dict(entry.get("env", {}))
-    if getattr(args, "set_env", None):
-        env.update(_parse_kv_list(args.set_env))
-    if getattr(args, "unset_env", None):
-        for k in args.unset_env:
-            env.pop(k, None)
-    if env:
-        entry["env"] = env
-    elif args.set_env or args.unset_env:
-        entry.pop("env", None)
-    # headers
-    headers = dict(entry.get("headers", {}))
-    if getattr(args, "set_header", None):
-        headers.update(_parse_kv_list(args.set_header))
-    if getattr(args, "unset_header", None):
-        for k in args.unset_header:
-            headers.pop(k, None)
-    if headers:
-        entry["headers"] = headers
-    elif args.set_header or args.unset_header:
-        entry.pop("headers", None)
+    try:
+        name, before, entry, changed = _apply_update(sv, name, lambda k: getattr(args, k, None))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
 
-    sv[name] = entry
-    ok, msg = _validate(data)
+    ok, msg = _validate_changes(data, changed)
     if not ok:
         print(f"❌ 校验失败: {msg}")
         return 3
@@ -380,11 +341,12 @@ def _cmd_update(args) -> int:
         print("[DRY-RUN] 将更新服务:")
         _print_or_json({"name": name, "before": before, "after": entry}, use_json)
         return 0
-    _save_central(data, dry=False)
+    _save_central(data, dry=False, changed=changed)
     _print_or_json({"updated": name, "after": entry}, use_json)
     return 0
 
 
+@_central_writer
 def _cmd_remove(args) -> int:
     dry = _dry(args)
     use_json = bool(args.json)
@@ -395,7 +357,7 @@ def _cmd_remove(args) -> int:
         print(f"❌ 未找到: {name}")
         return 2
     old = sv.pop(name)
-    ok, msg = _validate(data)
+    ok, msg = _validate_changes(data, {name})
     if not ok:
         print(f"❌ 校验失败: {msg}")
         return 3
@@ -403,11 +365,12 @@ def _cmd_remove(args) -> int:
         print("[DRY-RUN] 将删除服务:")
         _print_or_json({name: old}, use_json)
         return 0
-    _save_central(data, dry=False)
+    _save_central(data, dry=False, changed={name})
     _print_or_json({"removed": name}, use_json)
     return 0
 
 
+@_central_writer
 def _cmd_toggle(args, enable: bool) -> int:
     dry = _dry(args)
     use_json = bool(args.json)
@@ -418,11 +381,11 @@ def _cmd_toggle(args, enable: bool) -> int:
         print(f"❌ 未找到: {name}")
         return 2
     before = bool(sv[name].get("enabled", True))
-    sv[name]["enabled"] = enable
+    COW.edit(sv, name, enabled=enable)
     if dry:
         print(f"[DRY-RUN] 将{'启用' if enable else '禁用'} {name}")
         return 0
-    _save_central(data, dry=False)
+    _save_central(data, dry=False, changed={name})
     _print_or_json({"name": name, "enabled": enable, "was": before}, use_json)
     return 0
 
@@ -434,9 +397,7 @@ def _cmd_export(args) -> int:
         _print_or_json(data, use_json)
         return 0
     path = Path(args.file).expanduser()
-    content = json.dumps(data, ensure_ascii=False, indent=2)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
+    ATOMIC.write_json(path, data)
     print(f"[OK] 已导出到: {path}")
     return 0
 
@@ -453,6 +414,7 @@ def _merge_servers(
     return out
 
 
+@_central_writer
 def _cmd_import(args) -> int:
     dry = _dry(args)
     src = Path(args.file).expanduser()
@@ -539,6 +501,7 @@ _TPL_DESC = {
 }
 
 
+@_central_writer
 def _cmd_template(args) -> int:
     dry = _dry(args)
     use_json = bool(args.json)
@@ -555,12 +518,12 @@ def _cmd_template(args) -> int:
         if not isinstance(tpl_data, dict):
             print("❌ 模板文件不是对象")
             return 2
-        entry = tpl_data
+        entry = COW.derive(tpl_data)
     else:
         if tpl not in _BUILTIN_TEMPLATES:
             print(f"❌ 未知模板: {tpl}")
             return 2
-        entry = json.loads(json.dumps(_BUILTIN_TEMPLATES[tpl]))
+        entry = COW.derive(_BUILTIN_TEMPLATES[tpl])
     # 覆盖参数
     if args.command:
         entry["command"] = args.command
@@ -569,7 +532,7 @@ def _cmd_template(args) -> int:
     if args.env:
         entry["env"] = _parse_kv_list(args.env)
     sv[name] = entry
-    ok, msg = _validate(data)
+    ok, msg = _validate_changes(data, {name})
     if not ok:
         print(f"❌ 校验失败: {msg}")
         return 3
@@ -577,11 +540,12 @@ def _cmd_template(args) -> int:
         print("[DRY-RUN] 将基于模板创建:")
         _print_or_json({name: entry}, use_json)
         return 0
-    _save_central(data, dry=False)
+    _save_central(data, dry=False, changed={name})
     _print_or_json({"created": name, "entry": entry}, use_json)
     return 0
 
 
+@_central_writer
 def _cmd_dup(args) -> int:
     dry = _dry(args)
     use_json = bool(args.json)
@@ -595,24 +559,199 @@ def _cmd_dup(args) -> int:
     if new in sv:
         print(f"❌ 目标已存在: {new}")
         return 2
-    sv[new] = json.loads(json.dumps(sv[old]))
+    sv[new] = sv[old]  # 条目不可原地修改，复制即共享
     if dry:
         print("[DRY-RUN] 将复制条目")
         _print_or_json({"from": old, "to": new}, use_json)
         return 0
-    _save_central(data, dry=False)
+    _save_central(data, dry=False, changed={new})
     _print_or_json({"duplicated": {"from": old, "to": new}}, use_json)
     return 0
 
 
+def _read_batch_ops(src: str | None) -> list[dict[str, Any]]:
+    """读取批量操作：JSON 数组或 NDJSON（每行一个对象，空行与 # 注释行忽略）。"""
+    import sys
+
+    if src in (None, "-"):
+        text = sys.stdin.read()
+    else:
+        text = Path(src).expanduser().read_text(encoding="utf-8")
+    stripped = text.strip()
+    if stripped.startswith("["):
+        ops = json.loads(stripped)
+    else:
+        ops = []
+        for i, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                ops.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"第 {i} 行不是合法 JSON: {e}") from e
+    if not isinstance(ops, list) or not all(isinstance(o, dict) for o in ops):
+        raise ValueError("批量操作必须是对象数组（JSON 数组或 NDJSON）")
+    return ops
+
+
+def _apply_op(sv: dict[str, Any], op: dict[str, Any]) -> tuple[dict[str, Any], set[str]]:
+    """在内存中的 servers 上应用单个操作，返回 (结果, 变更名集合)；出错抛 ValueError。"""
+    kind = str(op.get("op") or "").strip().lower()
+    name = op.get("name")
+    if kind in ("add", "update", "remove", "enable", "disable", "template") and not name:
+        raise ValueError("缺少 name")
+    if kind == "add":
+        if name in sv:
+            raise ValueError(f"已存在: {name}")
+        entry = dict(op["entry"]) if isinstance(op.get("entry"), dict) else _build_entry(op.get)
+        sv[name] = entry
+        return {"added": name, "entry": entry}, {name}
+    if kind == "update":
+        new, _before, entry, changed = _apply_update(sv, name, op.get)
+        return {"updated": new, "after": entry}, changed
+    if kind == "remove":
+        if name not in sv:
+            raise ValueError(f"未找到: {name}")
+        sv.pop(name)
+        return {"removed": name}, {name}
+    if kind in ("enable", "disable"):
+        if name not in sv:
+            raise ValueError(f"未找到: {name}")
+        was = bool(sv[name].get("enabled", True))
+        COW.edit(sv, name, enabled=kind == "enable")
+        return {"name": name, "enabled": kind == "enable", "was": was}, {name}
+    if kind == "dup":
+        src, dest = op.get("src"), op.get("dest")
+        if src not in sv:
+            raise ValueError(f"未找到: {src}")
+        if not dest or dest in sv:
+            raise ValueError(f"目标已存在或为空: {dest}")
+        sv[dest] = sv[src]
+        return {"duplicated": {"from": src, "to": dest}}, {dest}
+    if kind == "template":
+        tpl = op.get("template")
+        if tpl not in _BUILTIN_TEMPLATES:
+            raise ValueError(f"未知模板: {tpl}")
+        if name in sv:
+            raise ValueError(f"已存在: {name}")
+        entry = COW.derive(_BUILTIN_TEMPLATES[tpl])
+        if op.get("command"):
+            entry["command"] = op["command"]
+        if op.get("args"):
+            entry["args"] = list(op["args"])
+        if op.get("env"):
+            entry["env"] = _kv(op["env"])
+        sv[name] = entry
+        return {"created": name, "entry": entry}, {name}
+    raise ValueError(f"未知操作: {kind or '(空)'}")
+
+
+@_central_writer
+def _cmd_batch(args) -> int:
+    """批量编辑：内存中依次应用全部操作，只校验一次、备份一次、写入一次（全部成功或全部不写）。"""
+    use_json = bool(getattr(args, "json", False))
+    dry = bool(getattr(args, "dry_run", False)) or _dry(args)
+    try:
+        ops = _read_batch_ops(getattr(args, "file", None))
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取批量操作失败: {e}")
+        return 2
+
+    data = _load_central_or_new()
+    sv = data.setdefault("servers", {})
+    results: list[dict[str, Any]] = []
+    changed: set[str] = set()
+    owner: dict[str, int] = {}  # server 名 -> 最后一次改动它的操作序号（用于定位校验错误）
+    failed = False
+    for i, op in enumerate(ops):
+        if failed:
+            results.append({"index": i, "op": op.get("op"), "ok": False, "skipped": True})
+            continue
+        try:
+            res, names = _apply_op(sv, op)
+        except (ValueError, TypeError, KeyError) as e:
+            failed = True
+            results.append({"index": i, "op": op.get("op"), "ok": False, "error": str(e)})
+            continue
+        changed |= names
+        for n in names:
+            owner[n] = i
+        results.append({"index": i, "op": op.get("op"), "ok": True, **res})
+
+    if not failed:
+        try:
+            base_ok = False
+            entry = CACHE.load(U.CENTRAL)
+            if entry is not None:
+                cached = CACHE.get_verdict(entry, "central")
+                base_ok = bool(cached and cached[0])
+            issues = V.collect_errors(data, changed if base_ok else None)
+        except Exception as e:
+            issues = [("", str(e))]
+        for ptr, msg in issues:
+            failed = True
+            parts = ptr.split("/")
+            idx = (
+                owner.get(parts[2].replace("~1", "/").replace("~0", "~"))
+                if len(parts) > 2
+                else None
+            )
+            if idx is not None and results[idx]["ok"]:
+                results[idx] = {**results[idx], "ok": False, "error": msg, "pointer": ptr}
+            elif idx is None:
+                results.append({"index": None, "op": "validate", "ok": False, "error": msg})
+
+    if not failed and ops and not dry:
+        try:
+            _save_central(data, dry=False, changed=changed)
+        except Exception as e:
+            failed = True
+            results.append({"index": None, "op": "write", "ok": False, "error": str(e)})
+
+    summary = {
+        "ok": not failed,
+        "written": bool(ops) and not failed and not dry,
+        "dry_run": dry,
+        "applied": 0 if failed else len(ops),
+        "results": results,
+    }
+    if use_json:
+        _print_or_json(summary, True)
+    else:
+        for r in results:
+            tag = "OK" if r.get("ok") else ("SKIP" if r.get("skipped") else "ERR")
+            extra = f": {r['error']}" if r.get("error") else ""
+            print(f"[{tag}] #{r.get('index')} {r.get('op')}{extra}")
+        if failed:
+            print("❌ 批量操作未写入（全部回滚）")
+        elif dry:
+            print(f"[DRY-RUN] {len(ops)} 个操作校验通过，未写入")
+        else:
+            print(f"[OK] 已应用 {len(ops)} 个操作（一次校验/备份/写入）")
+    return 0 if not failed else 3
+
+
 def _cmd_validate(args) -> int:
     use_json = bool(args.json)
-    data = _load_central_or_new()
-    ok, msg = _validate(data)
+    data = _load_central_or_new(shared=True)
+    try:
+        issues = V.collect_errors(data)
+    except Exception as e:
+        issues = [("", str(e))]
+    ok = not issues
+    msg = "ok" if ok else issues[0][1]
     if use_json:
-        _print_or_json({"ok": ok, "message": msg}, True)
+        errors = [{"pointer": p, "message": m} for p, m in issues]
+        _print_or_json({"ok": ok, "message": msg, "errors": errors}, True)
+    elif ok:
+        print("✅ 通过")
     else:
-        print("✅ 通过" if ok else f"❌ 失败: {msg}")
+        print(f"❌ 失败: {msg}")
+        if len(issues) > 1:
+            print(f"共 {len(issues)} 处错误：")
+            for p, m in issues:
+                print(f"  - {p or '/'}: {m}")
     return 0 if ok else 1
 
 
@@ -626,12 +765,11 @@ def build_doctor_report(data: dict[str, Any]) -> dict[str, Any]:
     issues: list[str] = []
     per: dict[str, Any] = {}
 
-    def _which(cmd: str) -> bool:
-        from shutil import which
-
+    def _which(cmd: str) -> str | None:
+        # PATH 只扫描一次（共享索引），大清单逐条检查不再逐条遍历 PATH
         if os.path.isabs(cmd):
-            return Path(cmd).expanduser().exists()
-        return which(cmd) is not None
+            return cmd if Path(cmd).expanduser().exists() else None
+        return PATHS.which(cmd)
 
     for name, info in servers.items():
         if not bool((info or {}).get("enabled", True)):
@@ -643,18 +781,20 @@ def build_doctor_report(data: dict[str, Any]) -> dict[str, Any]:
             continue
         c_issues: list[str] = []
         suggestions: list[str] = []
+        resolved: str | None = None
         cmd = info.get("command")
         if not cmd or not isinstance(cmd, str):
             c_issues.append("缺少 command 或类型错误")
         else:
+            resolved = _which(cmd)
             if cmd == "npx":
-                if not _which("npx"):
+                if not resolved:
                     c_issues.append("npx 不可用")
                     suggestions.append(
                         "请安装 node/npm 或使用全局二进制：npm i -g <pkg>@latest 并更新 command"
                     )
             else:
-                if not _which(cmd):
+                if not resolved:
                     c_issues.append(f"命令未找到: {cmd}")
                     suggestions.append(f"请确保 {cmd} 在 PATH 中，或改为 npx -y <pkg>@latest")
         url = info.get("url")
@@ -703,6 +843,7 @@ def build_doctor_report(data: dict[str, Any]) -> dict[str, Any]:
             "status": "passed" if not c_issues else "failed",
             "issues": c_issues,
             "suggestions": suggestions,
+            "resolved": resolved,
         }
         issues += [f"{name}: {x}" for x in c_issues]
 
@@ -928,6 +1069,8 @@ def run(args) -> int:
             if not getattr(args, "dest", None):
                 args.dest = input("输入新名称: ").strip()
         return _cmd_dup(args)
+    if cmd == "batch":
+        return _cmd_batch(args)
     if cmd == "validate":
         return _cmd_validate(args)
     if cmd == "doctor":
@@ -3,11 +3,13 @@
 
 from __future__ import annotations
 
-import json
 import os
-import subprocess
 from pathlib import Path
 
+from .. import atomic as ATOMIC
+from .. import locks as LOCKS
+from .. import procs as PROCS
+from .. import targets as TARGETS
 from .. import utils as U
 
 
@@ -20,6 +22,11 @@ def _clear_claude_project_overrides(dry_run: bool = False) -> int:
     if not p.exists():
         return 0
 
+    with LOCKS.locked(p):
+        return _clear_claude_project_overrides_locked(p)
+
+
+def _clear_claude_project_overrides_locked(p: Path) -> int:
     obj = U.load_json(p, {}, "Claude项目配置读取")
     if not isinstance(obj, dict):
         return 0
@@ -42,7 +49,7 @@ def _clear_claude_project_overrides(dry_run: bool = False) -> int:
         return 0
 
     U.backup(p)
-    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    ATOMIC.write_json(p, obj)
     print(f"[OK] 已清空 Claude local scope（按目录）覆盖: {p}（{cleared} 个目录）")
     return 0
 
@@ -56,17 +63,18 @@ def _clear_json_map(
     if not path.exists():
         print(f"[INFO] 跳过 {label}（配置不存在）: {path}")
         return 0
-    obj = U.load_json(path, {})
-    if top_key == "servers":
-        obj["servers"] = {}
-    else:
-        obj[top_key] = {}
-        if label.startswith("Gemini"):
+    with LOCKS.locked(path):
+        obj = U.load_json(path, {})
+        if top_key == "servers":
+            obj["servers"] = {}
+        else:
+            obj[top_key] = {}
+            if label.startswith("Gemini"):
+                obj.setdefault("mcp", {})["allowed"] = []
+        if extra == "gemini.allowed":
             obj.setdefault("mcp", {})["allowed"] = []
-    if extra == "gemini.allowed":
-        obj.setdefault("mcp", {})["allowed"] = []
-    U.backup(path)
-    U.save_json(path, obj)
+        U.backup(path)
+        U.save_json(path, obj)
     print(f"[OK] 已清空 {label}: {path}")
     return 0
 
@@ -76,42 +84,29 @@ def _clear_claude_registry(verbose: bool = False, dry_run: bool = False):
         print("[DRY-RUN] 将清空 Claude 注册表（预览，跳过 `claude mcp list`）")
         return 0
     scope = U.claude_registry_scope()
-    if scope == "user":
-        names = sorted(U.claude_user_mcp_servers())
-    else:
-        try:
-            out = subprocess.run(
-                ["claude", "mcp", "list"],
-                capture_output=True,
-                text=True,
-                timeout=30,
-            )
-            text = (out.stdout or "") + "\n" + (out.stderr or "")
-            names = []
-            for line in text.splitlines():
-                line = line.strip()
-                if not line or line.startswith("plugin:"):
-                    continue
-                if ":" in line:
-                    names.append(line.split(":", 1)[0].strip())
-        except Exception:
-            names = []
+    # user 读 settings 文件；local/project 读其落盘文件（无法直接读取时才调 `claude mcp list`）
+    names = sorted(U._claude_registered())  # noqa: SLF001
     if not names:
         if verbose:
             print("[INFO] Claude 注册表无条目需清理")
         return 0
-    ok = 0
-    fail = 0
-    for n in names:
-        try:
-            cmd = ["claude", "mcp", "remove", n, "-s", scope]
-            if verbose:
-                print("[VERBOSE]", " ".join(cmd))
-            r = subprocess.run(cmd, check=False, timeout=10)
-            ok += 1 if r.returncode == 0 else 0
-            fail += 1 if r.returncode != 0 else 0
-        except Exception:
-            fail += 1
+    claude = TARGETS.get("claude")
+    if claude.native_registry(scope):
+        claude.write_registry(scope, {}, names)
+        print(
+            f"[OK] 已清理 Claude 注册表 (scope={scope}): ok={len(names)} fail=0"
+            f"（直接写入 {claude.registry_file(scope)}）"
+        )
+        return 0
+    # claude CLI 改写 ~/.claude.json 时不加锁，并发 remove 会丢失写入：串行执行（任一 scope）
+    results = PROCS.run_all(
+        [(n, ["claude", "mcp", "remove", n, "-s", scope], 10) for n in names],
+        jobs=1,
+        verbose=verbose,
+    )
+    U.invalidate_claude_registry()
+    ok = sum(1 for r in results if r["ok"])
+    fail = len(results) - ok
     print(f"[OK] 已清理 Claude 注册表 (scope={scope}): ok={ok} fail={fail}")
     return 0
 
@@ -222,57 +217,62 @@ def run(args) -> int:
         print("已取消")
         return 0
 
-    for t in targets:
-        try:
-            if t == "claude":
-                _clear_json_map(
-                    "Claude(文件)",
-                    U.HOME / ".claude" / "settings.json",
-                    "mcpServers",
-                    dry_run=dry_run,
-                )
-                _clear_claude_project_overrides(dry_run=dry_run)
-                _clear_claude_registry(verbose=getattr(args, "verbose", False), dry_run=dry_run)
-            elif t == "codex":
-                p = U.HOME / ".codex" / "config.toml"
-                if dry_run:
-                    print(f"[DRY-RUN] 将清理 Codex 配置: {p}")
-                else:
-                    if not p.exists():
-                        print(f"[INFO] 跳过 Codex（配置不存在）: {p}")
+    # 多个目标文件：目录 fsync 合并到最后一次完成
+    with ATOMIC.group_commit():
+        for t in targets:
+            try:
+                if t == "claude":
+                    _clear_json_map(
+                        "Claude(文件)",
+                        U.HOME / ".claude" / "settings.json",
+                        "mcpServers",
+                        dry_run=dry_run,
+                    )
+                    _clear_claude_project_overrides(dry_run=dry_run)
+                    _clear_claude_registry(verbose=getattr(args, "verbose", False), dry_run=dry_run)
+                elif t == "codex":
+                    p = U.HOME / ".codex" / "config.toml"
+                    if dry_run:
+                        print(f"[DRY-RUN] 将清理 Codex 配置: {p}")
                     else:
-                        U.backup(p)
-                        text = p.read_text(encoding="utf-8")
-                        new_text = U.strip_toml_mcp_servers_block(text)
-                        p.write_text(new_text, encoding="utf-8")
-                        print(f"[OK] 已清空 Codex: {p}")
-            elif t == "gemini":
-                _clear_json_map(
-                    "Gemini",
-                    U.HOME / ".gemini" / "settings.json",
-                    "mcpServers",
-                    extra="gemini.allowed",
-                    dry_run=dry_run,
-                )
-            elif t == "iflow":
-                _clear_json_map(
-                    "iFlow", U.HOME / ".iflow" / "settings.json", "mcpServers", dry_run=dry_run
-                )
-            elif t == "droid":
-                _clear_json_map(
-                    "Droid", U.HOME / ".factory" / "mcp.json", "mcpServers", dry_run=dry_run
-                )
-            elif t == "cursor":
-                _clear_json_map(
-                    "Cursor", U.HOME / ".cursor" / "mcp.json", "mcpServers", dry_run=dry_run
-                )
-            elif t == "vscode-user":
-                _clear_json_map("VS Code(User)", U._vscode_user_path(), "servers", dry_run=dry_run)
-            elif t == "vscode-insiders":
-                _clear_json_map(
-                    "VS Code(Insiders)", U._vscode_insiders_path(), "servers", dry_run=dry_run
-                )
-        except Exception as e:
-            print(f"[WARN] 清理 {t} 失败: {e}")
+                        if not p.exists():
+                            print(f"[INFO] 跳过 Codex（配置不存在）: {p}")
+                        else:
+                            with LOCKS.locked(p):
+                                U.backup(p)
+                                text = p.read_text(encoding="utf-8")
+                                new_text = U.strip_toml_mcp_servers_block(text)
+                                ATOMIC.write_text(p, new_text)
+                            print(f"[OK] 已清空 Codex: {p}")
+                elif t == "gemini":
+                    _clear_json_map(
+                        "Gemini",
+                        U.HOME / ".gemini" / "settings.json",
+                        "mcpServers",
+                        extra="gemini.allowed",
+                        dry_run=dry_run,
+                    )
+                elif t == "iflow":
+                    _clear_json_map(
+                        "iFlow", U.HOME / ".iflow" / "settings.json", "mcpServers", dry_run=dry_run
+                    )
+                elif t == "droid":
+                    _clear_json_map(
+                        "Droid", U.HOME / ".factory" / "mcp.json", "mcpServers", dry_run=dry_run
+                    )
+                elif t == "cursor":
+                    _clear_json_map(
+                        "Cursor", U.HOME / ".cursor" / "mcp.json", "mcpServers", dry_run=dry_run
+                    )
+                elif t == "vscode-user":
+                    _clear_json_map(
+                        "VS Code(User)", U._vscode_user_path(), "servers", dry_run=dry_run
+                    )
+                elif t == "vscode-insiders":
+                    _clear_json_map(
+                        "VS Code(Insiders)", U._vscode_insiders_path(), "servers", dry_run=dry_run
+                    )
+            except Exception as e:
+                print(f"[WARN] 清理 {t} 失败: {e}")
     print("[OK] 清理完成")
     return 0
@@ -11,8 +11,12 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+from .. import handshake as HANDSHAKE
+from .. import spec as SPEC
+from .. import targets as TARGETS
 from .. import utils as U
 from . import central as CENTRAL
+from . import run as RUN
 
 
 def _normalize_targets(raw_clients: list[str] | None) -> list[str] | None:
@@ -54,34 +58,8 @@ def _normalize_targets(raw_clients: list[str] | None) -> list[str] | None:
     return out or None
 
 
-def _get_present_keys(target: str) -> tuple[set[str], Path | None]:
-    if target == "claude-file":
-        p = U.HOME / ".claude" / "settings.json"
-        return U._json_keys(p, "mcpServers", "Claude配置读取"), p
-    if target == "claude-reg":
-        return U._claude_registered(), None
-    if target == "codex":
-        p = U.HOME / ".codex" / "config.toml"
-        return U._codex_keys(), p
-    if target == "gemini":
-        p = U.HOME / ".gemini" / "settings.json"
-        return U._json_keys(p, "mcpServers", "Gemini配置读取"), p
-    if target == "iflow":
-        p = U.HOME / ".iflow" / "settings.json"
-        return U._json_keys(p, "mcpServers", "iFlow配置读取"), p
-    if target == "droid":
-        p = U.HOME / ".factory" / "mcp.json"
-        return U._json_keys(p, "mcpServers", "Droid配置读取"), p
-    if target == "cursor":
-        p = U.HOME / ".cursor" / "mcp.json"
-        return U._json_keys(p, "mcpServers", "Cursor配置读取"), p
-    if target == "vscode-user":
-        p = U._vscode_user_path()
-        return U._json_keys(p, "servers", "VS Code配置读取"), p
-    if target == "vscode-insiders":
-        p = U._vscode_insiders_path()
-        return U._json_keys(p, "servers", "VS Code Insiders配置读取"), p
-    raise ValueError(f"未知 target: {target}")
+def _target_path(target: str) -> Path | None:
+    return None if target == "claude-reg" else TARGETS.get(target).path()
 
 
 def _make_suggested_onboard_preset(target: str) -> str:
@@ -100,60 +78,29 @@ def _make_suggested_onboard_preset(target: str) -> str:
     return mapping.get(target, "task-suite")
 
 
-def _claude_project_overrides() -> tuple[dict[str, list[str]], Path]:
-    """读取 ~/.claude.json projects.*.mcpServers（Claude local scope / 按目录配置）。"""
-    p = U.HOME / ".claude.json"
-    obj = U.load_json(p, {}, "")
-    if not isinstance(obj, dict):
-        return {}, p
-    projects = obj.get("projects")
-    if not isinstance(projects, dict):
-        return {}, p
-
-    out: dict[str, list[str]] = {}
-    for name, conf in projects.items():
-        if not isinstance(conf, dict):
-            continue
-        mcp_servers = conf.get("mcpServers")
-        if isinstance(mcp_servers, dict) and mcp_servers:
-            out[str(name)] = sorted([str(k) for k in mcp_servers.keys()])
-    return out, p
-
-
 def run(args) -> int:
     use_json = bool(getattr(args, "json", False))
+    use_ndjson = bool(getattr(args, "ndjson", False))
     verbose = bool(getattr(args, "verbose", False))
     targets = _normalize_targets(getattr(args, "client", None))
 
-    all_targets: list[tuple[str, str]] = [
-        ("cursor", "Cursor"),
-        ("claude-file", "Claude(file)"),
-        ("claude-reg", "Claude(register)"),
-        ("codex", "Codex"),
-        ("gemini", "Gemini"),
-        ("iflow", "iFlow"),
-        ("droid", "Droid"),
-        ("vscode-user", "VS Code(User)"),
-        ("vscode-insiders", "VS Code(Insiders)"),
-    ]
+    all_targets = [(key, label) for key, label, _ in TARGETS.views()]
 
     # 1) central 基础状态
     central_path = U.CENTRAL
     central_exists = central_path.exists()
-    central_data = CENTRAL._load_central_or_new()  # noqa: SLF001
-
-    ok, msg = CENTRAL._validate(central_data)  # noqa: SLF001
+    central_data, ok, msg = CENTRAL._validated_central()  # noqa: SLF001
     central_doctor = CENTRAL.build_doctor_report(central_data)
 
     servers_all = central_data.get("servers") if isinstance(central_data, dict) else {}
     if not isinstance(servers_all, dict):
         servers_all = {}
-    enabled, disabled = U.split_enabled_servers(servers_all)
-    enabled_names = set(enabled.keys())
-    disabled_names = set(disabled.keys())
+    enabled, disabled = SPEC.split_enabled(SPEC.load_specs(servers_all))
+    enabled_names = set(enabled)
+    disabled_names = set(disabled)
     all_names = set(servers_all.keys())
 
-    claude_overrides, claude_overrides_path = _claude_project_overrides()
+    claude_overrides, claude_overrides_path = TARGETS.get("claude").project_overrides()
 
     # 2) 目标端漂移（只在“目标端已配置的条目”里找 unknown/disabled）
     target_reports: dict[str, dict] = {}
@@ -163,16 +110,10 @@ def run(args) -> int:
         rank = {"passed": 0, "warn": 1, "failed": 2}
         return s if rank.get(s, 0) > rank.get(w, 0) else w
 
-    for key, label in all_targets:
-        if targets and key not in targets:
-            continue
-        try:
-            present, path = _get_present_keys(key)
-        except Exception as e:
-            worst = _bump(worst, "warn")
-            target_reports[key] = {"label": label, "status": "warn", "error": str(e)}
-            continue
-
+    def _report(
+        key: str, label: str, present: set[str], path: Path | None, drift: dict[str, list[str]]
+    ) -> dict:
+        """单个目标端的漂移报告（present 为已探测到的条目，drift 为内容不一致的条目）。"""
         unknown = sorted(present - all_names)
         disabled_present = sorted(present & disabled_names)
 
@@ -212,6 +153,15 @@ def run(args) -> int:
                 "建议：mcp central enable <name>，或重新 mcp onboard/mcp run 下发覆盖"
             )
 
+        if drift:
+            status = "warn"
+            notes.append(
+                "目标端条目内容与 central 不一致: "
+                + ", ".join(f"{n}({'/'.join(fields)})" for n, fields in drift.items())
+            )
+            run_client = "claude" if key == "claude-file" else key
+            suggestions.append(f"建议：mcp run --client {run_client} --dry-run 预览差异后重新下发")
+
         if key == "claude-reg" and claude_overrides:
             status = "warn" if status == "passed" else status
             notes.append(
@@ -237,17 +187,55 @@ def run(args) -> int:
             if path is not None:
                 notes.append(f"path={path}")
 
-        worst = _bump(worst, status)
-        target_reports[key] = {
+        return {
             "label": label,
             "status": status,
             "unknown": unknown,
             "disabled_present": disabled_present,
+            "drift": drift,
             "notes": notes,
             "suggestions": suggestions,
         }
 
-    # 3) 汇总与输出
+    # 各目标端并发探测，总截止时间内未返回的标记为超时（不阻塞其它目标端）
+    keys = [key for key, _label in all_targets if not targets or key in targets]
+    for res in TARGETS.probe_views(keys, deadline=getattr(args, "deadline", None)):
+        key, label = res["key"], res["label"]
+        if res["status"] == "ok":
+            try:
+                drift = RUN.target_drift(key, servers_all)
+            except Exception:
+                drift = {}
+            rep = _report(key, label, res["present"], _target_path(key), drift)
+        else:
+            timed_out = res["status"] == "timeout"
+            note = (
+                f"探测超时（{res['error']}），已跳过" if timed_out else f"读取失败: {res['error']}"
+            )
+            rep = {"label": label, "status": "warn", "error": res["error"], "notes": [note]}
+            if timed_out:
+                rep["timeout"] = True
+        worst = _bump(worst, rep["status"])
+        target_reports[key] = rep
+        if use_ndjson:
+            row = {"type": "target", "key": key, "elapsed": res["elapsed"], **rep}
+            print(json.dumps(row, ensure_ascii=False), flush=True)
+    target_reports = {k: target_reports[k] for k in keys if k in target_reports}
+
+    # 3) 可选：握手探测（实际启动启用的 stdio server，完成 initialize + tools/list）
+    probe_reports: dict[str, dict] = {}
+    if getattr(args, "probe", False) and ok:
+        # 与 run 下发一致：已本地化的条目探测本地二进制
+        subset = RUN._apply_local_override({n: servers_all[n] for n in enabled})  # noqa: SLF001
+        for res in HANDSHAKE.probe_all(subset, timeout=getattr(args, "probe_timeout", None)):
+            probe_reports[res["name"]] = res
+            if res["status"] in ("failed", "timeout"):
+                worst = _bump(worst, "warn")
+            if use_ndjson:
+                print(json.dumps({"type": "probe", **res}, ensure_ascii=False), flush=True)
+        probe_reports = {k: probe_reports[k] for k in sorted(probe_reports)}
+
+    # 4) 汇总与输出
     if not central_exists:
         worst = _bump(worst, "failed")
 
@@ -272,6 +260,14 @@ def run(args) -> int:
         },
         "targets": target_reports,
     }
+    if getattr(args, "probe", False):
+        out["probe"] = probe_reports
+
+    if use_ndjson:
+        # 目标端各行已在探测完成时输出；末行为汇总（不重复 targets）
+        summary = {"type": "summary", "status": worst, "central": out["central"]}
+        print(json.dumps(summary, ensure_ascii=False), flush=True)
+        return 0 if worst != "failed" else 1
 
     if use_json:
         print(json.dumps(out, ensure_ascii=False, indent=2))
@@ -299,7 +295,7 @@ def run(args) -> int:
             more = len(central_doctor["issues"]) - 10
             print(f"  - … 还有 {more} 条（建议用 `mcp central doctor --json` 查看完整）")
 
-    print("\n— 目标端漂移（unknown/disabled）—")
+    print("\n— 目标端漂移（unknown/disabled/内容）—")
     if not target_reports:
         print("  （无目标端检查项）")
     for key, rep in target_reports.items():
@@ -312,6 +308,25 @@ def run(args) -> int:
         for s in rep.get("suggestions") or []:
             print("  - " + s)
 
+    if getattr(args, "probe", False):
+        print("\n— 握手探测（initialize + tools/list）—")
+        if not probe_reports:
+            print("  （无可探测的启用条目；central 无效时跳过）")
+        for name, res in probe_reports.items():
+            if res["status"] == "ok":
+                print(
+                    f"  ✅ {name}: 就绪 {res['ready_ms']:.0f}ms，完成 {res['elapsed_ms']:.0f}ms，"
+                    f"tools={res['tools']}"
+                )
+            elif res["status"] == "skipped":
+                print(f"  - {name}: {res['error']}")
+            else:
+                prefix = "⏱️" if res["status"] == "timeout" else "❌"
+                print(f"  {prefix} {name}: {res['error']}（{res['elapsed_ms']:.0f}ms）")
+                if verbose:
+                    for line in res.get("stderr") or []:
+                        print("      " + line)
+
     # 最终下一步（给普通用户的“单一建议”）
     if worst == "failed":
         print("\n结论: ❌ 需要处理（建议先修 central，再用 mcp onboard 下发）")
@@ -9,6 +9,8 @@ import shutil
 import subprocess
 from pathlib import Path
 
+from .. import atomic as ATOMIC
+from .. import locks as LOCKS
 from .. import utils as U
 
 LOCAL_ROOT = Path.home() / ".mcp-local"
@@ -19,9 +21,14 @@ def _load_resolved() -> dict[str, str]:
     return U.load_json(RESOLVED, {}, "读取本地解析记录")
 
 
-def _save_resolved(obj: dict[str, str]) -> None:
-    RESOLVED.parent.mkdir(parents=True, exist_ok=True)
-    RESOLVED.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+def _save_resolved(updates: dict[str, str]) -> None:
+    """在写锁内重读并合并 updates（并发的 localize/run 各自新增的条目都不会丢失）。"""
+    with LOCKS.locked(RESOLVED):
+        obj = _load_resolved()
+        if not isinstance(obj, dict):
+            obj = {}
+        obj.update(updates)
+        ATOMIC.write_json(RESOLVED, obj)
 
 
 def _pkg_base(pkg_spec: str) -> str:
@@ -166,8 +173,7 @@ def run(args) -> int:
         print("[ERR] 中央清单为空或全部已禁用（enabled:false）")
         return 1
 
-    resolved = _load_resolved()
-    changed = False
+    updates: dict[str, str] = {}
     ok = 0
     skip = 0
     fail = 0
@@ -182,16 +188,15 @@ def run(args) -> int:
                 continue
             path = _install_npm(name, pkg_spec, force, upgrade)
             if path:
-                resolved[name] = path
-                changed = True
+                updates[name] = path
                 ok += 1
             else:
                 fail += 1
         else:
             skip += 1
 
-    if changed:
-        _save_resolved(resolved)
+    if updates:
+        _save_resolved(updates)
     total = ok + skip + fail
     print(f"[SUMMARY] 本地化完成 total={total} ok={ok} skip={skip} fail={fail}")
     if fail:
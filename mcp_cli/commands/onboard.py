@@ -11,8 +11,10 @@
 from __future__ import annotations
 
 import os
-from copy import deepcopy
 
+from .. import cow as COW
+from .. import locks as LOCKS
+from .. import utils as U
 from . import central as CENTRAL
 from . import run as RUN
 
@@ -108,14 +110,14 @@ def _ensure_central_has_enabled_servers(
     for name in required:
         if name in servers:
             if not bool((servers[name] or {}).get("enabled", True)):
-                servers[name]["enabled"] = True
+                COW.edit(servers, name, enabled=True)
                 changed = True
                 actions.append(f"启用: {name}")
             continue
 
         # 新增缺失服务：优先用内置模板
         if name in CENTRAL._BUILTIN_TEMPLATES:  # noqa: SLF001  # 内部复用
-            entry = deepcopy(CENTRAL._BUILTIN_TEMPLATES[name])  # noqa: SLF001
+            entry = COW.derive(CENTRAL._BUILTIN_TEMPLATES[name])  # noqa: SLF001
             entry.setdefault("enabled", True)
             servers[name] = entry
             changed = True
@@ -140,7 +142,7 @@ def _ensure_central_has_enabled_servers(
         # 仅输出摘要，不写盘
         return True, actions
 
-    CENTRAL._save_central(data, dry=False)  # noqa: SLF001  # 内部复用
+    CENTRAL._save_central(data, dry=False, changed=set(required))  # noqa: SLF001  # 内部复用
     return True, actions
 
 
@@ -175,7 +177,8 @@ def run(args) -> int:
 
     # 先保证 central 存在且包含所需服务
     try:
-        changed, actions = _ensure_central_has_enabled_servers(required, dry_run=dry_run)
+        with LOCKS.locked(U.CENTRAL):
+            changed, actions = _ensure_central_has_enabled_servers(required, dry_run=dry_run)
     except Exception as e:
         print(f"[ERR] central 准备失败: {e}")
         return 1
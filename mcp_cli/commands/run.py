@@ -3,12 +3,15 @@
 
 from __future__ import annotations
 
-import json
 import os
-import shutil
-import subprocess
+import time
 from pathlib import Path
 
+from .. import locks as LOCKS
+from .. import pathindex as PATHS
+from .. import procs as PROCS
+from .. import spec as SPEC
+from .. import targets as TARGETS
 from .. import utils as U
 from . import localize as _localize
 
@@ -112,7 +115,7 @@ def _localize_on_run(subset: dict, mode: str) -> None:
             print("[INFO] 未选择任何服务，本地化已跳过")
             return
 
-    changed = False
+    updates: dict[str, str] = {}
     for name in selected_names:
         pkg_spec = candidates.get(name)
         if not pkg_spec:
@@ -120,23 +123,31 @@ def _localize_on_run(subset: dict, mode: str) -> None:
         print(f"[INFO] 正在为 {name} 执行本地安装（{pkg_spec}）...")
         path = _localize._install_npm(name, pkg_spec, force=False, upgrade=False)
         if path:
-            resolved[name] = path
-            changed = True
+            updates[name] = path
 
-    if changed:
-        _save_local_resolved(resolved)
+    if updates:
+        _save_local_resolved(updates)
         if mode == "interactive":
             print("[OK] 已更新本地化映射，后续 run 将优先使用本地二进制")
 
 
+def _local_resolved_path() -> Path:
+    return U.HOME / ".mcp-local" / "resolved.json"
+
+
 def _load_local_resolved() -> dict:
-    path = U.HOME / ".mcp-local" / "resolved.json"
-    return U.load_json(path, {}, "读取本地化记录")
+    return U.load_json(_local_resolved_path(), {}, "读取本地化记录")
 
 
-def _save_local_resolved(obj: dict) -> None:
-    path = U.HOME / ".mcp-local" / "resolved.json"
-    U.save_json(path, obj)
+def _save_local_resolved(updates: dict) -> None:
+    """在写锁内重读并合并 updates，避免与并发的 localize 互相覆盖。"""
+    path = _local_resolved_path()
+    with LOCKS.locked(path):
+        obj = _load_local_resolved()
+        if not isinstance(obj, dict):
+            obj = {}
+        obj.update(updates)
+        U.save_json(path, obj)
 
 
 def _strip_npx_args(cmd: str, args: list[str]) -> list[str]:
@@ -153,39 +164,60 @@ def _strip_npx_args(cmd: str, args: list[str]) -> list[str]:
     return list(args[i:])
 
 
+def _usable_local(path: str) -> bool:
+    """本地化记录中的路径是否仍可用（绝对路径、存在且可执行）。"""
+    p = Path(path)
+    return p.is_absolute() and p.exists() and os.access(p, os.X_OK)
+
+
 def _apply_local_override(subset: dict, client: str | None = None) -> dict:
     """若存在本地化记录，优先使用本地路径；失败回退原值。"""
     resolved = _load_local_resolved()
     if not resolved:
         return subset
+    SPEC.load_specs()  # 登记 central 条目：渲染时按对象身份取内容哈希
     out = {}
     for name, info in subset.items():
         path = resolved.get(name)
-        if path:
-            p = Path(path)
-            if p.is_absolute() and p.exists() and os.access(p, os.X_OK):
-                new_info = dict(info)
-                orig_cmd = (info or {}).get("command") or ""
-                orig_args = list((info or {}).get("args") or [])
-                new_info["command"] = path
-                # 对 npx 迁移：去掉 npx 自身参数与包名，仅保留真正 CLI 参数
-                new_info["args"] = _strip_npx_args(orig_cmd, orig_args)
-                # 应用客户端特定的字段清理
-                out[name] = U.to_target_server_info(new_info, client=client)
-                continue
-        # 应用客户端特定的字段清理
-        out[name] = U.to_target_server_info(info, client=client)
+        if path and _usable_local(path):
+            new_info = dict(info)
+            orig_cmd = (info or {}).get("command") or ""
+            orig_args = list((info or {}).get("args") or [])
+            new_info["command"] = path
+            # 对 npx 迁移：去掉 npx 自身参数与包名，仅保留真正 CLI 参数
+            new_info["args"] = _strip_npx_args(orig_cmd, orig_args)
+            # 应用客户端特定的字段清理
+            out[name] = SPEC.render(new_info, client)
+            continue
+        # 应用客户端特定的字段清理（共享渲染缓存：同一内容与客户端只渲染一次）
+        out[name] = SPEC.render(info, client)
     return out
 
 
+def target_drift(view: str, servers: dict) -> dict[str, list[str]]:
+    """目标端视图与 central 启用条目的内容漂移：{name: [不一致的字段]}。
+
+    期望内容即 run 会写入的条目（本地化覆盖 + 按客户端渲染）；servers 须为 central 当前内容
+    （结果按 central/本地化记录/目标文件的指纹缓存于 state.json）。
+    """
+    enabled = {
+        n: i for n, i in (servers or {}).items() if isinstance(i, dict) and i.get("enabled", True)
+    }
+    client = "claude" if view == "claude-file" else view
+    # 本地二进制被删除/chmod 会改变期望条目，但不改变任何依赖文件的指纹：
+    # 先按 stat 检查哪些本地化路径仍可用，作为缓存的附加依赖
+    resolved = _load_local_resolved()
+    usable = sorted(n for n in enabled if resolved.get(n) and _usable_local(resolved[n]))
+    return TARGETS.drift(
+        view,
+        lambda: _apply_local_override(enabled, client=client),
+        deps=[U.CENTRAL, _local_resolved_path()],
+        salt=usable,
+    )
+
+
 def _ensure_command_exists(name: str, info: dict) -> bool:
-    cmd = (info or {}).get("command")
-    if not cmd:
-        return False
-    p = Path(cmd)
-    if p.is_absolute():
-        return p.exists() and os.access(p, os.X_OK)
-    return shutil.which(cmd) is not None
+    return PATHS.command_exists((info or {}).get("command") or "")
 
 
 def _fallback_to_original(subset: dict, original: dict) -> dict:
@@ -225,188 +257,155 @@ def build_subset(names: list[str]) -> dict:
 
 
 def apply_codex(subset: dict, dry_run: bool = False) -> int:
-    p = U.HOME / ".codex" / "config.toml"
+    adapter = TARGETS.get("codex")
+    p = adapter.path()
     if not p.exists():
         print(f"[ERR] Codex 配置不存在: {p}")
         return 1
-    keys = sorted(list(subset.keys()))
+    return apply_target(adapter, subset, dry_run=dry_run)
+
+
+def apply_target(
+    adapter: TARGETS.TargetAdapter,
+    subset: dict,
+    dry_run: bool = False,
+    *,
+    path: Path | None = None,
+    label: str | None = None,
+) -> int:
+    """按适配器全量下发 subset（读-改-写全程持有写锁，避免与并发的 run/ui/auto-sync 相互覆盖）。"""
+    p = path or adapter.path()
+    label = label or adapter.label
+    keys = sorted(list((subset or {}).keys()))
     if dry_run:
-        print(f"[DRY-RUN] 将应用到 Codex: {p}")
+        print(f"[DRY-RUN] 将应用到 {label}: {p}")
         print("  keys:", ", ".join(keys) if keys else "(none)")
         return 0
-    U.backup(p)
-    text = p.read_text(encoding="utf-8")
-    # 清理旧块 + 所有 [mcp_servers.*]
-    text = U.strip_toml_mcp_servers_block(text)
-    lines = ["\n# === MCP Servers 配置（由 MCP Local Manager 生成）==="]
-    for name, info in subset.items():
-        lines.append(f"\n[mcp_servers.{name}]")
-        timeout = info.get("timeout") if isinstance(info, dict) else None
-        try:
-            timeout_sec = int(timeout) if timeout is not None else 60
-        except Exception:
-            timeout_sec = 60
-        if timeout_sec < 1:
-            timeout_sec = 60
-        lines.append(f"startup_timeout_sec = {timeout_sec}")
-        lines.append(f"tool_timeout_sec = {timeout_sec}")
-        lines.append(f"command = \"{info.get('command','')}\"")
-        args = info.get("args") or []
-        if args:
-            lines.append("args = " + json.dumps(args))
-        env = info.get("env") or {}
-        if env:
-            lines.append(f"\n[mcp_servers.{name}.env]")
-            for k, v in env.items():
-                lines.append(f'{k} = "{v}"')
-    new_block = "\n".join(lines) + "\n"
-    p.write_text(text.rstrip() + "\n" + new_block, encoding="utf-8")
-    print(f"[OK] 已应用到 Codex: {p}")
+    if adapter.apply(subset or {}, p):
+        print(f"[OK] 已应用到 {label}: {p}")
+    else:
+        print(f"[OK] {label} 已是最新，未改写: {p}")
     return 0
 
 
 def apply_json_map(
     label: str, path: Path, subset: dict, top_key: str = "mcpServers", dry_run: bool = False
 ) -> int:
-    obj = U.load_json(path, {})
-    keys = sorted(list((subset or {}).keys()))
-    if dry_run:
-        print(f"[DRY-RUN] 将应用到 {label}: {path}")
-        print("  keys:", ", ".join(keys) if keys else "(none)")
-        return 0
+    """兼容入口：按 label 找到对应的目标端适配器后全量下发到 path。"""
+    adapter = next(
+        (a for a in TARGETS.adapters() if a.top_key == top_key and label.startswith(a.label)),
+        None,
+    )
+    if adapter is None:
+        adapter = TARGETS.TargetAdapter(label, label, lambda: path, top_key=top_key)
+    return apply_target(adapter, subset, dry_run=dry_run, path=path, label=label)
+
+
+def _claude_registry_form(info: dict) -> dict:
+    """注册表条目的可比较形态（与 `claude mcp add --transport stdio` 写入的内容对应）。"""
+    info = info if isinstance(info, dict) else {}
+    out: dict = {"command": str(_expand_tilde(info.get("command", "")))}
+    args = [str(_expand_tilde(str(a))) for a in (info.get("args") or [])]
+    if args:
+        out["args"] = args
+    env = {str(k): str(v) for k, v in (info.get("env") or {}).items() if v is not None}
+    if env:
+        out["env"] = env
+    return out
 
-    # Droid: 写入 ~/.factory/mcp.json 顶层 mcpServers（官方格式）
-    if label == "Droid":
-        # 保留非 MCP 字段，仅覆盖 mcpServers，避免误伤其它配置
-        if not isinstance(obj, dict):
-            obj = {}
-        servers_config = {}
-        for name, info in subset.items():
-            server_config = {}
-            if "command" in info:
-                server_config["command"] = info["command"]
-            if "args" in info:
-                server_config["args"] = info["args"]
-            if "env" in info and info["env"]:
-                server_config["env"] = info["env"]
-            if "timeout" in info and info["timeout"] is not None:
-                server_config["timeout"] = info["timeout"]
-            server_config["type"] = "stdio"
-            servers_config[name] = server_config
-        obj["mcpServers"] = servers_config
-    elif top_key == "servers":
-        client_type = "gemini" if label == "Gemini" else "iflow" if label == "iFlow" else None
-        obj["servers"] = {
-            name: U.to_target_server_info(info or {}, client=client_type)
-            for name, info in (subset or {}).items()
-        }
-    else:
-        client_type = "gemini" if label == "Gemini" else "iflow" if label == "iFlow" else None
-        obj[top_key] = {
-            name: U.to_target_server_info(info or {}, client=client_type)
-            for name, info in (subset or {}).items()
-        }
-        if label == "Gemini":
-            obj.setdefault("mcp", {})["allowed"] = sorted((subset or {}).keys())
-
-    U.backup(path)
-    U.save_json(path, obj)
-    print(f"[OK] 已应用到 {label}: {path}")
-    return 0
+
+def _plan_claude_registry(subset: dict, current: dict) -> dict[str, list[str]]:
+    """按名称集合差与逐条内容哈希计算注册表需要的最小改动。
+
+    返回 {"add", "remove", "replace", "keep"}：replace 为同名但内容不同（先 remove 再 add）。
+    """
+    want = set(subset)
+    have = set(current)
+    replace, keep = [], []
+    for n in sorted(want & have):
+        same = SPEC.canonical_hash(_claude_registry_form(subset[n])) == SPEC.canonical_hash(
+            _claude_registry_form(current[n])
+        )
+        (keep if same else replace).append(n)
+    return {
+        "add": sorted(want - have),
+        "remove": sorted(have - want),
+        "replace": replace,
+        "keep": keep,
+    }
+
+
+def _claude_add_cmd(name: str, info: dict, scope: str) -> list[str]:
+    cmd = ["claude", "mcp", "add", "--transport", "stdio"]
+    for k, v in (info.get("env") or {}).items():
+        cmd += ["--env", f"{k}={v}"]
+    cmd += ["-s", scope, name]
+    cmd += ["--", _expand_tilde(info.get("command", ""))]
+    cmd += [_expand_tilde(str(a)) for a in (info.get("args") or [])]
+    return cmd
 
 
 def apply_claude(subset: dict, verbose: bool = False, dry_run: bool = False) -> int:
     # 文件端
-    apply_json_map(
-        "Claude(文件)", U.HOME / ".claude" / "settings.json", subset, "mcpServers", dry_run=dry_run
-    )
+    apply_target(TARGETS.get("claude"), subset, dry_run=dry_run, label="Claude(文件)")
 
-    # 注册表端：移除多余，补齐缺失，并强制与中央清单一致
+    # 注册表端：与现有注册条目做集合差 + 逐条内容哈希，只增/删/替换有差异的条目
     scope = U.claude_registry_scope()
-    want = sorted(list(subset.keys()))
+    current = TARGETS.get("claude").registry_entries(scope)
+    plan = _plan_claude_registry(subset, current)
+    # claude CLI 改写 ~/.claude.json 时不加锁，并发执行会丢失写入：全部串行（同名 remove→add 保序）
+    calls: list[tuple[str, list[str], float]] = []
+    for n in plan["remove"] + plan["replace"]:
+        calls.append((n, ["claude", "mcp", "remove", n, "-s", scope], 10))
+    for n in plan["replace"] + plan["add"]:
+        calls.append((n, _claude_add_cmd(n, subset.get(n) or {}, scope), 45))
+    # 旧做法：remove 全部已注册项，再对每个目标项 remove + add
+    avoided = len(current) + 2 * len(subset) - len(calls)
+    summary = (
+        f"add={len(plan['add'])} remove={len(plan['remove'])} "
+        f"replace={len(plan['replace'])} unchanged={len(plan['keep'])}"
+    )
+
+    claude = TARGETS.get("claude")
+    if claude.native_registry(scope):
+        # local/project scope：直接改写落盘文件，不启动 claude 子进程
+        p = claude.registry_file(scope)
+        put = {n: claude.registry_entry(subset.get(n) or {}) for n in plan["replace"] + plan["add"]}
+        if dry_run:
+            print(f"[DRY-RUN] 将直接改写 Claude 注册表文件 (scope={scope}): {p}")
+            print(f"  {summary}")
+            return 0
+        changed = claude.write_registry(scope, put, plan["remove"])
+        state = "已更新" if changed else "已是最新，未改写"
+        print(f"[OK] Claude 注册表已与所选集合对齐 (scope={scope}): {summary}")
+        print(f"  直接写入 {p}（{state}），未调用 claude CLI")
+        return 0
+
     if dry_run:
-        print("[DRY-RUN] 将对齐 Claude 注册表（预览）")
+        print("[DRY-RUN] 将对齐 Claude 注册表（预览，仅改动有差异的条目）")
         print(f"  scope: {scope}")
-        print("  keys:", ", ".join(want) if want else "(none)")
-        # 展示 add/remove 预览
-        for n in want:
-            info = subset.get(n) or {}
-            cmd = ["claude", "mcp", "add", "--transport", "stdio"]
-            for k, v in (info.get("env") or {}).items():
-                cmd += ["--env", f"{k}={v}"]
-            cmd += ["-s", scope, n]
-            cmd += ["--", _expand_tilde(info.get("command", ""))]
-            cmd += [_expand_tilde(str(a)) for a in (info.get("args") or [])]
+        print(f"  {summary}")
+        for _, cmd, _t in calls:
             print("[DRY-RUN]", " ".join(cmd))
+        print(f"  跳过 {avoided} 次 claude 子进程调用")
         return 0
 
-    # 实际对齐：先 remove 再 add（全量覆盖，避免残留）
-    # 先读取已注册项（user scope 直接读 ~/.claude.json 更稳健；其它 scope 回退到 `claude mcp list`）
-    if scope == "user":
-        present = sorted(U.claude_user_mcp_servers())
-    else:
-        try:
-            out = subprocess.run(
-                ["claude", "mcp", "list"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            text = (out.stdout or "") + "\n" + (out.stderr or "")
-            present = []
-            for line in text.splitlines():
-                line = line.strip()
-                if not line or line.startswith("plugin:"):
-                    continue
-                if ":" in line:
-                    present.append(line.split(":", 1)[0].strip())
-        except Exception:
-            present = []
-    # 移除所有现有注册项，确保只保留 want
-    remove_ok = []
-    remove_fail = []
-    for n in sorted(set(present)):
-        try:
-            cmd_rm = ["claude", "mcp", "remove", n, "-s", scope]
-            if verbose:
-                print("[VERBOSE]", " ".join(cmd_rm))
-            r = subprocess.run(cmd_rm, check=False, timeout=10)
-            (remove_ok if r.returncode == 0 else remove_fail).append(n)
-        except Exception:
-            remove_fail.append(n)
-    # 再按当前 subset 重加（包含本地化覆盖后的 command/args）
-    add_ok = []
-    add_fail = []
-    for n in want:
-        info = subset.get(n) or {}
-        try:
-            subprocess.run(["claude", "mcp", "remove", n, "-s", scope], check=False, timeout=10)
-        except Exception:
-            pass
-        cmd = ["claude", "mcp", "add", "--transport", "stdio"]
-        for k, v in (info.get("env") or {}).items():
-            cmd += ["--env", f"{k}={v}"]
-        cmd += ["-s", scope, n]
-        cmd += ["--", _expand_tilde(info.get("command", ""))]
-        cmd += [_expand_tilde(str(a)) for a in (info.get("args") or [])]
-        try:
-            if verbose:
-                print("[VERBOSE]", " ".join(cmd))
-            r = subprocess.run(cmd, check=False, timeout=45)
-            (add_ok if r.returncode == 0 else add_fail).append(n)
-        except Exception:
-            add_fail.append(n)
-    print(f"[OK] Claude 注册表已与所选集合对齐 (scope={scope})")
-    if remove_ok or remove_fail:
-        print(
-            f"  remove: ok={len(remove_ok)} fail={len(remove_fail)}"
-            + (f"; failed=[{', '.join(remove_fail)}]" if remove_fail else "")
-        )
-    if add_ok or add_fail:
-        print(
-            f"  add   : ok={len(add_ok)} fail={len(add_fail)}"
-            + (f"; failed=[{', '.join(add_fail)}]" if add_fail else "")
-        )
+    t0 = time.monotonic()
+    results = PROCS.run_all(calls, jobs=1, verbose=verbose)
+    U.invalidate_claude_registry()
+    failed = {r["key"] for r in results if not r["ok"]}
+    elapsed = time.monotonic() - t0
+
+    print(f"[OK] Claude 注册表已与所选集合对齐 (scope={scope}): {summary}")
+    print(
+        f"  省去 {avoided} 次 claude 子进程调用（串行执行 {len(results)} 次，耗时 {elapsed:.1f}s）"
+    )
+    if failed:
+        print(f"  [WARN] 失败: {', '.join(sorted(failed))}")
+        if verbose:
+            for r in results:
+                if not r["ok"]:
+                    print(f"    {' '.join(r['cmd'])}: {PROCS.failure_text(r)}")
     return 0
 
 
@@ -415,27 +414,59 @@ def _preview(client: str, subset: dict, dry_run: bool) -> None:
     print("— 差异预览 —")
     print(f"目标客户端: {client}")
     print("服务器集合: " + (", ".join(names) if names else "(empty)"))
-    if client == "codex":
-        print(f'目标文件  : {U.HOME/".codex"/"config.toml"}')
-    elif client == "gemini":
-        print(f'目标文件  : {U.HOME/".gemini"/"settings.json"}')
-    elif client == "iflow":
-        print(f'目标文件  : {U.HOME/".iflow"/"settings.json"}')
-    elif client == "droid":
-        print(f'目标文件  : {U.HOME/".factory"/"mcp.json"}')
-        print("注册表    : droid mcp remove/add (先删再加)")
-    elif client == "cursor":
-        print(f'目标文件  : {U.HOME/".cursor"/"mcp.json"}')
-    elif client == "claude":
-        print(f'目标文件  : {U.HOME/".claude"/"settings.json"}')
-        print("注册表    : claude mcp remove/add")
-    elif client == "vscode-user":
-        print(f"目标文件  : {U._vscode_user_path()}")
-    elif client == "vscode-insiders":
-        print(f"目标文件  : {U._vscode_insiders_path()}")
+    key = TARGETS.resolve(client)
+    if key is not None:
+        adapter = TARGETS.get(key)
+        print(f"目标文件  : {adapter.path()}")
+        if adapter.registry == "droid":
+            print("注册表    : droid mcp remove/add (先删再加)")
+        elif adapter.registry:
+            print(f"注册表    : {adapter.registry} mcp remove/add")
     print(f'模式      : {"DRY-RUN 预览" if dry_run else "实际写入"}')
 
 
+def _align_droid_registry(subset: dict, dry_run: bool, verbose: bool) -> None:
+    """对齐 Droid 注册表：先 remove 再 add。"""
+    want = set(subset.keys())
+    obj, _ = U.load_central_servers()
+    servers = obj.get("servers") or {}
+    if dry_run:
+        print("[DRY-RUN] 将对齐 Droid 注册（预览：先 remove 再 add）")
+        print("  keys:", ", ".join(sorted(want)) if want else "(none)")
+        for n in sorted(want):
+            info = servers.get(n) or {}
+            cmd_str = " ".join(
+                [_expand_tilde(info.get("command", ""))]
+                + [_expand_tilde(str(a)) for a in (info.get("args") or [])]
+            )
+            print("[DRY-RUN]", " ".join(["droid", "mcp", "remove", n]))
+            cmd = ["droid", "mcp", "add", n, cmd_str]
+            for k, v in (info.get("env") or {}).items():
+                cmd += ["--env", f"{k}={v}"]
+            print("[DRY-RUN]", " ".join(cmd))
+        return
+    tasks: list[tuple[str, list[str], float]] = []
+    for n in sorted(want):
+        info = servers.get(n) or {}
+        cmd_str = " ".join(
+            [_expand_tilde(info.get("command", ""))]
+            + [_expand_tilde(str(a)) for a in (info.get("args") or [])]
+        )
+        cmd = ["droid", "mcp", "add", n, cmd_str]
+        for k, v in (info.get("env") or {}).items():
+            cmd += ["--env", f"{k}={v}"]
+        tasks.append((n, ["droid", "mcp", "remove", n], 10))
+        tasks.append((n, cmd, 30))
+    # remove 失败（条目本不存在）属正常；只报告 add 失败
+    failed = [
+        r["key"]
+        for r in PROCS.run_all(tasks, verbose=verbose)
+        if r["cmd"][2] == "add" and not r["ok"]
+    ]
+    if failed:
+        print(f"  [WARN] Droid 注册失败: {', '.join(failed)}")
+
+
 def run(args) -> int:
     """run 子命令主入口。
 
@@ -484,16 +515,7 @@ def run(args) -> int:
     else:
         # 全交互式：引导选择客户端与服务器集合
         # 选择客户端
-        clients = [
-            ("claude", "Claude"),
-            ("codex", "Codex"),
-            ("gemini", "Gemini"),
-            ("iflow", "iFlow"),
-            ("droid", "Droid"),
-            ("cursor", "Cursor"),
-            ("vscode-user", "VS Code(User)"),
-            ("vscode-insiders", "VS Code(Insiders)"),
-        ]
+        clients = [(a.key, a.label) for a in TARGETS.adapters()]
         if os.environ.get("MCP_DEBUG"):
             print("[DBG] enter run", file=os.sys.stderr)
         print("选择目标 CLI/IDE:")
@@ -581,75 +603,18 @@ def run(args) -> int:
                 print("已取消")
                 return 0
 
-    if client == "claude":
+    key = TARGETS.resolve(client)
+    if key is None:
+        print("[ERR] 未知 client")
+        return 2
+    if key == "claude":
         rc = apply_claude(subset, verbose=getattr(args, "verbose", False), dry_run=dry_run)
-    elif client == "codex":
+    elif key == "codex":
         rc = apply_codex(subset, dry_run=dry_run)
-    elif client == "gemini":
-        rc = apply_json_map(
-            "Gemini", U.HOME / ".gemini" / "settings.json", subset, "mcpServers", dry_run=dry_run
-        )
-    elif client == "iflow":
-        rc = apply_json_map(
-            "iFlow", U.HOME / ".iflow" / "settings.json", subset, "mcpServers", dry_run=dry_run
-        )
-    elif client == "droid":
-        rc = apply_json_map(
-            "Droid", U.HOME / ".factory" / "mcp.json", subset, "mcpServers", dry_run=dry_run
-        )
-        # 对齐 Droid 注册表
-        want = set(subset.keys())
-        obj, _ = U.load_central_servers()
-        servers = obj.get("servers") or {}
-        if dry_run:
-            print("[DRY-RUN] 将对齐 Droid 注册（预览：先 remove 再 add）")
-            print("  keys:", ", ".join(sorted(want)) if want else "(none)")
-            for n in sorted(want):
-                info = servers.get(n) or {}
-                cmd_str = " ".join(
-                    [_expand_tilde(info.get("command", ""))]
-                    + [_expand_tilde(str(a)) for a in (info.get("args") or [])]
-                )
-                print("[DRY-RUN]", " ".join(["droid", "mcp", "remove", n]))
-                cmd = ["droid", "mcp", "add", n, cmd_str]
-                for k, v in (info.get("env") or {}).items():
-                    cmd += ["--env", f"{k}={v}"]
-                print("[DRY-RUN]", " ".join(cmd))
-        else:
-            for n in sorted(want):
-                try:
-                    subprocess.run(["droid", "mcp", "remove", n], check=False, timeout=10)
-                except Exception:
-                    pass
-                info = servers.get(n) or {}
-                cmd_str = " ".join(
-                    [_expand_tilde(info.get("command", ""))]
-                    + [_expand_tilde(str(a)) for a in (info.get("args") or [])]
-                )
-                cmd = ["droid", "mcp", "add", n, cmd_str]
-                for k, v in (info.get("env") or {}).items():
-                    cmd += ["--env", f"{k}={v}"]
-                try:
-                    if getattr(args, "verbose", False):
-                        print("[VERBOSE]", " ".join(cmd))
-                    subprocess.run(cmd, check=False, timeout=30)
-                except Exception:
-                    pass
-    elif client == "cursor":
-        rc = apply_json_map(
-            "Cursor", U.HOME / ".cursor" / "mcp.json", subset, "mcpServers", dry_run=dry_run
-        )
-    elif client == "vscode-user":
-        rc = apply_json_map(
-            "VS Code(User)", U._vscode_user_path(), subset, "servers", dry_run=dry_run
-        )
-    elif client == "vscode-insiders":
-        rc = apply_json_map(
-            "VS Code(Insiders)", U._vscode_insiders_path(), subset, "servers", dry_run=dry_run
-        )
     else:
-        print("[ERR] 未知 client")
-        return 2
+        rc = apply_target(TARGETS.get(key), subset, dry_run=dry_run)
+        if key == "droid":
+            _align_droid_registry(subset, dry_run, getattr(args, "verbose", False))
 
     if isinstance(rc, int) and rc != 0:
         return rc
@@ -660,8 +625,6 @@ def run(args) -> int:
         return 0
 
     # 可选执行命令（提供建议与健壮校验）
-    import shutil
-
     default_exec = {
         "claude": "claude",
         "codex": "codex",
@@ -706,7 +669,7 @@ def run(args) -> int:
         parts = cmd.split()
         exe = parts[0]
         # 验证命令是否存在（绝对路径或 PATH）
-        exists = (os.path.isabs(exe) and os.path.exists(exe)) or (shutil.which(exe) is not None)
+        exists = (os.path.isabs(exe) and os.path.exists(exe)) or (PATHS.which(exe) is not None)
         if not exists:
             print(f"[ERR] 未找到命令: {exe}。请检查 PATH 或输入绝对路径。")
             if attempt < 3:
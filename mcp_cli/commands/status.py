@@ -3,79 +3,42 @@
 
 from __future__ import annotations
 
+import json
+import sys
+
+from .. import targets as TARGETS
 from .. import utils as U
+from . import run as RUN
 
 
 def run(args) -> int:
     """显示 MCP 服务器状态，包括中央配置和各客户端的实际启用状态。"""
+    use_ndjson = bool(getattr(args, "ndjson", False))
     try:
         _, servers = U.load_central_servers()
     except Exception as e:
-        print(f"❌ 加载中央配置失败: {e}")
-        print("⚠️  尝试使用默认配置继续...")
+        stream = sys.stderr if use_ndjson else sys.stdout
+        print(f"❌ 加载中央配置失败: {e}", file=stream)
+        print("⚠️  尝试使用默认配置继续...", file=stream)
         servers = {}
 
     enabled, disabled = U.split_enabled_servers(servers)
     enabled_names = set(enabled.keys())
     disabled_names = set(disabled.keys())
-    print(f"📊 中央配置：总计 {len(servers)}，启用 {len(enabled)}，禁用 {len(disabled)}")
-    if disabled_names:
-        print("🚫 central 已禁用: " + ", ".join(sorted(disabled_names)))
-
-    if getattr(args, "central", False):
-        U.list_servers()
+    if not use_ndjson:
+        print(f"📊 中央配置：总计 {len(servers)}，启用 {len(enabled)}，禁用 {len(disabled)}")
+        if disabled_names:
+            print("🚫 central 已禁用: " + ", ".join(sorted(disabled_names)))
+        if getattr(args, "central", False):
+            U.list_servers()
 
-    sel = U._normalize_client(getattr(args, "client_pos", None)) or U._normalize_client(
+    sel = TARGETS.view_key(getattr(args, "client_pos", None)) or TARGETS.view_key(
         getattr(args, "client", None)
     )
-    targets = [
-        (
-            "claude-file",
-            "Claude(file)",
-            lambda: U._json_keys(
-                U.HOME / ".claude" / "settings.json", "mcpServers", "Claude配置读取"
-            ),
-        ),
-        ("claude-reg", "Claude(register)", U._claude_registered),
-        ("codex", "Codex", U._codex_keys),
-        (
-            "gemini",
-            "Gemini",
-            lambda: U._json_keys(
-                U.HOME / ".gemini" / "settings.json", "mcpServers", "Gemini配置读取"
-            ),
-        ),
-        (
-            "iflow",
-            "iFlow",
-            lambda: U._json_keys(
-                U.HOME / ".iflow" / "settings.json", "mcpServers", "iFlow配置读取"
-            ),
-        ),
-        (
-            "droid",
-            "Droid",
-            lambda: U._json_keys(U.HOME / ".factory" / "mcp.json", "mcpServers", "Droid配置读取"),
-        ),
-        (
-            "cursor",
-            "Cursor",
-            lambda: U._json_keys(U.HOME / ".cursor" / "mcp.json", "mcpServers", "Cursor配置读取"),
-        ),
-        (
-            "vscode-user",
-            "VS Code(User)",
-            lambda: U._json_keys(U._vscode_user_path(), "servers", "VS Code配置读取"),
-        ),
-        (
-            "vscode-ins",
-            "VS Code(Insiders)",
-            lambda: U._json_keys(U._vscode_insiders_path(), "servers", "VS Code Insiders配置读取"),
-        ),
-    ]
-    print("— 按客户端/IDE 的实际启用视图 —")
+    if not use_ndjson:
+        print("— 按客户端/IDE 的实际启用视图 —")
 
-    def _print_client(label: str, present: set[str]) -> None:
+    def _print_client(label: str, present: set[str], drift: dict[str, list[str]]) -> None:
         present_set = set(present or set())
         on_enabled = sorted(present_set & enabled_names)
         off_enabled = sorted(enabled_names - present_set)
@@ -88,18 +51,60 @@ def run(args) -> int:
             print("  ⚠️ central 禁用但目标已配置: " + ", ".join(on_disabled))
         if unknown:
             print("  ⚠️ 目标存在但 central 未收录: " + ", ".join(unknown))
+        if drift:
+            items = ", ".join(f"{n}({'/'.join(fields)})" for n, fields in drift.items())
+            print("  ⚠️ 内容与 central 不一致: " + items)
 
-    for key, label, fn in targets:
-        if sel and sel != key:
+    # 各目标端并发探测（总截止时间内未返回的标记为超时，不阻塞其它目标）
+    keys = [k for k, _label, _fn in TARGETS.views() if not sel or sel == k]
+    deadline = getattr(args, "deadline", None)
+    results: dict[str, dict] = {}
+    for res in TARGETS.probe_views(keys, deadline=deadline):
+        if use_ndjson:
+            row = _ndjson_row(res, enabled_names, disabled_names)
+            row["drift"] = _drift(res["key"], servers) if res["status"] == "ok" else {}
+            print(json.dumps(row, ensure_ascii=False), flush=True)
+        results[res["key"]] = res
+    if use_ndjson:
+        return 0
+
+    for key in keys:
+        res = results[key]
+        label = res["label"]
+        if res["status"] == "timeout":
+            print(f"\n[{label}]")
+            print(f"  ⏱️ 探测超时（{res['error']}），已跳过")
             continue
-        try:
-            present = fn()
-            if getattr(args, "verbose", False):
-                print(f"🔍 {label}: 找到 {len(present)} 个已配置服务器")
-        except Exception as e:
-            if getattr(args, "verbose", False):
-                print(f"⚠️  {label}: 读取配置时出错 - {e}")
-            present = set()
-        _print_client(label, set(present))
+        if getattr(args, "verbose", False):
+            if res["status"] == "error":
+                print(f"⚠️  {label}: 读取配置时出错 - {res['error']}")
+            else:
+                print(f"🔍 {label}: 找到 {len(res['present'])} 个已配置服务器")
+        _print_client(label, res["present"], _drift(key, servers))
 
     return 0
+
+
+def _drift(key: str, servers: dict) -> dict[str, list[str]]:
+    """内容漂移（读取失败不影响状态展示）。"""
+    try:
+        return RUN.target_drift(key, servers)
+    except Exception:
+        return {}
+
+
+def _ndjson_row(res: dict, enabled_names: set[str], disabled_names: set[str]) -> dict:
+    """单个目标端的 NDJSON 行（--ndjson：按完成顺序逐行输出）。"""
+    present = res["present"]
+    return {
+        "type": "target",
+        "key": res["key"],
+        "label": res["label"],
+        "status": res["status"],
+        "error": res["error"],
+        "elapsed": res["elapsed"],
+        "on": sorted(present & enabled_names),
+        "off": sorted(enabled_names - present) if res["status"] == "ok" else [],
+        "disabled_present": sorted(present & disabled_names),
+        "unknown": sorted(present - enabled_names - disabled_names),
+    }
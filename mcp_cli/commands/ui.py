@@ -12,20 +12,27 @@ from __future__ import annotations
 import http.server
 import json
 import os
-import re
 import secrets
-import subprocess
 import threading
-from copy import deepcopy
+import time
 from pathlib import Path
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 
+from .. import atomic as ATOMIC
+from .. import cow as COW
+from .. import locks as LOCKS
+from .. import procs as PROCS
+from .. import spec as SPEC
+from .. import targets as TARGETS
 from .. import utils as U
 from . import central as CENTRAL
 from . import run as RUN
 
 _WRITE_LOCK = threading.Lock()
+# 开关合并队列：(目标端, claude scope) -> 等待落盘的批次（见 apply_toggle）
+_PENDING: dict[tuple[str, str | None], dict[str, Any]] = {}
+_PENDING_LOCK = threading.Lock()
 _UI_INDEX_PATH = Path(__file__).with_name("ui_index.html")
 _UI_INDEX_CACHE: bytes | None = None
 
@@ -94,27 +101,17 @@ def _require_token(handler: http.server.BaseHTTPRequestHandler) -> bool:
 
 
 def _client_catalog() -> list[dict[str, str]]:
-    return [
-        {"key": "cursor", "label": "Cursor"},
-        {"key": "vscode-user", "label": "VS Code(User)"},
-        {"key": "vscode-insiders", "label": "VS Code(Insiders)"},
-        {"key": "claude", "label": "Claude"},
-        {"key": "codex", "label": "Codex"},
-        {"key": "gemini", "label": "Gemini"},
-        {"key": "iflow", "label": "iFlow"},
-        {"key": "droid", "label": "Droid"},
-    ]
+    return [{"key": a.key, "label": a.label} for a in TARGETS.adapters()]
 
 
 def _central_state() -> dict[str, Any]:
     central_path = U.CENTRAL
     exists = central_path.exists()
-    data = CENTRAL._load_central_or_new()  # noqa: SLF001
-    ok, msg = CENTRAL._validate(data)  # noqa: SLF001
+    data, ok, msg = CENTRAL._validated_central()  # noqa: SLF001
     servers_all = data.get("servers") if isinstance(data, dict) else {}
     if not isinstance(servers_all, dict):
         servers_all = {}
-    enabled, disabled = U.split_enabled_servers(servers_all)
+    enabled, disabled = SPEC.split_enabled(SPEC.load_specs(servers_all))
     return {
         "path": str(central_path),
         "exists": exists,
@@ -124,45 +121,11 @@ def _central_state() -> dict[str, Any]:
         "enabled": len(enabled),
         "disabled": len(disabled),
         "servers": {k: servers_all[k] for k in sorted(servers_all.keys())},
-        "enabled_names": sorted(enabled.keys()),
-        "disabled_names": sorted(disabled.keys()),
+        "enabled_names": enabled,
+        "disabled_names": disabled,
     }
 
 
-def _load_json_map(path: Path, top_key: str) -> tuple[dict[str, Any], dict[str, Any]]:
-    obj = U.load_json(path, {}, f"读取 {path.name}")
-    if not isinstance(obj, dict):
-        obj = {}
-    raw = obj.get(top_key)
-    if not isinstance(raw, dict):
-        raw = {}
-    return obj, raw
-
-
-def _save_json_map(path: Path, obj: dict[str, Any]) -> None:
-    U.backup(path)
-    U.save_json(path, obj)
-
-
-def _claude_project_overrides() -> tuple[dict[str, list[str]], Path]:
-    p = U.HOME / ".claude.json"
-    obj = U.load_json(p, {}, "")
-    if not isinstance(obj, dict):
-        return {}, p
-    projects = obj.get("projects")
-    if not isinstance(projects, dict):
-        return {}, p
-
-    out: dict[str, list[str]] = {}
-    for name, conf in projects.items():
-        if not isinstance(conf, dict):
-            continue
-        mcp_servers = conf.get("mcpServers")
-        if isinstance(mcp_servers, dict) and mcp_servers:
-            out[str(name)] = sorted([str(k) for k in mcp_servers.keys()])
-    return out, p
-
-
 def _target_state(client: str, central: dict[str, Any]) -> dict[str, Any]:
     servers_all = central.get("servers") or {}
     all_names = set(servers_all.keys())
@@ -178,136 +141,40 @@ def _target_state(client: str, central: dict[str, Any]) -> dict[str, Any]:
             "disabled_present": disabled_present,
         }
 
-    if client == "cursor":
-        p = U.HOME / ".cursor" / "mcp.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        return _mk(set(mp.keys()), p)
-    if client == "gemini":
-        p = U.HOME / ".gemini" / "settings.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        return _mk(set(mp.keys()), p)
-    if client == "iflow":
-        p = U.HOME / ".iflow" / "settings.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        return _mk(set(mp.keys()), p)
-    if client == "droid":
-        p = U.HOME / ".factory" / "mcp.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        return _mk(set(mp.keys()), p)
-    if client == "vscode-user":
-        p = U._vscode_user_path()
-        _, mp = _load_json_map(p, "servers")
-        return _mk(set(mp.keys()), p)
-    if client == "vscode-insiders":
-        p = U._vscode_insiders_path()
-        _, mp = _load_json_map(p, "servers")
-        return _mk(set(mp.keys()), p)
-    if client == "codex":
-        p = U.HOME / ".codex" / "config.toml"
-        present = U._codex_keys()
-        return _mk(set(present), p)
-    if client == "claude":
-        p = U.HOME / ".claude" / "settings.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        file_present = set(mp.keys())
-        reg_present = set(U._claude_registered())
-        overrides, overrides_path = _claude_project_overrides()
-        present = file_present | reg_present
-        out = _mk(present, p)
-        out["claude_file_present"] = sorted(file_present)
-        out["claude_registry_present"] = sorted(reg_present)
-        out["claude_project_overrides"] = {
-            "path": str(overrides_path),
-            "count": len(overrides),
-            "examples": list(overrides.items())[:3],
-        }
+    # 经 state.json 指纹缓存：目标文件未变时不重新解析
+    adapter = TARGETS.get(client)
+    if not isinstance(adapter, TARGETS.ClaudeAdapter):
+        out = _mk(TARGETS.present(adapter.key), adapter.path())
+        out["drift"] = RUN.target_drift(adapter.key, servers_all)
         return out
-    raise ValueError(f"未知 client: {client}")
+
+    file_present = TARGETS.present("claude-file")
+    reg_present = TARGETS.present("claude-reg")
+    overrides, overrides_path = adapter.project_overrides()
+    out = _mk(file_present | reg_present, adapter.path())
+    out["drift"] = RUN.target_drift("claude-file", servers_all)
+    out["claude_file_present"] = sorted(file_present)
+    out["claude_registry_present"] = sorted(reg_present)
+    out["claude_project_overrides"] = {
+        "path": str(overrides_path),
+        "count": len(overrides),
+        "examples": list(overrides.items())[:3],
+    }
+    return out
 
 
 def _read_target_entry(client: str, name: str) -> dict[str, Any]:
     """从目标端配置读取某个 server 的原始定义（用于收录到 central）。"""
-    if client == "cursor":
-        p = U.HOME / ".cursor" / "mcp.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        v = mp.get(name)
-        if isinstance(v, dict):
-            return v
-        raise KeyError(f"Cursor 未找到: {name}")
-    if client == "gemini":
-        p = U.HOME / ".gemini" / "settings.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        v = mp.get(name)
-        if isinstance(v, dict):
-            return v
-        raise KeyError(f"Gemini 未找到: {name}")
-    if client == "iflow":
-        p = U.HOME / ".iflow" / "settings.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        v = mp.get(name)
-        if isinstance(v, dict):
-            return v
-        raise KeyError(f"iFlow 未找到: {name}")
-    if client == "droid":
-        p = U.HOME / ".factory" / "mcp.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        v = mp.get(name)
-        if isinstance(v, dict):
-            return v
-        raise KeyError(f"Droid 未找到: {name}")
-    if client == "vscode-user":
-        p = U._vscode_user_path()
-        _, mp = _load_json_map(p, "servers")
-        v = mp.get(name)
-        if isinstance(v, dict):
-            return v
-        raise KeyError(f"VS Code(User) 未找到: {name}")
-    if client == "vscode-insiders":
-        p = U._vscode_insiders_path()
-        _, mp = _load_json_map(p, "servers")
-        v = mp.get(name)
-        if isinstance(v, dict):
-            return v
-        raise KeyError(f"VS Code(Insiders) 未找到: {name}")
-    if client == "claude":
-        p = U.HOME / ".claude" / "settings.json"
-        _, mp = _load_json_map(p, "mcpServers")
-        v = mp.get(name)
-        if isinstance(v, dict):
-            return v
+    adapter = TARGETS.get(client)
+    v = adapter.entry(name)
+    if v is not None:
+        return v
+    if isinstance(adapter, TARGETS.ClaudeAdapter):
         # 可能仅存在于注册表：缺少配置详情无法收录
         raise KeyError(f"Claude 文件端未找到: {name}（若仅在注册表存在，无法自动收录）")
-    if client == "codex":
-        p = U.HOME / ".codex" / "config.toml"
-        if not p.exists():
-            raise KeyError("Codex 配置不存在")
-        try:
-            import tomllib
-
-            conf = tomllib.loads(p.read_text(encoding="utf-8"))
-            m = conf.get("mcp_servers", {}) or {}
-            raw = m.get(name)
-            if not isinstance(raw, dict):
-                raise KeyError(f"Codex 未找到: {name}")
-            out: dict[str, Any] = {}
-            if raw.get("command"):
-                out["command"] = raw["command"]
-            if isinstance(raw.get("args"), list):
-                out["args"] = [str(x) for x in raw.get("args") or []]
-            env = raw.get("env")
-            if isinstance(env, dict) and env:
-                out["env"] = {str(k): str(v) for k, v in env.items() if v is not None}
-            timeout = raw.get("startup_timeout_sec")
-            if timeout is not None:
-                try:
-                    out["timeout"] = int(timeout)
-                except Exception:
-                    pass
-            return out
-        except Exception as e:
-            raise KeyError(f"Codex 解析失败: {e}") from e
-
-    raise ValueError(f"未知 client: {client}")
+    if not adapter.path().exists():
+        raise KeyError(f"{adapter.label} 配置不存在")
+    raise KeyError(f"{adapter.label} 未找到: {name}")
 
 
 def import_to_central(client: str, name: str) -> dict[str, Any]:
@@ -320,13 +187,13 @@ def import_to_central(client: str, name: str) -> dict[str, Any]:
     entry["enabled"] = True
     entry["source"] = f"imported:{client}"
 
-    with _WRITE_LOCK:
+    with _WRITE_LOCK, LOCKS.locked(U.CENTRAL):
         data = CENTRAL._load_central_or_new()  # noqa: SLF001
         servers = data.setdefault("servers", {})
         if name in servers:
             raise ValueError(f"central 已存在同名条目: {name}")
         servers[name] = entry
-        CENTRAL._save_central(data, dry=False)  # noqa: SLF001
+        CENTRAL._save_central(data, dry=False, changed={name})  # noqa: SLF001
 
     return {"imported": name, "entry": entry}
 
@@ -336,13 +203,13 @@ def delete_from_central(name: str) -> dict[str, Any]:
     if not name:
         raise ValueError("缺少 name")
 
-    with _WRITE_LOCK:
+    with _WRITE_LOCK, LOCKS.locked(U.CENTRAL):
         data = CENTRAL._load_central_or_new()  # noqa: SLF001
         servers = data.setdefault("servers", {})
         if name not in servers:
             raise ValueError(f"central 未找到: {name}")
         removed = servers.pop(name)
-        CENTRAL._save_central(data, dry=False)  # noqa: SLF001
+        CENTRAL._save_central(data, dry=False, changed={name})  # noqa: SLF001
     return {"deleted": name, "entry": removed}
 
 
@@ -351,13 +218,13 @@ def set_central_enabled(name: str, enabled: bool) -> dict[str, Any]:
     if not name:
         raise ValueError("缺少 name")
 
-    with _WRITE_LOCK:
+    with _WRITE_LOCK, LOCKS.locked(U.CENTRAL):
         data = CENTRAL._load_central_or_new()  # noqa: SLF001
         servers = data.setdefault("servers", {})
         if name not in servers:
             raise ValueError(f"central 未找到: {name}")
-        servers[name]["enabled"] = bool(enabled)
-        CENTRAL._save_central(data, dry=False)  # noqa: SLF001
+        COW.edit(servers, name, enabled=bool(enabled))
+        CENTRAL._save_central(data, dry=False, changed={name})  # noqa: SLF001
     return {"name": name, "enabled": bool(enabled)}
 
 
@@ -369,24 +236,48 @@ def _build_server_info_from_central(
     info = central_servers.get(name) or {}
     if not isinstance(info, dict):
         raise ValueError(f"central 配置非法（必须是对象）: {name}")
-    subset = {name: deepcopy(info)}
-    original = deepcopy(subset)
+    # 条目按写时复制约定共享（_apply_local_override 只生成新 dict，不原地修改）
+    subset = {name: info}
+    original = dict(subset)
     subset = RUN._apply_local_override(subset, client=client)  # noqa: SLF001
     subset = RUN._fallback_to_original(subset, original)  # noqa: SLF001
     return subset[name]
 
 
-def _to_droid_entry(info: dict[str, Any]) -> dict[str, Any]:
-    server_config: dict[str, Any] = {"type": "stdio"}
-    if "command" in info:
-        server_config["command"] = info["command"]
-    if "args" in info:
-        server_config["args"] = info["args"]
-    if "env" in info and info.get("env"):
-        server_config["env"] = info["env"]
-    if "timeout" in info and info.get("timeout") is not None:
-        server_config["timeout"] = info["timeout"]
-    return server_config
+def _registry_notes(res: dict[str, Any], what: str) -> list[str]:
+    """把 procs 的结构化结果转换为 UI 提示（文件端已写入，注册表失败仅提示）。"""
+    if res["ok"]:
+        return []
+    if res["returncode"] is None:
+        return [f"⚠️ {what} 异常（已写入文件端）: {res['error']}"]
+    return [f"⚠️ {what} 失败（已写入文件端）: " + (res["stderr"] or res["stdout"] or "")]
+
+
+def _claude_registry_cmd(
+    name: str, info: dict[str, Any] | None, on: bool, scope: str
+) -> tuple[list[str], int]:
+    if not on:
+        return ["claude", "mcp", "remove", name, "-s", scope], 15
+    cmd = ["claude", "mcp", "add", "--transport", "stdio"]
+    for k, v in (info or {}).get("env") or {}.items():
+        cmd += ["--env", f"{k}={v}"]
+    cmd += ["-s", scope, name]
+    cmd += ["--", str(_expand_tilde((info or {}).get("command", "")))]
+    cmd += [str(_expand_tilde(a)) for a in ((info or {}).get("args") or [])]
+    return cmd, 45
+
+
+def _droid_registry_cmd(name: str, info: dict[str, Any] | None, on: bool) -> tuple[list[str], int]:
+    if not on:
+        return ["droid", "mcp", "remove", name], 10
+    cmd_str = " ".join(
+        [str(_expand_tilde((info or {}).get("command", "")))]
+        + [str(_expand_tilde(a)) for a in ((info or {}).get("args") or [])]
+    )
+    cmd = ["droid", "mcp", "add", name, cmd_str]
+    for k, v in (info or {}).get("env") or {}.items():
+        cmd += ["--env", f"{k}={v}"]
+    return cmd, 30
 
 
 def _sync_claude_registry(
@@ -396,118 +287,51 @@ def _sync_claude_registry(
     *,
     claude_scope: str | None = None,
 ) -> list[str]:
-    notes: list[str] = []
-    scope = _coerce_claude_scope(claude_scope)
-    if on:
-        cmd = ["claude", "mcp", "add", "--transport", "stdio"]
-        for k, v in (info or {}).get("env") or {}.items():
-            cmd += ["--env", f"{k}={v}"]
-        cmd += ["-s", scope, name]
-        cmd += ["--", str(_expand_tilde((info or {}).get("command", "")))]
-        cmd += [str(_expand_tilde(a)) for a in ((info or {}).get("args") or [])]
-        try:
-            r = subprocess.run(cmd, check=False, timeout=45, capture_output=True, text=True)
-            if r.returncode != 0:
-                notes.append(
-                    "⚠️ claude registry add 失败（已写入文件端）: " + (r.stderr or r.stdout or "")
-                )
-        except Exception as e:
-            notes.append(f"⚠️ claude registry add 异常（已写入文件端）: {e}")
-        return notes
-
-    try:
-        cmd_rm = ["claude", "mcp", "remove", name, "-s", scope]
-        r = subprocess.run(cmd_rm, check=False, timeout=15, capture_output=True, text=True)
-        if r.returncode != 0:
-            notes.append(
-                "⚠️ claude registry remove 失败（已写入文件端）: " + (r.stderr or r.stdout or "")
-            )
-    except Exception as e:
-        notes.append(f"⚠️ claude registry remove 异常（已写入文件端）: {e}")
-    return notes
+    return _sync_registry_many("claude", {name: info if on else None}, claude_scope)[name]
 
 
-def _sync_droid_registry(name: str, info: dict[str, Any] | None, on: bool) -> list[str]:
-    notes: list[str] = []
-    if on:
-        cmd_str = " ".join(
-            [str(_expand_tilde((info or {}).get("command", "")))]
-            + [str(_expand_tilde(a)) for a in ((info or {}).get("args") or [])]
-        )
-        cmd = ["droid", "mcp", "add", name, cmd_str]
-        for k, v in (info or {}).get("env") or {}.items():
-            cmd += ["--env", f"{k}={v}"]
-        try:
-            r = subprocess.run(cmd, check=False, timeout=30, capture_output=True, text=True)
-            if r.returncode != 0:
-                notes.append(
-                    "⚠️ droid registry add 失败（已写入文件端）: " + (r.stderr or r.stdout or "")
-                )
-        except Exception as e:
-            notes.append(f"⚠️ droid registry add 异常（已写入文件端）: {e}")
-        return notes
-
-    try:
-        cmd_rm = ["droid", "mcp", "remove", name]
-        r = subprocess.run(cmd_rm, check=False, timeout=10, capture_output=True, text=True)
-        if r.returncode != 0:
-            notes.append(
-                "⚠️ droid registry remove 失败（已写入文件端）: " + (r.stderr or r.stdout or "")
-            )
-    except Exception as e:
-        notes.append(f"⚠️ droid registry remove 异常（已写入文件端）: {e}")
-    return notes
-
-
-def _codex_strip_server_tables(text: str, name: str) -> str:
-    """从 Codex config.toml 中移除指定 server 的所有表段（含 .env 等子表）。"""
-    name_esc = re.escape(str(name))
-    # 兼容我们自己写入的标记行（若存在）
-    text = re.sub(
-        rf"(?m)^\s*# === MCP Server: {name_esc} .*?\n",
-        "",
-        text,
-    )
-    # 移除 [mcp_servers.<name>] 以及 [mcp_servers.<name>.*] 相关段落
-    text = re.sub(
-        rf"(?ms)^\[mcp_servers\.{name_esc}(?:\.[^\]]+)?\][\s\S]*?(?=^\[|\Z)",
-        "",
-        text,
-    )
-    return text
+def _sync_registry(
+    registry: str | None, name: str, info: dict[str, Any] | None, on: bool, claude_scope: str | None
+) -> list[str]:
+    """带 CLI 注册表的目标端（TargetAdapter.registry）：文件端写入后再对齐注册表。"""
+    return _sync_registry_many(registry, {name: info if on else None}, claude_scope)[name]
 
 
-def _codex_render_server_block(name: str, info: dict[str, Any]) -> str:
-    """渲染单个 Codex server 的 TOML 段落（追加到文件末尾）。"""
-    info = U.to_target_server_info(info or {}, client="codex")
-    name = str(name)
+def _sync_registry_many(
+    registry: str | None, changes: dict[str, dict[str, Any] | None], claude_scope: str | None
+) -> dict[str, list[str]]:
+    """批量对齐注册表（{name: info 或 None}），返回 {name: 提示列表}。
 
-    timeout = info.get("timeout")
-    try:
-        timeout_sec = int(timeout) if timeout is not None else 60
-    except Exception:
-        timeout_sec = 60
-    if timeout_sec < 1:
-        timeout_sec = 60
-
-    cmd = str(info.get("command") or "")
-    args = info.get("args") or []
-    env = info.get("env") or {}
-
-    lines: list[str] = []
-    lines.append(f"\n# === MCP Server: {name} (由 MCP Local Manager 生成) ===")
-    lines.append(f"[mcp_servers.{name}]")
-    lines.append(f"startup_timeout_sec = {timeout_sec}")
-    lines.append(f"tool_timeout_sec = {timeout_sec}")
-    lines.append("command = " + json.dumps(cmd))
-    if isinstance(args, list) and args:
-        lines.append("args = " + json.dumps([str(x) for x in args]))
-    if isinstance(env, dict) and env:
-        lines.append(f"\n[mcp_servers.{name}.env]")
-        for k, v in env.items():
-            lines.append(f"{k} = " + json.dumps(str(v)))
-    lines.append("")
-    return "\n".join(lines)
+    Claude local/project scope 直接改写一次注册表文件；user scope 经 claude CLI 串行执行
+    （claude CLI 改写 ~/.claude.json 时不加锁，并发会丢失写入）；droid 经 procs 并行调用 CLI。
+    """
+    notes: dict[str, list[str]] = {n: [] for n in changes}
+    if registry not in ("claude", "droid") or not changes:
+        return notes
+    if registry == "claude":
+        scope = _coerce_claude_scope(claude_scope)
+        claude = TARGETS.get("claude")
+        if claude.native_registry(scope):
+            # local/project scope：直接改写 ~/.claude.json projects[<cwd>] / ./.mcp.json
+            put = {n: claude.registry_entry(i) for n, i in changes.items() if i is not None}
+            drop = [n for n, i in changes.items() if i is None]
+            try:
+                claude.write_registry(scope, put, drop)
+            except Exception as e:
+                for n in changes:
+                    notes[n].append(f"⚠️ claude registry 写入异常（已写入文件端）: {e}")
+            return notes
+        tasks = [(n, *_claude_registry_cmd(n, i, i is not None, scope)) for n, i in changes.items()]
+        jobs: int | None = 1
+    else:
+        tasks = [(n, *_droid_registry_cmd(n, i, i is not None)) for n, i in changes.items()]
+        jobs = None
+    for res in PROCS.run_all(tasks, jobs=jobs):
+        what = f"{registry} registry {'add' if changes[res['key']] is not None else 'remove'}"
+        notes[res["key"]] += _registry_notes(res, what)
+    if registry == "claude":
+        U.invalidate_claude_registry()
+    return notes
 
 
 def remove_from_target(
@@ -518,111 +342,23 @@ def remove_from_target(
     if not name:
         raise ValueError("缺少 server name")
 
-    notes: list[str] = []
-    changed = False
+    adapter = TARGETS.get(client)
+    client = adapter.key
     skipped: str | None = None
-
-    def _remove_json_key(path: Path, top_key: str, *, update_gemini_allowed: bool = False) -> None:
-        nonlocal changed
-        obj = U.load_json(path, {}, f"读取 {path.name}")
-        if not isinstance(obj, dict):
-            obj = {}
-        raw = obj.get(top_key)
-        if not isinstance(raw, dict):
-            raw = {}
-
-        before_allowed = None
-        if update_gemini_allowed:
-            before_allowed = list((obj.get("mcp") or {}).get("allowed") or [])
-
-        if name in raw:
-            raw.pop(name, None)
-            changed = True
-
-        obj[top_key] = raw
-        if update_gemini_allowed:
-            obj.setdefault("mcp", {})["allowed"] = sorted(raw.keys())
-            after_allowed = list(obj["mcp"]["allowed"])
-            if before_allowed != after_allowed:
-                changed = True
-
-        if changed:
-            U.backup(path)
-            U.save_json(path, obj)
-
     with _WRITE_LOCK:
-        if client == "cursor":
-            p = U.HOME / ".cursor" / "mcp.json"
-            if not p.exists():
-                skipped = f"配置不存在: {p}"
-                return {"client": client, "changed": False, "skipped": skipped, "notes": notes}
-            _remove_json_key(p, "mcpServers")
-            return {"client": client, "changed": changed, "skipped": skipped, "notes": notes}
-
-        if client == "gemini":
-            p = U.HOME / ".gemini" / "settings.json"
-            if not p.exists():
-                skipped = f"配置不存在: {p}"
-                return {"client": client, "changed": False, "skipped": skipped, "notes": notes}
-            _remove_json_key(p, "mcpServers", update_gemini_allowed=True)
-            return {"client": client, "changed": changed, "skipped": skipped, "notes": notes}
-
-        if client == "iflow":
-            p = U.HOME / ".iflow" / "settings.json"
-            if not p.exists():
-                skipped = f"配置不存在: {p}"
-                return {"client": client, "changed": False, "skipped": skipped, "notes": notes}
-            _remove_json_key(p, "mcpServers")
-            return {"client": client, "changed": changed, "skipped": skipped, "notes": notes}
-
-        if client == "vscode-user":
-            p = U._vscode_user_path()
-            if not p.exists():
-                skipped = f"配置不存在: {p}"
-                return {"client": client, "changed": False, "skipped": skipped, "notes": notes}
-            _remove_json_key(p, "servers")
-            return {"client": client, "changed": changed, "skipped": skipped, "notes": notes}
-
-        if client == "vscode-insiders":
-            p = U._vscode_insiders_path()
-            if not p.exists():
-                skipped = f"配置不存在: {p}"
-                return {"client": client, "changed": False, "skipped": skipped, "notes": notes}
-            _remove_json_key(p, "servers")
-            return {"client": client, "changed": changed, "skipped": skipped, "notes": notes}
-
-        if client == "claude":
-            p = U.HOME / ".claude" / "settings.json"
-            if p.exists():
-                _remove_json_key(p, "mcpServers")
-            else:
-                skipped = f"文件端配置不存在（将仅尝试注册表移除）: {p}"
-            notes += _sync_claude_registry(name, None, False, claude_scope=claude_scope)
-            return {"client": client, "changed": changed, "skipped": skipped, "notes": notes}
-
-        if client == "droid":
-            p = U.HOME / ".factory" / "mcp.json"
-            if p.exists():
-                _remove_json_key(p, "mcpServers")
-            else:
-                skipped = f"文件端配置不存在（将仅尝试注册表移除）: {p}"
-            notes += _sync_droid_registry(name, None, False)
-            return {"client": client, "changed": changed, "skipped": skipped, "notes": notes}
-
-        if client == "codex":
-            p = U.HOME / ".codex" / "config.toml"
-            if not p.exists():
-                skipped = f"配置不存在: {p}"
-                return {"client": client, "changed": False, "skipped": skipped, "notes": notes}
-            text = p.read_text(encoding="utf-8")
-            new_text = _codex_strip_server_tables(text, name)
-            if new_text != text:
-                U.backup(p)
-                p.write_text(new_text, encoding="utf-8")
-                changed = True
-            return {"client": client, "changed": changed, "skipped": skipped, "notes": notes}
-
-        raise ValueError(f"未知 client: {client}")
+        p = adapter.path()
+        if not p.exists():
+            if adapter.registry is None:
+                return {
+                    "client": client,
+                    "changed": False,
+                    "skipped": f"配置不存在: {p}",
+                    "notes": [],
+                }
+            skipped = f"文件端配置不存在（将仅尝试注册表移除）: {p}"
+        changed = adapter.toggle(name, None)
+        notes = _sync_registry(adapter.registry, name, None, False, claude_scope)
+    return {"client": client, "changed": changed, "skipped": skipped, "notes": notes}
 
 
 def remove_everywhere(
@@ -637,11 +373,12 @@ def remove_everywhere(
 
     results: list[dict[str, Any]] = []
     errors: dict[str, str] = {}
-    for c in [c["key"] for c in _client_catalog()]:
-        try:
-            results.append(remove_from_target(c, name, claude_scope=claude_scope))
-        except Exception as e:
-            errors[c] = str(e)
+    with ATOMIC.group_commit():
+        for c in [c["key"] for c in _client_catalog()]:
+            try:
+                results.append(remove_from_target(c, name, claude_scope=claude_scope))
+            except Exception as e:
+                errors[c] = str(e)
 
     return {"server": name, "targets": results, "errors": errors}
 
@@ -653,6 +390,8 @@ def apply_toggle(
     *,
     claude_scope: str | None = None,
 ) -> dict[str, Any]:
+    adapter = TARGETS.get(client)
+    client = adapter.key
     central = _central_state()
     servers_all: dict[str, Any] = central.get("servers") or {}
     disabled_names = set(central.get("disabled_names") or [])
@@ -663,147 +402,112 @@ def apply_toggle(
             raise ValueError(f"此服务在 central 已禁用（enabled:false）：{name}。请先启用再落地。")
         info = _build_server_info_from_central(servers_all, name, client=client)
 
-    notes: list[str] = []
-    with _WRITE_LOCK:
-        if client == "codex":
-            p = U.HOME / ".codex" / "config.toml"
-            if not p.exists():
-                raise RuntimeError(f"Codex 配置不存在: {p}")
-            text = p.read_text(encoding="utf-8")
-            new_text = _codex_strip_server_tables(text, name)
-            if on:
-                new_text = new_text.rstrip() + _codex_render_server_block(name, info or {})
-            if new_text != text:
-                U.backup(p)
-                p.write_text(new_text, encoding="utf-8")
-            return {"notes": notes, "client": client, "changed": {"server": name, "on": on}}
-
-        if client == "claude":
-            p = U.HOME / ".claude" / "settings.json"
-            changed = False
-            if on or p.exists():
-                obj, mp = _load_json_map(p, "mcpServers")
-                if on:
-                    mp[name] = U.to_target_server_info(info or {}, client="claude")
-                    changed = True
-                else:
-                    if name in mp:
-                        mp.pop(name, None)
-                        changed = True
-                obj["mcpServers"] = mp
-                if changed:
-                    _save_json_map(p, obj)
-            notes += _sync_claude_registry(name, info, on, claude_scope=claude_scope)
-            return {"notes": notes, "client": client, "changed": {"server": name, "on": on}}
-
-        if client == "cursor":
-            p = U.HOME / ".cursor" / "mcp.json"
-            changed = False
-            if on or p.exists():
-                obj, mp = _load_json_map(p, "mcpServers")
-                if on:
-                    mp[name] = U.to_target_server_info(info or {}, client="cursor")
-                    changed = True
-                else:
-                    if name in mp:
-                        mp.pop(name, None)
-                        changed = True
-                obj["mcpServers"] = mp
-                if changed:
-                    _save_json_map(p, obj)
-            return {"notes": notes, "client": client, "changed": {"server": name, "on": on}}
-
-        if client == "gemini":
-            p = U.HOME / ".gemini" / "settings.json"
-            changed = False
-            if on or p.exists():
-                obj, mp = _load_json_map(p, "mcpServers")
-                before_allowed = list((obj.get("mcp") or {}).get("allowed") or [])
-                if on:
-                    mp[name] = U.to_target_server_info(info or {}, client="gemini")
-                    changed = True
-                else:
-                    if name in mp:
-                        mp.pop(name, None)
-                        changed = True
-                obj["mcpServers"] = mp
-                obj.setdefault("mcp", {})["allowed"] = sorted(mp.keys())
-                if list(obj["mcp"]["allowed"]) != before_allowed:
-                    changed = True
-                if changed:
-                    _save_json_map(p, obj)
-            return {"notes": notes, "client": client, "changed": {"server": name, "on": on}}
-
-        if client == "iflow":
-            p = U.HOME / ".iflow" / "settings.json"
-            changed = False
-            if on or p.exists():
-                obj, mp = _load_json_map(p, "mcpServers")
-                if on:
-                    mp[name] = U.to_target_server_info(info or {}, client="iflow")
-                    changed = True
-                else:
-                    if name in mp:
-                        mp.pop(name, None)
-                        changed = True
-                obj["mcpServers"] = mp
-                if changed:
-                    _save_json_map(p, obj)
-            return {"notes": notes, "client": client, "changed": {"server": name, "on": on}}
-
-        if client == "droid":
-            p = U.HOME / ".factory" / "mcp.json"
-            changed = False
-            if on or p.exists():
-                obj, mp = _load_json_map(p, "mcpServers")
-                if on:
-                    mp[name] = _to_droid_entry(info or {})
-                    changed = True
-                else:
-                    if name in mp:
-                        mp.pop(name, None)
-                        changed = True
-                obj["mcpServers"] = mp
-                if changed:
-                    _save_json_map(p, obj)
-            notes += _sync_droid_registry(name, info, on)
-            return {"notes": notes, "client": client, "changed": {"server": name, "on": on}}
-
-        if client == "vscode-user":
-            p = U._vscode_user_path()
-            changed = False
-            if on or p.exists():
-                obj, mp = _load_json_map(p, "servers")
-                if on:
-                    mp[name] = U.to_target_server_info(info or {}, client="vscode-user")
-                    changed = True
-                else:
-                    if name in mp:
-                        mp.pop(name, None)
-                        changed = True
-                obj["servers"] = mp
-                if changed:
-                    _save_json_map(p, obj)
-            return {"notes": notes, "client": client, "changed": {"server": name, "on": on}}
-
-        if client == "vscode-insiders":
-            p = U._vscode_insiders_path()
-            changed = False
-            if on or p.exists():
-                obj, mp = _load_json_map(p, "servers")
-                if on:
-                    mp[name] = U.to_target_server_info(info or {}, client="vscode-insiders")
-                    changed = True
-                else:
-                    if name in mp:
-                        mp.pop(name, None)
-                        changed = True
-                obj["servers"] = mp
-                if changed:
-                    _save_json_map(p, obj)
-            return {"notes": notes, "client": client, "changed": {"server": name, "on": on}}
-
-        raise ValueError(f"未知 client: {client}")
+    window = coalesce_window()
+    if window <= 0:
+        with _WRITE_LOCK:
+            adapter.toggle(name, info if on else None)
+            notes = _sync_registry(adapter.registry, name, info, on, claude_scope)
+        return {"notes": notes, "client": client, "changed": {"server": name, "on": on}}
+
+    # 合并窗口：同一目标端窗口内的开关并入同一批次，由第一个请求在窗口结束后一次写入
+    key = (client, _coerce_claude_scope(claude_scope) if adapter.registry == "claude" else None)
+    with _PENDING_LOCK:
+        batch = _PENDING.get(key)
+        leader = batch is None
+        if leader:
+            batch = {"changes": {}, "requests": 0, "done": threading.Event()}
+            _PENDING[key] = batch
+        batch["changes"][name] = info if on else None  # 同名以最后一次点击为准
+        batch["requests"] += 1
+    if leader:
+        time.sleep(window)
+        with _PENDING_LOCK:
+            _PENDING.pop(key, None)
+        try:
+            with _WRITE_LOCK:
+                adapter.toggle_many(batch["changes"])
+                batch["notes"] = _sync_registry_many(
+                    adapter.registry, batch["changes"], claude_scope
+                )
+        except Exception as e:
+            batch["error"] = e
+        finally:
+            batch["done"].set()
+    else:
+        batch["done"].wait()
+    if "error" in batch:
+        raise batch["error"]
+    final = batch["changes"][name] is not None
+    return {
+        "notes": batch["notes"][name],
+        "client": client,
+        "changed": {"server": name, "on": final},
+        "coalesced": batch["requests"],
+    }
+
+
+def coalesce_window() -> float:
+    """UI 开关合并窗口（秒）：MCP_UI_COALESCE_MS 覆盖（默认 100ms），0 表示逐条立即写入。"""
+    try:
+        return max(0.0, float(os.environ.get("MCP_UI_COALESCE_MS", "100"))) / 1000
+    except ValueError:
+        return 0.1
+
+
+def apply_toggle_batch(
+    changes: list[dict[str, Any]],
+    *,
+    claude_scope: str | None = None,
+) -> dict[str, Any]:
+    """批量开关：按目标端分组，每组一次读取、至多一次备份与写入，再批量对齐注册表。
+
+    changes 为 [{"client", "server", "on"}]；同一组内同名条目以最后一条为准。
+    返回逐条结果（与输入顺序一致），单条失败不影响其它条目。
+    """
+    central = _central_state()
+    servers_all: dict[str, Any] = central.get("servers") or {}
+    disabled_names = set(central.get("disabled_names") or [])
+
+    results: list[dict[str, Any]] = []
+    groups: dict[str, list[dict[str, Any]]] = {}
+    for item in changes:
+        item = item if isinstance(item, dict) else {}
+        client = str(item.get("client") or "").strip()
+        name = str(item.get("server") or "").strip()
+        res: dict[str, Any] = {"client": client, "server": name, "on": bool(item.get("on"))}
+        results.append(res)
+        try:
+            if not client or not name:
+                raise ValueError("缺少 client/server")
+            res["client"] = TARGETS.get(client).key
+            if res["on"]:
+                if name in disabled_names:
+                    raise ValueError(f"此服务在 central 已禁用（enabled:false）：{name}。")
+                if not isinstance(servers_all.get(name), dict):
+                    raise KeyError(f"central 未收录: {name}")
+        except Exception as e:
+            res.update(ok=False, error=str(e), notes=[])
+            continue
+        groups.setdefault(res["client"], []).append(res)
+
+    with _WRITE_LOCK, ATOMIC.group_commit():
+        for client, items in groups.items():
+            adapter = TARGETS.get(client)
+            want = {r["server"]: r["on"] for r in items}
+            on_names = {n: servers_all[n] for n, on in want.items() if on}
+            rendered = RUN._apply_local_override(on_names, client=client)  # noqa: SLF001
+            rendered = RUN._fallback_to_original(rendered, on_names)  # noqa: SLF001
+            batch = {n: (rendered[n] if on else None) for n, on in want.items()}
+            try:
+                changed = adapter.toggle_many(batch)
+                notes = _sync_registry_many(adapter.registry, batch, claude_scope)
+            except Exception as e:
+                for r in items:
+                    r.update(ok=False, error=str(e), notes=[])
+                continue
+            for r in items:
+                r.update(ok=True, changed=changed, notes=notes[r["server"]])
+    return {"results": results, "failed": sum(1 for r in results if not r["ok"])}
 
 
 class _UIHandler(http.server.BaseHTTPRequestHandler):
@@ -914,6 +618,20 @@ class _UIHandler(http.server.BaseHTTPRequestHandler):
             _json_ok(self, res)
             return
 
+        if path == "/api/toggle-batch":
+            changes = data.get("changes")
+            if not isinstance(changes, list) or not changes:
+                _json_error(self, 400, "changes 必须是非空数组")
+                return
+            try:
+                claude_scope = data.get("claude_scope", None)
+                out = apply_toggle_batch(changes, claude_scope=claude_scope)
+            except Exception as e:
+                _json_error(self, 400, str(e))
+                return
+            _json_ok(self, {"ok": True, **out})
+            return
+
         if path == "/api/import":
             client = str(data.get("client") or "").strip()
             name = str(data.get("server") or "").strip()
@@ -1,17 +1,29 @@
 #!/usr/bin/env python3
-"""undo 子命令实现：从 *.backup 恢复原始配置。"""
+"""undo 子命令实现：从备份库（~/.mcp-central/backups）或 *.backup 恢复原始配置。"""
 
 from __future__ import annotations
 
 import re
 import shutil
+import time
 from pathlib import Path
 
+from .. import backups as BACKUPS
+from .. import utils as U
 
-def run(args) -> int:
-    """从 *.backup 恢复；若未提供 dest，尝试基于文件名推断原路径。"""
-    backup_path = Path(args.backup).expanduser()
-    dest = Path(args.dest).expanduser() if getattr(args, "dest", None) else None
+
+def _print_versions(target: Path | None) -> int:
+    recs = BACKUPS.versions(U.backup_root(), target)
+    if not recs:
+        print("[INFO] 暂无备份记录" + (f": {target}" if target else ""))
+        return 0
+    for r in recs:
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(float(r.get("ts") or 0)))
+        print(f"{r['sha256'][:12]}  {ts}  {int(r.get('size') or 0):>8}B  {r['path']}")
+    return 0
+
+
+def _legacy(backup_path: Path, dest: Path | None) -> int:
     if not backup_path.exists():
         print(f"[ERR] 备份文件不存在: {backup_path}")
         return 1
@@ -34,3 +46,42 @@ def run(args) -> int:
     except Exception as e:
         print(f"[ERR] 恢复失败: {e}")
         return 1
+
+
+def run(args) -> int:
+    """恢复配置。
+
+    - `mcp undo --list [file]`：列出备份库中的版本（新→旧，只读索引）；
+    - `mcp undo <file> [--version SHA]`：恢复 file 的上一版本（或指定版本）；
+    - `mcp undo <file>.backup [--dest]`：兼容旧用法，从单槽备份恢复。
+    """
+    raw = getattr(args, "backup", None)
+    target = Path(raw).expanduser() if raw else None
+    dest = Path(args.dest).expanduser() if getattr(args, "dest", None) else None
+
+    if getattr(args, "list", False):
+        return _print_versions(target)
+    if target is None:
+        print("[ERR] 请指定要恢复的文件（或使用 --list 查看备份）")
+        return 2
+
+    ref = getattr(args, "version", None)
+    root = U.backup_root()
+    if ref or (not target.name.endswith(".backup") and BACKUPS.versions(root, target)):
+        try:
+            rec = BACKUPS.resolve(root, target, ref)
+        except ValueError as e:
+            print(f"[ERR] {e}")
+            return 1
+        if rec is None:
+            print(f"[ERR] 未找到可恢复的版本: {target}" + (f" ({ref})" if ref else ""))
+            return 1
+        try:
+            out = BACKUPS.restore(root, target, rec, dest)
+        except Exception as e:
+            print(f"[ERR] 恢复失败: {e}")
+            return 1
+        print(f"[OK] 已恢复 {rec['sha256'][:12]} 到: {out}（恢复前内容已登记，可再次 undo）")
+        return 0
+
+    return _legacy(target, dest)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""server 条目的写时复制（copy-on-write）工具。
+
+约定：central 中的 server 条目（及其 args/env/headers 等嵌套对象）一经加载即视为不可原地修改，
+因而可以在 central_cache、编辑前/后状态与各客户端渲染视图之间直接共享：
+- `snapshot(data)`：复制外层对象与 servers 映射（仅复制指针），条目本身共享；
+- `derive(entry, **changes)`：返回只替换改动字段的新条目，未改动字段继续共享；
+- `edit(servers, name, **changes)`：在 servers 映射中以 derive 的结果替换该条目。
+
+`DELETE` 作为哨兵值表示删除字段。任何 `servers[name][k] = v` 式的原地修改都会污染缓存与
+编辑前状态，一律改用 derive/edit。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+DELETE: Any = object()
+
+
+def snapshot(data: dict[str, Any]) -> dict[str, Any]:
+    """可安全增删条目的浅快照：外层与 servers 映射为新对象，条目与原对象共享。"""
+    out = dict(data)
+    servers = out.get("servers")
+    if isinstance(servers, dict):
+        out["servers"] = dict(servers)
+    return out
+
+
+def derive(entry: Any, **changes: Any) -> dict[str, Any]:
+    """基于 entry 生成新条目：changes 中的字段被替换（值为 DELETE 时删除），其余字段共享。"""
+    out = dict(entry) if isinstance(entry, dict) else {}
+    for k, v in changes.items():
+        if v is DELETE:
+            out.pop(k, None)
+        else:
+            out[k] = v
+    return out
+
+
+def edit(servers: dict[str, Any], name: str, **changes: Any) -> dict[str, Any]:
+    """以写时复制方式修改 servers[name]，返回新条目（旧条目对象保持不变）。"""
+    new = derive(servers.get(name), **changes)
+    servers[name] = new
+    return new
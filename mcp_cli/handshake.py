@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""MCP 握手探测：实际启动 stdio server，完成 initialize + tools/list，记录冷启动耗时。
+
+- 每个 server 一个子进程（独立进程组，结束时整组回收，避免 npx 留下孙进程），
+  按 MCP stdio 约定逐行收发 JSON-RPC；stdout 中的非 JSON 行（日志）忽略；
+- 结果：{name, status, ready_ms, elapsed_ms, tools, server, protocol, error, stderr}
+  - status：ok / failed / timeout / skipped（非 stdio，如 url 远端）；
+  - ready_ms：启动到 initialize 响应的耗时（冷启动延迟）；elapsed_ms：到 tools/list 完成；
+  - error：失败原因（命令未找到、进程退出、JSON-RPC 错误、超时所处阶段）；stderr 为末尾若干行；
+- 多个 server 并发探测（最多 MCP_HANDSHAKE_JOBS，默认 8），单个超时 MCP_HANDSHAKE_TIMEOUT
+  （秒，默认 30），按完成顺序产出结果。
+"""
+
+from __future__ import annotations
+
+import collections
+import json
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any
+
+from . import pathindex as PATHS
+
+PROTOCOL_VERSION = "2024-11-05"
+_CLIENT_INFO = {"name": "mcp-local-manager", "version": "doctor-probe"}
+# tools/list 分页上限（防止异常 server 无限返回 nextCursor）
+_MAX_PAGES = 20
+_STDERR_LINES = 20
+_REMOTE_TYPES = {"http", "sse", "remote", "streamable-http", "streamable_http"}
+
+
+def _env_num(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, "") or default)
+    except ValueError:
+        return default
+
+
+def default_timeout() -> float:
+    return _env_num("MCP_HANDSHAKE_TIMEOUT", 30.0)
+
+
+def max_jobs() -> int:
+    return max(1, int(_env_num("MCP_HANDSHAKE_JOBS", 8)))
+
+
+def is_stdio(info: dict[str, Any]) -> bool:
+    """是否为本地 stdio server（有 command，且不是 url/远端类型）。"""
+    if info.get("url"):
+        return False
+    if str(info.get("type") or "").strip().lower() in _REMOTE_TYPES:
+        return False
+    return bool(info.get("command"))
+
+
+class _ProbeError(Exception):
+    def __init__(self, status: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class _Session:
+    """一个已启动的 server 进程：逐行读取 stdout，按 id 等待 JSON-RPC 响应。"""
+
+    def __init__(self, argv: list[str], env: dict[str, str]) -> None:
+        self.proc = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            start_new_session=os.name != "nt",
+        )
+        self.lines: queue.Queue[bytes | None] = queue.Queue()
+        self.stderr: collections.deque[str] = collections.deque(maxlen=_STDERR_LINES)
+        self._stderr_pump = threading.Thread(target=self._pump_stderr, daemon=True)
+        self._stderr_pump.start()
+        threading.Thread(target=self._pump_stdout, daemon=True).start()
+
+    def _pump_stdout(self) -> None:
+        assert self.proc.stdout is not None
+        for raw in self.proc.stdout:
+            self.lines.put(raw)
+        self.lines.put(None)
+
+    def _pump_stderr(self) -> None:
+        assert self.proc.stderr is not None
+        for raw in self.proc.stderr:
+            self.stderr.append(raw.decode("utf-8", "replace").rstrip())
+
+    def _exited(self) -> _ProbeError:
+        try:
+            rc = self.proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            rc = None
+        self._stderr_pump.join(timeout=1)  # 退出原因取 stderr 末行：等其读完
+        tail = next((s for s in reversed(self.stderr) if s.strip()), "")
+        msg = f"进程已退出（returncode={rc}）"
+        return _ProbeError("failed", f"{msg}: {tail}" if tail else msg)
+
+    def send(self, msg: dict[str, Any]) -> None:
+        assert self.proc.stdin is not None
+        try:
+            self.proc.stdin.write(json.dumps(msg).encode("utf-8") + b"\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise self._exited() from None
+
+    def request(self, req_id: int, method: str, params: dict[str, Any], deadline: float) -> Any:
+        self.send({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params})
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise _ProbeError("timeout", f"等待 {method} 响应超时")
+            try:
+                raw = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                raise _ProbeError("timeout", f"等待 {method} 响应超时") from None
+            if raw is None:
+                raise self._exited()
+            try:
+                msg = json.loads(raw)
+            except ValueError:
+                continue  # stdout 日志行
+            if not isinstance(msg, dict) or msg.get("id") != req_id:
+                continue  # 通知或 server 发起的请求
+            if "error" in msg:
+                err = msg.get("error")
+                text = err.get("message") if isinstance(err, dict) else err
+                raise _ProbeError("failed", f"{method} 返回错误: {text}")
+            result = msg.get("result")
+            return result if isinstance(result, dict) else {}
+
+    def close(self) -> None:
+        """关闭 stdin 并回收整个进程组（先 TERM，1 秒内未退净再 KILL）。
+
+        即使 server 进程已退出也向整组发信号：npx 等包装器退出后，孙进程仍留在组内。
+        """
+        try:
+            if self.proc.stdin is not None:
+                self.proc.stdin.close()
+        except OSError:
+            pass
+        if os.name == "nt":
+            if self.proc.poll() is None:
+                self.proc.kill()
+            self._reap(1.0)
+            return
+        for sig in (signal.SIGTERM, getattr(signal, "SIGKILL", signal.SIGTERM)):
+            try:
+                os.killpg(self.proc.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                break
+            if self._group_gone(1.0):
+                break
+        self._reap(1.0)
+
+    def _reap(self, timeout: float) -> None:
+        try:
+            self.proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            pass
+
+    def _group_gone(self, timeout: float) -> bool:
+        """等待进程组清空（顺带回收组长，避免其僵尸进程让组一直存在）。"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.proc.poll() is None:
+                self._reap(0.02)
+            try:
+                os.killpg(self.proc.pid, 0)
+            except (ProcessLookupError, PermissionError):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.02)
+
+
+def probe(name: str, info: dict[str, Any], *, timeout: float | None = None) -> dict[str, Any]:
+    """探测单个 server：initialize -> notifications/initialized -> tools/list。"""
+    res: dict[str, Any] = {
+        "name": name,
+        "status": "failed",
+        "ready_ms": None,
+        "elapsed_ms": None,
+        "tools": None,
+        "server": None,
+        "protocol": None,
+        "error": None,
+        "stderr": [],
+    }
+    if not is_stdio(info):
+        res.update(status="skipped", error="非 stdio server（url/远端），跳过")
+        return res
+
+    cmd = os.path.expanduser(str(info.get("command") or ""))
+    exe = cmd if os.path.isabs(cmd) else PATHS.which(cmd)
+    if not exe:
+        res["error"] = f"命令未找到: {cmd}"
+        return res
+    argv = [exe, *(os.path.expanduser(str(a)) for a in (info.get("args") or []))]
+    env = dict(os.environ)
+    env.update({str(k): str(v) for k, v in (info.get("env") or {}).items() if v is not None})
+
+    t0 = time.monotonic()
+    deadline = t0 + (default_timeout() if timeout is None else timeout)
+    try:
+        session = _Session(argv, env)
+    except OSError as e:
+        res["error"] = f"启动失败: {e}"
+        return res
+    try:
+        init = session.request(
+            1,
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": _CLIENT_INFO,
+            },
+            deadline,
+        )
+        res["ready_ms"] = round((time.monotonic() - t0) * 1000, 1)
+        res["protocol"] = init.get("protocolVersion")
+        info_obj = init.get("serverInfo")
+        if isinstance(info_obj, dict):
+            res["server"] = (
+                " ".join(str(info_obj[k]) for k in ("name", "version") if info_obj.get(k)) or None
+            )
+        session.send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+        tools = 0
+        cursor: Any = None
+        for page in range(_MAX_PAGES):
+            result = session.request(
+                2 + page, "tools/list", {"cursor": cursor} if cursor else {}, deadline
+            )
+            tools += len(result.get("tools") or [])
+            cursor = result.get("nextCursor")
+            if not cursor:
+                break
+        res.update(status="ok", tools=tools)
+    except _ProbeError as e:
+        res.update(status=e.status, error=str(e))
+    finally:
+        res["elapsed_ms"] = round((time.monotonic() - t0) * 1000, 1)
+        session.close()
+        if res["status"] != "ok":
+            res["stderr"] = list(session.stderr)
+    return res
+
+
+def probe_all(
+    servers: dict[str, dict[str, Any]],
+    *,
+    timeout: float | None = None,
+    jobs: int | None = None,
+) -> Iterator[dict[str, Any]]:
+    """并发探测一组 server，按完成顺序产出结果（非 stdio 条目直接产出 skipped）。"""
+    items = sorted(servers.items())
+    if not items:
+        return
+    n_jobs = min(max_jobs() if jobs is None else max(1, jobs), len(items))
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        futs = [pool.submit(probe, name, info or {}, timeout=timeout) for name, info in items]
+        for fut in as_completed(futs):
+            yield fut.result()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""跨进程的按文件写锁（advisory fcntl.flock）。
+
+- 锁文件统一放在 ~/.mcp-central/locks/，按目标文件的真实路径（解析符号链接，与 mcp_cli.atomic
+  实际写入的文件一致）命名，不在用户配置目录下留下杂项；
+- 所有“读-改-写”配置文件的写入方（mcp central/run/clear/onboard/localize、UI、mcp-auto-sync）
+  在读取前取锁、写入后释放，避免并发进程相互覆盖更新；
+- 读取方不取锁：写入均经 mcp_cli.atomic 原子替换，读到的总是某个完整版本（无锁快照）；
+- 同一进程内可重入（同一线程嵌套取同一文件的锁不会自锁），线程之间互斥；
+- 等待时间计入 `stats()`；设置 MCP_LOCK_DEBUG=1 时把每次等待打印到 stderr；
+- 超时（MCP_LOCK_TIMEOUT 秒，默认 30）抛出 TimeoutError；无 fcntl 的平台退化为进程内锁。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+_GUARD = threading.Lock()
+# lock 文件路径 -> [RLock, 本进程持有深度, 打开的 fd]
+_HELD: dict[str, list[Any]] = {}
+# 目标文件 -> {"count", "wait_total", "wait_max"}
+_STATS: dict[str, dict[str, float]] = {}
+
+
+def lock_dir() -> Path:
+    from . import utils as U
+
+    return U.HOME / ".mcp-central" / "locks"
+
+
+def lock_path(path: Path) -> Path:
+    # 经符号链接与直接访问同一文件须取同一把锁（atomic 写入的是链接目标）
+    key = str(Path(path).expanduser().resolve())
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return lock_dir() / f"{Path(key).name}.{digest}.lock"
+
+
+def _timeout() -> float:
+    try:
+        return float(os.environ.get("MCP_LOCK_TIMEOUT", "30"))
+    except ValueError:
+        return 30.0
+
+
+def _record(path: Path, waited: float) -> None:
+    with _GUARD:
+        st = _STATS.setdefault(str(path), {"count": 0, "wait_total": 0.0, "wait_max": 0.0})
+        st["count"] += 1
+        st["wait_total"] += waited
+        st["wait_max"] = max(st["wait_max"], waited)
+    if os.environ.get("MCP_LOCK_DEBUG") == "1":
+        print(f"[lock] {path} 等待 {waited * 1000:.1f}ms", file=sys.stderr)
+
+
+def stats() -> dict[str, dict[str, float]]:
+    """各文件的取锁次数与等待时间（秒）：{path: {count, wait_total, wait_max}}。"""
+    with _GUARD:
+        return {k: dict(v) for k, v in _STATS.items()}
+
+
+def _flock(fd: int, deadline: float, path: Path) -> None:
+    delay = 0.005
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"等待文件锁超时: {path}") from None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+
+@contextmanager
+def _lock_one(path: Path, timeout: float) -> Iterator[None]:
+    lp = lock_path(path)
+    key = str(lp)
+    with _GUARD:
+        slot = _HELD.setdefault(key, [threading.RLock(), 0, None])
+    rlock: threading.RLock = slot[0]
+    t0 = time.monotonic()
+    deadline = t0 + timeout
+    if not rlock.acquire(timeout=max(timeout, 0)):
+        raise TimeoutError(f"等待文件锁超时: {path}")
+    try:
+        if slot[1] == 0:
+            if fcntl is not None:
+                lp.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(str(lp), os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    _flock(fd, deadline, path)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                slot[2] = fd
+            _record(path, time.monotonic() - t0)
+        slot[1] += 1
+        try:
+            yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0 and slot[2] is not None:
+                fd, slot[2] = slot[2], None
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                finally:
+                    os.close(fd)
+    finally:
+        rlock.release()
+
+
+@contextmanager
+def locked(*paths: Path, timeout: float | None = None) -> Iterator[None]:
+    """对一个或多个文件取写锁（按锁文件路径排序取锁，避免交叉等待导致死锁）。"""
+    t = _timeout() if timeout is None else timeout
+    uniq = {str(lock_path(p)): Path(p) for p in paths}
+    with ExitStack() as stack:
+        for k in sorted(uniq):
+            stack.enter_context(_lock_one(uniq[k], t))
+        yield
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""PATH 可执行文件索引：一次扫描 PATH 建立 名称 -> 候选路径 索引，供 doctor/run/check 共用。
+
+- 进程内：同一 PATH 只扫描一次，之后每次查找只做字典查询 + 一次 access 检查；
+- 磁盘：~/.mcp-central/cache/path-index.json 记录索引，按 PATH 内容与各目录的
+  (inode, mtime_ns) 失效（目录内增删/改名都会改变其 mtime），新进程无需重新列目录；
+- 查找结果（含未找到）记录在 `resolved()` 中，便于体检输出“实际解析到哪里”。
+
+约定：
+- 索引只记录“目录中存在该名称”，可执行位在查找时检查（chmod +x 不改变目录 mtime）；
+- mtime 距今过近（racy）的目录不写入磁盘缓存，下次重新扫描；
+- 含相对路径的 PATH（如 "."）随 cwd 变化，不使用磁盘缓存；
+- Windows（PATHEXT 语义）直接回退 shutil.which；
+- 设置 MCP_PATH_CACHE=0 关闭磁盘缓存（进程内索引仍生效）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from . import utils as U
+
+_VERSION = 1
+# 目录 mtime 距今小于该值视为 racy（与 central_cache/state 一致）
+_RACY_NS = 2_000_000_000
+# 进程内索引复核间隔：常驻进程（UI）每隔该时间重新 stat 一次 PATH 目录
+_RECHECK_SEC = 1.0
+
+_LOCK = threading.Lock()
+# 进程内索引：{"path": PATH 字符串, "dirs": 目录签名, "index": {name: [path, ...]}, "checked": ts}
+_MEM: dict[str, Any] = {"path": None, "dirs": None, "index": None, "checked": 0.0}
+_RESOLVED: dict[str, str | None] = {}
+_STATS = {"scans": 0, "disk_hits": 0, "lookups": 0}
+
+
+def disk_enabled() -> bool:
+    return os.environ.get("MCP_PATH_CACHE", "1") != "0"
+
+
+def cache_path() -> Path:
+    return U.HOME / ".mcp-central" / "cache" / "path-index.json"
+
+
+def _path_dirs(path_env: str) -> list[str]:
+    out: list[str] = []
+    for d in path_env.split(os.pathsep):
+        d = d or os.curdir
+        if d not in out:
+            out.append(d)
+    return out
+
+
+def _dir_sigs(dirs: list[str]) -> list[list[int] | None]:
+    sigs: list[list[int] | None] = []
+    for d in dirs:
+        try:
+            st = os.stat(d)
+        except OSError:
+            sigs.append(None)
+            continue
+        sigs.append([st.st_ino, st.st_mtime_ns])
+    return sigs
+
+
+def _scan(dirs: list[str]) -> dict[str, list[str]]:
+    """列出各 PATH 目录一次：名称 -> 按 PATH 顺序的候选路径（跳过子目录）。"""
+    _STATS["scans"] += 1
+    index: dict[str, list[str]] = {}
+    for d in dirs:
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            continue
+                    except OSError:
+                        continue
+                    index.setdefault(entry.name, []).append(os.path.join(d, entry.name))
+        except OSError:
+            continue
+    return index
+
+
+def _read_disk(path_env: str, sigs: list[list[int] | None]) -> dict[str, list[str]] | None:
+    try:
+        obj = json.loads(cache_path().read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    if (
+        not isinstance(obj, dict)
+        or obj.get("version") != _VERSION
+        or obj.get("path") != path_env
+        or obj.get("dirs") != sigs
+        or not isinstance(obj.get("index"), dict)
+    ):
+        return None
+    return obj["index"]
+
+
+def _write_disk(path_env: str, sigs: list[list[int] | None], index: dict[str, list[str]]) -> None:
+    now = time.time_ns()
+    if any(s is not None and now - s[1] < _RACY_NS for s in sigs):
+        return
+    p = cache_path()
+    payload = {"version": _VERSION, "path": path_env, "dirs": sigs, "index": index}
+    try:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, p)
+    except Exception:
+        # 缓存写失败不影响主流程
+        pass
+
+
+def index() -> dict[str, list[str]]:
+    """当前 PATH 的名称索引（共享对象，调用方只读）。"""
+    path_env = os.environ.get("PATH", os.defpath)
+    with _LOCK:
+        now = time.monotonic()
+        if _MEM["path"] == path_env and _MEM["index"] is not None:
+            if now - _MEM["checked"] < _RECHECK_SEC:
+                return _MEM["index"]
+            dirs = _path_dirs(path_env)
+            sigs = _dir_sigs(dirs)
+            if sigs == _MEM["dirs"]:
+                _MEM["checked"] = now
+                return _MEM["index"]
+        else:
+            dirs = _path_dirs(path_env)
+            sigs = _dir_sigs(dirs)
+
+        use_disk = disk_enabled() and all(os.path.isabs(d) for d in dirs)
+        idx = _read_disk(path_env, sigs) if use_disk else None
+        if idx is not None:
+            _STATS["disk_hits"] += 1
+        else:
+            idx = _scan(dirs)
+            if use_disk:
+                _write_disk(path_env, sigs, idx)
+        _MEM.update(path=path_env, dirs=sigs, index=idx, checked=now)
+        return idx
+
+
+def _executable(p: str) -> bool:
+    return os.access(p, os.X_OK) and not os.path.isdir(p)
+
+
+def which(cmd: str) -> str | None:
+    """等价于 shutil.which(cmd)（POSIX）：含路径分隔符时直接检查，否则查 PATH 索引。"""
+    if not cmd:
+        return None
+    if os.name == "nt":
+        return shutil.which(cmd)
+    if os.sep in cmd or (os.altsep and os.altsep in cmd):
+        return cmd if _executable(cmd) else None
+    idx = index()
+    found = next((p for p in idx.get(cmd, ()) if _executable(p)), None)
+    with _LOCK:
+        _STATS["lookups"] += 1
+        _RESOLVED[cmd] = found
+    return found
+
+
+def command_exists(cmd: str) -> bool:
+    """command 是否可执行：绝对路径检查文件本身，其余按 PATH 查找（`~` 先展开）。"""
+    if not cmd:
+        return False
+    p = Path(cmd).expanduser()
+    if p.is_absolute():
+        return _executable(str(p))
+    return which(cmd) is not None
+
+
+def resolved() -> dict[str, str | None]:
+    """本进程按 PATH 查找过的命令及其解析结果（None 表示未找到）。"""
+    with _LOCK:
+        return dict(_RESOLVED)
+
+
+def stats() -> dict[str, int]:
+    """索引统计：{"scans": 目录扫描次数, "disk_hits": 磁盘缓存命中, "lookups": 查找次数}。"""
+    with _LOCK:
+        return dict(_STATS)
+
+
+def forget() -> None:
+    """丢弃进程内索引（测试/PATH 目录被外部修改且需立即生效时使用）。"""
+    with _LOCK:
+        _MEM.update(path=None, dirs=None, index=None, checked=0.0)
+        _RESOLVED.clear()
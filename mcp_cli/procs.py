@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""外部 CLI（claude/droid mcp ...）命令的有界并行执行器。
+
+- 任务为 (key, argv, timeout)：同一 key 的命令按给定顺序串行（如替换条目时先 remove 再 add），
+  不同 key 之间并行，最多 MCP_PROC_JOBS（默认 4）个同时运行；
+- 每条命令有自己的超时，整批另有总截止时间 MCP_PROC_DEADLINE（秒，默认 300）：
+  到期后尚未开始的命令不再执行，正在执行的命令超时被压缩到剩余时间；
+- 超时或输出显示为暂时性错误（busy/locked/temporarily unavailable 等）时按指数退避重试，
+  次数由 MCP_PROC_RETRIES（默认 1）控制；命令不存在等确定性错误不重试；
+  非幂等的 `<cli> mcp add/remove` 超时后可能已经生效，只在输出显示暂时性错误时重试；
+- 结果为与任务同序的 dict 列表：
+  {key, cmd, ok, returncode, stdout, stderr, attempts, elapsed, error}。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+_TRANSIENT = re.compile(
+    r"timed? ?out|temporar|try again|resource busy|\bbusy\b|locked|EAGAIN|EBUSY|ECONNRESET",
+    re.IGNORECASE,
+)
+
+
+_MUTATING = {"add", "add-json", "remove"}
+
+
+def _mutating(cmd: list[str]) -> bool:
+    """`<cli> mcp add/remove ...`：非幂等，超时不代表未生效（重试会报 already exists 等）。"""
+    for i, c in enumerate(cmd[:-1]):
+        if c == "mcp":
+            return cmd[i + 1] in _MUTATING
+    return False
+
+
+def _env_num(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, "") or default)
+    except ValueError:
+        return default
+
+
+def max_jobs() -> int:
+    return max(1, int(_env_num("MCP_PROC_JOBS", 4)))
+
+
+def deadline_sec() -> float:
+    return _env_num("MCP_PROC_DEADLINE", 300.0)
+
+
+def max_retries() -> int:
+    return max(0, int(_env_num("MCP_PROC_RETRIES", 1)))
+
+
+def _exec(
+    key: str, cmd: list[str], timeout: float, retries: int, deadline_at: float, verbose: bool
+) -> dict[str, Any]:
+    res: dict[str, Any] = {
+        "key": key,
+        "cmd": list(cmd),
+        "ok": False,
+        "returncode": None,
+        "stdout": "",
+        "stderr": "",
+        "attempts": 0,
+        "elapsed": 0.0,
+        "error": None,
+    }
+    t0 = time.monotonic()
+    for attempt in range(retries + 1):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            res["error"] = res["error"] or "deadline"
+            break
+        res["attempts"] += 1
+        if verbose:
+            print("[VERBOSE]", " ".join(str(c) for c in cmd))
+        transient = False
+        try:
+            r = subprocess.run(
+                cmd, check=False, capture_output=True, text=True, timeout=min(timeout, remaining)
+            )
+        except subprocess.TimeoutExpired:
+            res["error"] = "timeout"
+            transient = not _mutating(cmd)
+        except Exception as e:
+            # 命令不存在/无权限等：重试无意义
+            res["error"] = str(e) or type(e).__name__
+        else:
+            res["returncode"] = r.returncode
+            res["stdout"] = getattr(r, "stdout", "") or ""
+            res["stderr"] = getattr(r, "stderr", "") or ""
+            if r.returncode == 0:
+                res["ok"] = True
+                res["error"] = None
+                break
+            res["error"] = f"exit {r.returncode}"
+            transient = bool(_TRANSIENT.search(res["stderr"] + "\n" + res["stdout"]))
+        if not transient or attempt >= retries:
+            break
+        time.sleep(min(0.2 * (2**attempt), max(0.0, deadline_at - time.monotonic())))
+    res["elapsed"] = time.monotonic() - t0
+    return res
+
+
+def run_all(
+    tasks: Iterable[tuple[str, list[str], float]],
+    *,
+    jobs: int | None = None,
+    deadline: float | None = None,
+    retries: int | None = None,
+    verbose: bool = False,
+) -> list[dict[str, Any]]:
+    """执行一批 (key, argv, timeout) 任务，返回与任务同序的结果列表。"""
+    items = list(tasks)
+    if not items:
+        return []
+    deadline_at = time.monotonic() + (deadline_sec() if deadline is None else deadline)
+    n_retries = max_retries() if retries is None else retries
+
+    groups: dict[str, list[int]] = {}
+    for i, (key, _cmd, _t) in enumerate(items):
+        groups.setdefault(key, []).append(i)
+    results: list[dict[str, Any] | None] = [None] * len(items)
+
+    def _run_group(idxs: list[int]) -> None:
+        for i in idxs:
+            key, cmd, t = items[i]
+            results[i] = _exec(key, cmd, float(t), n_retries, deadline_at, verbose)
+
+    n_jobs = min(max_jobs() if jobs is None else max(1, jobs), len(groups))
+    if n_jobs <= 1:
+        for idxs in groups.values():
+            _run_group(idxs)
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            for fut in [pool.submit(_run_group, idxs) for idxs in groups.values()]:
+                fut.result()
+    return [r for r in results if r is not None]
+
+
+def run_one(cmd: list[str], timeout: float, *, retries: int | None = None) -> dict[str, Any]:
+    """执行单条命令（同样享有超时、重试与结构化结果）。"""
+    return run_all([("", cmd, timeout)], jobs=1, retries=retries)[0]
+
+
+def failure_text(res: dict[str, Any]) -> str:
+    """失败结果的简短说明（优先 stderr）。"""
+    return (res.get("stderr") or res.get("stdout") or res.get("error") or "").strip()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""ServerSpec：central server 条目的紧凑类型化表示。
+
+- 每个条目只从 central 解析一次（`load_specs()` 按 servers 对象身份记忆化，配合
+  central_cache 的共享数据：文件不变即不重新解析）；
+- 构造时预计算规范内容哈希 `digest`（去除 enabled/source 等元数据后的规范 JSON），
+  “内容是否相同/是否有变化”只需比较哈希，无需反复遍历 dict；
+- `render(client)` 按客户端渲染目标端条目（等价于 utils.to_target_server_info），
+  结果与其哈希 `render_hash(client)` 记忆化。
+
+渲染缓存为模块级共享（`render(info, client)`），键为 (内容哈希, 客户端)：run/ui/auto-sync
+与各目标端适配器共用，多客户端同步时每个 (server, client) 只渲染一次，UI 开关只渲染被
+切换的那一个条目；内容不变即命中（与 dict 副本、enabled/source 变化无关），无需失效。
+
+条目遵循写时复制约定（见 mcp_cli.cow），ServerSpec 不复制也不修改原始 dict。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Callable
+from typing import Any
+
+from . import utils as U
+
+# 不影响目标端落地内容的元数据字段
+META_FIELDS = frozenset({"enabled", "source"})
+
+
+def canonical_json(obj: Any) -> str:
+    """规范 JSON：键排序、紧凑分隔符；相同内容得到相同文本（与键顺序无关）。"""
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def canonical_hash(obj: Any) -> str:
+    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()
+
+
+class ServerSpec:
+    __slots__ = (
+        "name",
+        "enabled",
+        "command",
+        "args",
+        "env",
+        "url",
+        "type",
+        "timeout",
+        "source",
+        "info",
+        "digest",
+    )
+
+    def __init__(self, name: str, info: dict[str, Any]) -> None:
+        self.name = name
+        self.info = info
+        self.enabled = bool(info.get("enabled", True))
+        self.command = str(info.get("command") or "")
+        args = info.get("args")
+        self.args: tuple[str, ...] = tuple(str(a) for a in args) if isinstance(args, list) else ()
+        env = info.get("env")
+        self.env: dict[str, Any] = env if isinstance(env, dict) else {}
+        self.url: str | None = info.get("url") or None
+        self.type: str | None = info.get("type") or None
+        self.timeout: int | None = info.get("timeout")
+        self.source: str | None = info.get("source")
+        self.digest = canonical_hash({k: v for k, v in info.items() if k not in META_FIELDS})
+        _remember(info, self.digest)
+
+    @classmethod
+    def from_central(cls, name: str, info: Any) -> ServerSpec:
+        return cls(str(name), info if isinstance(info, dict) else {})
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ServerSpec):
+            return NotImplemented
+        return self.name == other.name and self.digest == other.digest
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.digest))
+
+    def __repr__(self) -> str:
+        return f"ServerSpec({self.name!r}, digest={self.digest[:12]})"
+
+    def render(self, client: str | None = None) -> dict[str, Any]:
+        """目标端条目（只读，多个调用方共享同一对象）。"""
+        return render_entry(self.info, client, digest=self.digest)[0]
+
+    def render_hash(self, client: str | None = None) -> str:
+        return render_entry(self.info, client, digest=self.digest)[1]
+
+    def matches(self, target_entry: Any, client: str | None = None) -> bool:
+        """目标端现有条目与本条目渲染结果是否一致（按规范哈希比较）。"""
+        return canonical_hash(target_entry) == self.render_hash(client)
+
+
+# (内容哈希, 客户端, 渲染函数) -> (目标端条目, 条目哈希)
+_RENDERED: dict[tuple[str, str | None, Any], tuple[dict[str, Any], str]] = {}
+# dict 身份 -> (dict, 内容哈希)：仅登记 central 条目与渲染结果（均按写时复制约定只读），
+# 持有引用以保证 id 不被复用
+_KNOWN: dict[int, tuple[dict[str, Any], str]] = {}
+_CACHE_MAX = 4096
+_STATS = {"hits": 0, "misses": 0}
+
+
+def _remember(obj: dict[str, Any], digest: str) -> None:
+    if len(_KNOWN) >= _CACHE_MAX:
+        _KNOWN.clear()
+    _KNOWN[id(obj)] = (obj, digest)
+
+
+def content_digest(info: dict[str, Any]) -> str:
+    """条目的内容哈希（不含元数据字段）；已登记的对象按身份直接返回。"""
+    hit = _KNOWN.get(id(info))
+    if hit is not None and hit[0] is info:
+        return hit[1]
+    return canonical_hash({k: v for k, v in info.items() if k not in META_FIELDS})
+
+
+def render_entry(
+    info: Any,
+    client: str | None = None,
+    build: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+    *,
+    digest: str | None = None,
+) -> tuple[dict[str, Any], str]:
+    """按 (内容哈希, 客户端) 记忆化渲染，返回 (目标端条目, 条目哈希)。
+
+    build 为目标端自定义的渲染函数（默认 utils.to_target_server_info），参与缓存键。
+    返回的条目为共享只读对象；再次把它作为输入渲染时按身份取哈希，不重新序列化。
+    """
+    if not isinstance(info, dict):
+        info = {}
+    key = (digest or content_digest(info), client, build)
+    hit = _RENDERED.get(key)
+    if hit is not None:
+        _STATS["hits"] += 1
+        return hit
+    _STATS["misses"] += 1
+    out = U.to_target_server_info(info, client=client) if build is None else build(info)
+    hit = (out, canonical_hash(out))
+    if len(_RENDERED) >= _CACHE_MAX:
+        _RENDERED.clear()
+    _RENDERED[key] = hit
+    _remember(out, hit[1])
+    return hit
+
+
+def render(
+    info: Any,
+    client: str | None = None,
+    build: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+) -> dict[str, Any]:
+    """目标端条目（只读，多个调用方共享同一对象）。"""
+    return render_entry(info, client, build)[0]
+
+
+def render_stats() -> dict[str, int]:
+    """渲染缓存命中统计（诊断/测试用）。"""
+    return dict(_STATS, size=len(_RENDERED))
+
+
+_MEMO: tuple[Any, dict[str, ServerSpec]] | None = None
+
+
+def load_specs(servers: dict[str, Any] | None = None) -> dict[str, ServerSpec]:
+    """解析 servers（默认读取 central）为 {name: ServerSpec}。
+
+    同一 servers 对象（central_cache 共享的只读数据）只解析一次；
+    返回的 dict 为共享对象，调用方只读。
+    """
+    global _MEMO
+    if servers is None:
+        _, servers = U.load_central_servers()
+    if _MEMO is not None and _MEMO[0] is servers:
+        return _MEMO[1]
+    specs = {str(n): ServerSpec.from_central(n, info) for n, info in (servers or {}).items()}
+    _MEMO = (servers, specs)
+    return specs
+
+
+def split_enabled(specs: dict[str, ServerSpec]) -> tuple[list[str], list[str]]:
+    """返回 (enabled 名称, disabled 名称)，均已排序。"""
+    on = sorted(n for n, s in specs.items() if s.enabled)
+    off = sorted(n for n, s in specs.items() if not s.enabled)
+    return on, off
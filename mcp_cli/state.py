@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""目标端观测状态（~/.mcp-central/state.json）：按文件指纹跨进程复用上次的读取结果。
+
+每个观测项（status/doctor/UI 的视图，如 cursor、claude-reg@local:<cwd>）记录：
+- files：依赖文件的指纹 [inode, size, mtime_ns, sha256]（文件缺失记为 null）；
+- value：上次读取得到的结果（JSON 形态，如已配置 server 名称列表）。
+
+再次观测时先 stat 依赖文件：指纹全部一致即直接返回 value，不读取/解析文件；
+mtime 距今过近（racy，同一时间粒度内可能被再次改写而 stat 不变）时再比对内容哈希。
+无变化的重复运行只需若干次 stat 与一次 state.json 读取。
+
+约定：
+- 缓存失效完全由指纹决定（本工具与外部程序的写入都会改变 inode/mtime），无需手动失效；
+- 多进程并发写 state.json 时后写者覆盖，代价仅是下次重新读取；写失败不影响主流程；
+- 设置 MCP_STATE_CACHE=0 可完全关闭（排障用）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+from . import utils as U
+
+_VERSION = 1
+# mtime 距今小于该值视为 racy：命中时需比对内容哈希（与 central_cache 一致）
+_RACY_NS = 2_000_000_000
+
+_LOCK = threading.Lock()
+# 进程内副本：(state.json 的 stat, 内容)
+_MEM: dict[str, Any] = {"sig": None, "path": None, "data": None}
+_STATS = {"hits": 0, "misses": 0}
+
+
+def enabled() -> bool:
+    return os.environ.get("MCP_STATE_CACHE", "1") != "0"
+
+
+def state_path() -> Path:
+    return U.HOME / ".mcp-central" / "state.json"
+
+
+def _stat_sig(p: Path) -> tuple[int, int, int] | None:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _load() -> dict[str, Any]:
+    """state.json 内容（按其 stat 记忆化）；调用方须持有 _LOCK。"""
+    p = state_path()
+    sig = _stat_sig(p)
+    if _MEM["path"] == str(p) and _MEM["sig"] == sig and _MEM["data"] is not None:
+        return _MEM["data"]
+    data: Any = None
+    if sig is not None:
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            data = None
+    if not isinstance(data, dict) or data.get("version") != _VERSION:
+        data = {"version": _VERSION, "views": {}}
+    if not isinstance(data.get("views"), dict):
+        data["views"] = {}
+    _MEM.update(sig=sig, path=str(p), data=data)
+    return data
+
+
+def _save(data: dict[str, Any]) -> None:
+    """原子写入 state.json；调用方须持有 _LOCK。"""
+    p = state_path()
+    try:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, p)
+        _MEM.update(sig=_stat_sig(p), path=str(p), data=data)
+    except Exception:
+        # 状态写失败不影响主流程
+        pass
+
+
+def _sha256(p: Path) -> str | None:
+    try:
+        return hashlib.sha256(p.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _unchanged(files: list[Path], recorded: Any) -> bool:
+    if not isinstance(recorded, dict) or set(recorded) != {str(p) for p in files}:
+        return False
+    now = time.time_ns()
+    for p in files:
+        fp = recorded[str(p)]
+        sig = _stat_sig(p)
+        if sig is None or fp is None:
+            if sig is not None or fp is not None:
+                return False
+            continue
+        if not isinstance(fp, list) or len(fp) != 4 or tuple(fp[:3]) != sig:
+            return False
+        if now - sig[2] < _RACY_NS and _sha256(p) != fp[3]:
+            return False
+    return True
+
+
+def observe(
+    key: str, files: Iterable[Path], compute: Callable[[], Any], *, salt: Any = None
+) -> Any:
+    """观测项 key 的结果：依赖文件指纹未变时返回上次记录的值，否则调用 compute() 并记录。
+
+    compute 的返回值须可 JSON 序列化（命中时返回的是 JSON 还原后的值）。
+    salt 为文件指纹之外的其它依赖（可 JSON 序列化，如可执行位检查结果），变化即重新计算。
+    """
+    files = list(files)
+    if not enabled():
+        return compute()
+    salt = json.loads(json.dumps(salt))
+    with _LOCK:
+        prev = _load()["views"].get(key)
+    if (
+        isinstance(prev, dict)
+        and "value" in prev
+        and prev.get("salt") == salt
+        and _unchanged(files, prev.get("files"))
+    ):
+        with _LOCK:
+            _STATS["hits"] += 1
+        return prev["value"]
+
+    with _LOCK:
+        _STATS["misses"] += 1
+    # 先取指纹再读取：读取期间文件若被改写，下次 stat 不一致会重新读取（宁可多读，不用旧值）
+    sigs = {str(p): _stat_sig(p) for p in files}
+    hashes = {str(p): _sha256(p) if sigs[str(p)] is not None else None for p in files}
+    value = compute()
+    recorded = {
+        k: (None if sig is None or hashes[k] is None else [*sig, hashes[k]])
+        for k, sig in sigs.items()
+    }
+    with _LOCK:
+        data = _load()
+        data["views"][key] = {
+            "files": recorded,
+            "salt": salt,
+            "value": value,
+            "at": int(time.time()),
+        }
+        _save(data)
+    return value
+
+
+def stats() -> dict[str, int]:
+    """观测命中/重新读取次数：{"hits", "misses"}。"""
+    with _LOCK:
+        return dict(_STATS)
@@ -0,0 +1,770 @@
+#!/usr/bin/env python3
+"""目标端适配器注册表（每个客户端一个 TargetAdapter）与目标文件快照缓存。
+
+- 客户端知识（配置文件路径、顶层键、渲染方式、附带字段如 Gemini 的 mcp.allowed）
+  只在这里描述一次；status/doctor/check/run/ui 均按注册表遍历，新增客户端只需新增一个适配器；
+- 每个适配器提供 read（names/entry）、render（central 条目 → 目标端条目）、
+  write（toggle/apply，读-改-写全程持有 mcp_cli.locks 写锁）与 diff；
+- 目标文件经快照缓存读取：按 (inode, size, mtime_ns) 校验，同一命令内每个文件至多解析一次
+  （mtime 过近时比对内容字节，思路同 central_cache）；UI 等常驻进程中文件未变即零成本复用；
+- 快照返回的解析结果为共享对象，调用方只读；写入前先复制（见 mcp_cli.cow 的写时复制约定）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from . import atomic as ATOMIC
+from . import locks as LOCKS
+from . import spec as SPEC
+from . import state as STATE
+from . import toml_spans as TOML
+from . import utils as U
+
+# mtime 距今小于该值视为 racy：命中缓存时需比对内容字节
+_RACY_NS = 2_000_000_000
+
+_GUARD = threading.Lock()
+# path -> {"key": (ino, size, mtime_ns), "raw": bytes, "parsed": {kind: value}}
+_SNAP: dict[str, dict[str, Any]] = {}
+_STATS = {"hits": 0, "parses": 0}
+
+
+def _parse(raw: bytes, kind: str, path: Path, context: str) -> Any:
+    if kind == "json":
+        return U._parse_json(raw.decode("utf-8", errors="replace"), path, None, context)
+    if kind == "toml":
+        import tomllib
+
+        try:
+            return tomllib.loads(raw.decode("utf-8"))
+        except Exception:
+            return None
+    return raw.decode("utf-8")
+
+
+def _count(name: str) -> None:
+    # probe_views 线程池与多线程 UI 会并发读取快照：计数须在锁内更新
+    with _GUARD:
+        _STATS[name] += 1
+
+
+def snapshot(path: Path, kind: str = "json", context: str = "") -> Any:
+    """读取并解析 path（kind: json/toml/text），文件缺失或解析失败返回 None。
+
+    同一文件内容只解析一次；返回值为共享对象，调用方不得原地修改。
+    """
+    key_s = str(path)
+    try:
+        st = path.stat()
+    except OSError:
+        with _GUARD:
+            _SNAP.pop(key_s, None)
+        return None
+    key = (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    with _GUARD:
+        cached = _SNAP.get(key_s)
+    if cached is not None and cached["key"] == key:
+        racy = time.time_ns() - key[2] < _RACY_NS
+        if not racy and kind in cached["parsed"]:
+            _count("hits")
+            return cached["parsed"][kind]
+    try:
+        raw = path.read_bytes()
+    except OSError:
+        return None
+    if cached is None or cached["key"] != key or cached["raw"] != raw:
+        cached = {"key": key, "raw": raw, "parsed": {}}
+    if kind in cached["parsed"]:
+        _count("hits")
+        return cached["parsed"][kind]
+
+    value = _parse(raw, kind, path, context)
+    _count("parses")
+    cached["parsed"][kind] = value
+    with _GUARD:
+        _SNAP[key_s] = cached
+    return value
+
+
+def forget(path: Path | None = None) -> None:
+    """丢弃 path（默认全部）的快照。写入均会改变 inode/mtime，通常无需手动调用。"""
+    with _GUARD:
+        if path is None:
+            _SNAP.clear()
+        else:
+            _SNAP.pop(str(path), None)
+
+
+def stats() -> dict[str, int]:
+    """快照命中/解析次数：{"hits", "parses"}。"""
+    with _GUARD:
+        return dict(_STATS)
+
+
+def _json_obj(path: Path, context: str = "") -> dict[str, Any]:
+    obj = snapshot(path, "json", context or f"读取 {path.name}")
+    return obj if isinstance(obj, dict) else {}
+
+
+class TargetAdapter:
+    """JSON map 形态的目标端：`{<top_key>: {name: entry}}`，保留文件内其它字段。"""
+
+    # 另有 CLI 注册表需要对齐时为该 CLI 名（claude/droid），文件端写入后由调用方同步
+    registry: str | None = None
+
+    def __init__(
+        self,
+        key: str,
+        label: str,
+        path_fn: Callable[[], Path],
+        *,
+        top_key: str = "mcpServers",
+        render_client: str | None = None,
+    ) -> None:
+        self.key = key
+        self.label = label
+        self.top_key = top_key
+        self.render_client = render_client or key
+        self._path_fn = path_fn
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.key!r})"
+
+    # ---- 路径 ----
+    def path(self) -> Path:
+        return self._path_fn()
+
+    def files(self) -> list[Path]:
+        """读-改-写时需要加锁的文件。"""
+        return [self.path()]
+
+    def views(self) -> list[tuple[str, str, Callable[[], set[str]]]]:
+        """status/doctor 展示的视图：(视图 key, 标签, 读取已配置名称)。"""
+        return [(self.key, self.label, self.names)]
+
+    def view_source(self, key: str) -> tuple[str, list[Path]] | None:
+        """视图 key 的观测键与依赖文件（见 mcp_cli.state）；None 表示结果不只取决于文件。"""
+        return key, [self.path()]
+
+    # ---- 读取 ----
+    def read(self, path: Path | None = None) -> dict[str, Any]:
+        """整个配置文档（共享只读；文件缺失/非法时为 {}）。"""
+        p = path or self.path()
+        return _json_obj(p, f"{self.label}配置读取")
+
+    def servers(self, path: Path | None = None) -> dict[str, Any]:
+        mp = self.read(path).get(self.top_key)
+        return mp if isinstance(mp, dict) else {}
+
+    def names(self) -> set[str]:
+        obj = self.read()
+        for k in (self.top_key, "servers"):
+            if isinstance(obj.get(k), dict):
+                return set(obj[k].keys())
+        return set()
+
+    def entry(self, name: str) -> dict[str, Any] | None:
+        v = self.servers().get(name)
+        return v if isinstance(v, dict) else None
+
+    # ---- 渲染与差异 ----
+    def render(self, info: dict[str, Any]) -> dict[str, Any]:
+        """central 条目 → 目标端条目（经共享渲染缓存，结果只读）。"""
+        return SPEC.render(info, self.render_client)
+
+    def diff(self, subset: dict[str, Any]) -> dict[str, list[str]]:
+        """目标端现状与“按 subset 全量下发”的差异：{"add", "remove", "change"}。"""
+        have = self._current_entries()
+        return {
+            "add": sorted(set(subset) - set(have)),
+            "remove": sorted(set(have) - set(subset)),
+            "change": sorted(self.drift(subset, have)),
+        }
+
+    # ---- 内容漂移 ----
+    def _current_entries(self) -> dict[str, Any]:
+        return self.servers()
+
+    def _current_form(self, entry: Any) -> Any:
+        """目标端现有条目的可比较形态。"""
+        return entry
+
+    def _expected_form(self, info: dict[str, Any]) -> dict[str, Any]:
+        """central 条目按本端渲染后的可比较形态。"""
+        return self.render(info)
+
+    def drift(
+        self, subset: dict[str, Any], have: dict[str, Any] | None = None
+    ) -> dict[str, list[str]]:
+        """两边都存在的条目中内容不一致的：{name: [不一致的字段]}。
+
+        逐条比较规范哈希（期望侧的渲染与哈希经共享缓存），仅对不一致的条目逐字段比较，
+        整体与条目数成线性。
+        """
+        have = self._current_entries() if have is None else have
+        out: dict[str, list[str]] = {}
+        for n in sorted(set(subset) & set(have)):
+            want = self._expected_form(subset[n])
+            got = self._current_form(have[n])
+            if SPEC.canonical_hash(got) == SPEC.content_digest(want):
+                continue
+            if not isinstance(got, dict):
+                out[n] = ["(非对象)"]
+                continue
+            out[n] = sorted(
+                k
+                for k in set(want) | set(got)
+                if SPEC.canonical_json(want.get(k)) != SPEC.canonical_json(got.get(k))
+            )
+        return out
+
+    # ---- 写入 ----
+    def _with_servers(self, obj: dict[str, Any], mp: dict[str, Any]) -> dict[str, Any]:
+        """返回以 mp 作为 server 表的新文档（obj 为共享快照，不得原地修改）。"""
+        return {**obj, self.top_key: mp}
+
+    def _write(self, path: Path, obj: dict[str, Any]) -> None:
+        U.backup(path)
+        U.save_json(path, obj)
+
+    def toggle(self, name: str, info: dict[str, Any] | None) -> bool:
+        """写入（info 非 None）或移除单个 server；内容未变时不落盘。返回是否改动文件。
+
+        移除时文件不存在则不创建。
+        """
+        return self.toggle_many({name: info})
+
+    def toggle_many(self, changes: dict[str, dict[str, Any] | None]) -> bool:
+        """批量写入/移除（{name: info 或 None}）：一次读取、至多一次备份与写入。
+
+        全部为移除且文件不存在时不创建；返回是否改动文件。
+        """
+        p = self.path()
+        with LOCKS.locked(p):
+            if all(info is None for info in changes.values()) and not p.exists():
+                return False
+            obj = self.read(p)
+            mp = dict(self.servers(p))
+            for name, info in changes.items():
+                if info is None:
+                    mp.pop(name, None)
+                    continue
+                entry = self.render(info)
+                if not (name in mp and SPEC.canonical_hash(mp[name]) == SPEC.canonical_hash(entry)):
+                    mp[name] = entry
+            new = self._with_servers(obj, mp)
+            if _same(new, obj):
+                return False
+            self._write(p, new)
+            return True
+
+    def apply(self, subset: dict[str, Any], path: Path | None = None) -> bool:
+        """以 subset 全量覆盖 server 表（保留文件内其它字段）。
+
+        新文档与现有内容规范等价时不备份、不写入（mtime 不变，编辑器不会因此热重载）；
+        返回是否改动文件。
+        """
+        p = path or self.path()
+        with LOCKS.locked(p):
+            obj = self.read(p)
+            mp = {name: self.render(info or {}) for name, info in (subset or {}).items()}
+            new = self._with_servers(obj, mp)
+            if p.exists() and _same(new, obj):
+                return False
+            self._write(p, new)
+            return True
+
+
+class GeminiAdapter(TargetAdapter):
+    """Gemini：另需维护 `mcp.allowed`（与 server 表保持一致）。"""
+
+    def _with_servers(self, obj: dict[str, Any], mp: dict[str, Any]) -> dict[str, Any]:
+        mcp = obj.get("mcp")
+        mcp = dict(mcp) if isinstance(mcp, dict) else {}
+        mcp["allowed"] = sorted(mp.keys())
+        return {**obj, self.top_key: mp, "mcp": mcp}
+
+
+class DroidAdapter(TargetAdapter):
+    """Droid：条目固定为 stdio，仅保留 command/args/env/timeout。"""
+
+    registry = "droid"
+
+    def render(self, info: dict[str, Any]) -> dict[str, Any]:
+        return SPEC.render(info, self.render_client, _droid_entry)
+
+
+def _droid_entry(info: dict[str, Any]) -> dict[str, Any]:
+    out: dict[str, Any] = {"type": "stdio"}
+    if "command" in info:
+        out["command"] = info["command"]
+    if "args" in info:
+        out["args"] = info["args"]
+    if info.get("env"):
+        out["env"] = info["env"]
+    if info.get("timeout") is not None:
+        out["timeout"] = info["timeout"]
+    return out
+
+
+class ClaudeAdapter(TargetAdapter):
+    """Claude：文件端 settings.json + 注册表（`claude mcp`）+ 按目录覆盖（~/.claude.json）。"""
+
+    registry = "claude"
+
+    def legacy_path(self) -> Path:
+        return U.HOME / ".claude.json"
+
+    def views(self) -> list[tuple[str, str, Callable[[], set[str]]]]:
+        return [
+            ("claude-file", "Claude(file)", self.names),
+            ("claude-reg", "Claude(register)", self.registered),
+        ]
+
+    def view_source(self, key: str) -> tuple[str, list[Path]] | None:
+        if key != "claude-reg":
+            return key, [self.path()]
+        scope = U.claude_registry_scope()
+        if scope == "user":
+            return key, [self.path(), self.legacy_path()]
+        if U.claude_registry_backend() != "file":
+            return None  # 经 `claude mcp list`（已有 TTL 缓存）
+        return f"{key}@{scope}:{Path.cwd()}", [self.registry_file(scope)]
+
+    def registered(self) -> set[str]:
+        """注册表中的 server 名称。
+
+        user scope 直接读配置文件（经快照，兼容旧版 ~/.claude.json）；
+        local/project scope 读其落盘文件，仅在无法直接读取时调 `claude mcp list`。
+        """
+        scope = U.claude_registry_scope()
+        if scope != "user":
+            if self.native_registry(scope):
+                return set(self.registry_entries(scope).keys())
+            return U._claude_registered()
+        mp = self.servers()
+        if mp:
+            return set(mp.keys())
+        legacy = _json_obj(self.legacy_path(), "Claude user 配置读取（.claude.json）")
+        old = legacy.get("mcpServers")
+        return set(old.keys()) if isinstance(old, dict) else set()
+
+    def registry_entries(self, scope: str, cwd: Path | None = None) -> dict[str, Any]:
+        """`claude mcp add -s <scope>` 实际落盘的条目（经快照，不调用 `claude mcp list`）。
+
+        user → ~/.claude.json 顶层 mcpServers；local → ~/.claude.json projects[<cwd>].mcpServers；
+        project → <cwd>/.mcp.json 的 mcpServers。
+        """
+        cwd = cwd or Path.cwd()
+        if scope == "project":
+            mp = _json_obj(cwd / ".mcp.json").get("mcpServers")
+        elif scope == "local":
+            projects = _json_obj(self.legacy_path()).get("projects")
+            conf = projects.get(str(cwd)) if isinstance(projects, dict) else None
+            mp = conf.get("mcpServers") if isinstance(conf, dict) else None
+        else:
+            mp = _json_obj(self.legacy_path()).get("mcpServers")
+        return mp if isinstance(mp, dict) else {}
+
+    # ---- local/project scope 原生读写（`claude` CLI 仅作回退）----
+    def registry_file(self, scope: str, cwd: Path | None = None) -> Path:
+        return (cwd or Path.cwd()) / ".mcp.json" if scope == "project" else self.legacy_path()
+
+    def native_registry(self, scope: str, cwd: Path | None = None) -> bool:
+        """local/project scope 是否直接读写文件。
+
+        user scope、MCP_CLAUDE_BACKEND=cli 或目标文件存在但不是合法 JSON 时
+        返回 False（交给 `claude mcp` 处理）。
+        """
+        if scope not in ("local", "project") or U.claude_registry_backend() != "file":
+            return False
+        p = self.registry_file(scope, cwd)
+        return not p.exists() or isinstance(snapshot(p), dict)
+
+    @staticmethod
+    def registry_entry(info: dict[str, Any]) -> dict[str, Any]:
+        """与 `claude mcp add --transport stdio` 落盘一致的条目形态。"""
+        info = info or {}
+        return {
+            "type": "stdio",
+            "command": os.path.expanduser(str(info.get("command", ""))),
+            "args": [os.path.expanduser(str(a)) for a in (info.get("args") or [])],
+            "env": {str(k): str(v) for k, v in (info.get("env") or {}).items() if v is not None},
+        }
+
+    def write_registry(
+        self,
+        scope: str,
+        put: dict[str, dict[str, Any]],
+        drop: Iterable[str] = (),
+        cwd: Path | None = None,
+    ) -> bool:
+        """直接改写 local/project scope 的注册条目（等价于逐条 `claude mcp add/remove`）。
+
+        put 为已渲染条目（见 registry_entry）；local 写 ~/.claude.json projects[<cwd>].mcpServers，
+        project 写 <cwd>/.mcp.json。其它字段原样保留；内容未变时不落盘。返回是否改动文件。
+        """
+        cwd = cwd or Path.cwd()
+        p = self.registry_file(scope, cwd)
+        with LOCKS.locked(p):
+            obj = _json_obj(p)
+            if scope == "local":
+                projects = obj.get("projects")
+                projects = projects if isinstance(projects, dict) else {}
+                conf = projects.get(str(cwd))
+                conf = conf if isinstance(conf, dict) else {}
+            else:
+                conf = obj
+            mp = conf.get("mcpServers")
+            mp = dict(mp) if isinstance(mp, dict) else {}
+            for name in drop:
+                mp.pop(name, None)
+            mp.update(put)
+            if scope == "local":
+                new = {**obj, "projects": {**projects, str(cwd): {**conf, "mcpServers": mp}}}
+            else:
+                new = {**obj, "mcpServers": mp}
+            if p.exists() and _same(new, obj):
+                return False
+            if not p.exists() and not mp:
+                return False
+            self._write(p, new)
+            U.invalidate_claude_registry()
+            return True
+
+    def project_overrides(self) -> tuple[dict[str, list[str]], Path]:
+        """~/.claude.json projects.*.mcpServers（Claude local scope / 按目录配置）。
+
+        ~/.claude.json 常达数 MB：经 state.json 指纹缓存，文件未变时不解析。
+        """
+        p = self.legacy_path()
+
+        def _scan() -> dict[str, list[str]]:
+            projects = _json_obj(p).get("projects")
+            if not isinstance(projects, dict):
+                return {}
+            out: dict[str, list[str]] = {}
+            for name, conf in projects.items():
+                if not isinstance(conf, dict):
+                    continue
+                mcp_servers = conf.get("mcpServers")
+                if isinstance(mcp_servers, dict) and mcp_servers:
+                    out[str(name)] = sorted(str(k) for k in mcp_servers.keys())
+            return out
+
+        return STATE.observe("claude-projects", [p], _scan), p
+
+
+class CodexAdapter(TargetAdapter):
+    """Codex：~/.codex/config.toml 的 [mcp_servers.<name>] 表（文本级读写，保留其它内容）。"""
+
+    HEADER = "# === MCP Servers 配置（由 MCP Local Manager 生成）==="
+
+    def read(self, path: Path | None = None) -> dict[str, Any]:
+        conf = snapshot(path or self.path(), "toml")
+        return conf if isinstance(conf, dict) else {}
+
+    def servers(self, path: Path | None = None) -> dict[str, Any]:
+        mp = self.read(path).get("mcp_servers")
+        return mp if isinstance(mp, dict) else {}
+
+    def names(self) -> set[str]:
+        p = self.path()
+        if snapshot(p, "toml") is not None:
+            return {k for k in self.servers(p) if not k.endswith(".env")}
+        # TOML 非法时退回按表头扫描
+        text = snapshot(p, "text")
+        return TOML.server_names(text) if text is not None else set()
+
+    def entry(self, name: str) -> dict[str, Any] | None:
+        """将 Codex 表还原为 central 形态（command/args/env/timeout）。"""
+        raw = self.servers().get(name)
+        if not isinstance(raw, dict):
+            return None
+        out: dict[str, Any] = {}
+        if raw.get("command"):
+            out["command"] = raw["command"]
+        if isinstance(raw.get("args"), list):
+            out["args"] = [str(x) for x in raw.get("args") or []]
+        env = raw.get("env")
+        if isinstance(env, dict) and env:
+            out["env"] = {str(k): str(v) for k, v in env.items() if v is not None}
+        timeout = raw.get("startup_timeout_sec")
+        if timeout is not None:
+            try:
+                out["timeout"] = int(timeout)
+            except Exception:
+                pass
+        return out
+
+    def _current_entries(self) -> dict[str, Any]:
+        return {n: self.entry(n) for n in self.names()}
+
+    def _current_form(self, entry: Any) -> Any:
+        e = dict(entry or {})
+        e["timeout"] = _timeout_sec(e)
+        return e
+
+    def _expected_form(self, info: dict[str, Any]) -> dict[str, Any]:
+        r = self.render(info)
+        out = {k: r[k] for k in ("command", "args", "env") if k in r}
+        out["timeout"] = _timeout_sec(r)
+        return out
+
+    def render_block(self, name: str, info: dict[str, Any], *, marker: bool = True) -> str:
+        """渲染单个 server 的 TOML 段落。marker=True 时带单条目标记行（UI 逐条追加时使用）。"""
+        info = self.render(info)
+        timeout_sec = _timeout_sec(info)
+        cmd = str(info.get("command") or "")
+        args = info.get("args") or []
+        env = info.get("env") or {}
+
+        lines: list[str] = []
+        if marker:
+            lines.append(f"\n# === MCP Server: {name} (由 MCP Local Manager 生成) ===")
+        lines.append(("" if marker else "\n") + f"[mcp_servers.{name}]")
+        lines.append(f"startup_timeout_sec = {timeout_sec}")
+        lines.append(f"tool_timeout_sec = {timeout_sec}")
+        lines.append("command = " + json.dumps(cmd))
+        if isinstance(args, list) and args:
+            lines.append("args = " + json.dumps([str(x) for x in args]))
+        if isinstance(env, dict) and env:
+            lines.append(f"\n[mcp_servers.{name}.env]")
+            for k, v in env.items():
+                lines.append(f"{k} = " + json.dumps(str(v)))
+        if marker:
+            lines.append("")
+        return "\n".join(lines)
+
+    @staticmethod
+    def strip_server(text: str, name: str) -> str:
+        """移除指定 server 的所有表段（含 .env 等子表）与单条目标记行。"""
+        return TOML.strip_servers(text, [name])
+
+    def toggle_many(self, changes: dict[str, dict[str, Any] | None]) -> bool:
+        """一次扫描剥离全部涉及的 server，再逐条追加开启的条目；文本不变时不写入。"""
+        p = self.path()
+        with LOCKS.locked(p):
+            text = snapshot(p, "text")
+            if text is None:
+                if all(info is None for info in changes.values()):
+                    return False
+                raise RuntimeError(f"Codex 配置不存在: {p}")
+            new_text = TOML.strip_servers(text, changes)
+            blocks = [self.render_block(n, info) for n, info in changes.items() if info is not None]
+            if blocks:
+                # 与逐条追加一致：相邻两段之间只保留下一段开头的换行
+                new_text = new_text.rstrip() + "".join(b.rstrip() for b in blocks[:-1]) + blocks[-1]
+            if new_text == text:
+                return False
+            U.backup(p)
+            ATOMIC.write_text(p, new_text)
+            return True
+
+    def apply(self, subset: dict[str, Any], path: Path | None = None) -> bool:
+        """清理旧的生成段与所有 [mcp_servers.*]，再按 subset 写入一个完整段；文本不变时不写入。"""
+        p = path or self.path()
+        with LOCKS.locked(p):
+            text = snapshot(p, "text") or ""
+            rest = TOML.strip_managed(text)
+            blocks = [self.render_block(n, info or {}, marker=False) for n, info in subset.items()]
+            new_block = "\n".join(["\n" + self.HEADER, *blocks]) + "\n"
+            new_text = rest.rstrip() + "\n" + new_block
+            if new_text == text:
+                return False
+            U.backup(p)
+            ATOMIC.write_text(p, new_text)
+            return True
+
+
+def _same(a: Any, b: Any) -> bool:
+    """规范 JSON 等价（键顺序无关；区分 1/true/1.0 等 Python 相等但 JSON 不同的值）。"""
+    return SPEC.canonical_json(a) == SPEC.canonical_json(b)
+
+
+def _timeout_sec(info: dict[str, Any]) -> int:
+    timeout = info.get("timeout")
+    try:
+        t = int(timeout) if timeout is not None else 60
+    except Exception:
+        t = 60
+    return t if t >= 1 else 60
+
+
+_ADAPTERS: dict[str, TargetAdapter] = {}
+_ALIASES = {
+    "claude-file": "claude",
+    "claude-reg": "claude",
+    "vscode": "vscode-user",
+    "vscode-ins": "vscode-insiders",
+    "insiders": "vscode-insiders",
+}
+
+
+def register(adapter: TargetAdapter) -> TargetAdapter:
+    """登记（或替换）一个目标端适配器；注册顺序即各命令的展示顺序。"""
+    _ADAPTERS[adapter.key] = adapter
+    return adapter
+
+
+def resolve(client: str | None) -> str | None:
+    """别名 → 适配器 key；未知返回 None。"""
+    if not client:
+        return None
+    c = str(client).strip().lower()
+    c = _ALIASES.get(c, c)
+    return c if c in _ADAPTERS else None
+
+
+def get(client: str) -> TargetAdapter:
+    key = resolve(client)
+    if key is None:
+        raise ValueError(f"未知 client: {client}")
+    return _ADAPTERS[key]
+
+
+def adapters() -> list[TargetAdapter]:
+    return list(_ADAPTERS.values())
+
+
+def views() -> list[tuple[str, str, Callable[[], set[str]]]]:
+    """全部适配器的展示视图（Claude 拆为 file/register 两项）。
+
+    读取经 state.json 的指纹缓存：依赖文件未变时不读取/解析（见 mcp_cli.state）。
+    """
+    return [(key, label, _observed(a, key, fn)) for a in adapters() for key, label, fn in a.views()]
+
+
+def _observed(
+    adapter: TargetAdapter, key: str, fn: Callable[[], set[str]]
+) -> Callable[[], set[str]]:
+    def _read() -> set[str]:
+        src = adapter.view_source(key)
+        if src is None:
+            return fn()
+        return set(STATE.observe(src[0], src[1], lambda: sorted(fn())))
+
+    return _read
+
+
+def drift(
+    key: str,
+    expected: Callable[[], dict[str, Any]],
+    deps: Iterable[Path] = (),
+    *,
+    salt: Any = None,
+) -> dict[str, list[str]]:
+    """视图 key 的内容漂移（见 TargetAdapter.drift）；expected() 给出应下发的条目。
+
+    经 state.json 指纹缓存：目标文件与 deps（如 central、本地化记录）均未变、且 salt
+    （expected() 的其它输入）相同时不重新计算。
+    claude-reg 与 claude-file 同源（user scope）或由 `claude mcp` 管理，不单独比较。
+    """
+    if key == "claude-reg":
+        return {}
+    adapter = get("claude" if key == "claude-file" else key)
+    files = [adapter.path(), *deps]
+    return STATE.observe(f"drift:{key}", files, lambda: adapter.drift(expected()), salt=salt)
+
+
+def present(key: str) -> set[str]:
+    """视图 key（cursor / claude-file / claude-reg ...）已配置的 server 名称（经指纹缓存）。"""
+    for k, _label, fn in views():
+        if k == key:
+            return fn()
+    raise ValueError(f"未知 target: {key}")
+
+
+def view_key(alias: str | None) -> str | None:
+    """status/doctor 的视图 key：claude → claude-file，其它同适配器 key。"""
+    if not alias:
+        return None
+    a = str(alias).strip().lower()
+    if a in ("claude-file", "claude-reg"):
+        return a
+    key = resolve(a)
+    return "claude-file" if key == "claude" else key
+
+
+def probe_deadline() -> float:
+    """status/doctor 探测目标端的总截止时间（秒），MCP_PROBE_DEADLINE 覆盖（默认 15）。"""
+    try:
+        return max(0.1, float(os.environ.get("MCP_PROBE_DEADLINE", "") or 15))
+    except ValueError:
+        return 15.0
+
+
+def probe_views(
+    keys: Iterable[str] | None = None, *, deadline: float | None = None
+) -> Iterator[dict[str, Any]]:
+    """并发读取各视图已配置的 server，按完成顺序逐个产出结果。
+
+    每个视图一个守护线程（只读、互不依赖）；超过总截止时间仍未返回的视图产出
+    status="timeout"，不再等待（线程随进程退出）。结果为
+    {"key", "label", "status": ok|error|timeout, "present": set, "error", "elapsed"}。
+    """
+    want = None if keys is None else set(keys)
+    todo = [(k, label, fn) for k, label, fn in views() if want is None or k in want]
+    limit_sec = probe_deadline() if deadline is None else deadline
+    done: queue.Queue[dict[str, Any]] = queue.Queue()
+
+    def _one(key: str, label: str, fn: Callable[[], set[str]]) -> None:
+        t0 = time.monotonic()
+        res: dict[str, Any] = {"key": key, "label": label, "status": "ok", "error": None}
+        try:
+            res["present"] = set(fn())
+        except Exception as e:
+            res.update(status="error", present=set(), error=str(e))
+        res["elapsed"] = round(time.monotonic() - t0, 3)
+        done.put(res)
+
+    start = time.monotonic()
+    for key, label, fn in todo:
+        threading.Thread(
+            target=_one, args=(key, label, fn), name=f"probe-{key}", daemon=True
+        ).start()
+    pending = {key: label for key, label, _ in todo}
+    while pending:
+        try:
+            res = done.get(timeout=max(0.0, start + limit_sec - time.monotonic()))
+        except queue.Empty:
+            break
+        pending.pop(res["key"], None)
+        yield res
+    for key, label in pending.items():
+        yield {
+            "key": key,
+            "label": label,
+            "status": "timeout",
+            "present": set(),
+            "error": f"超过 {limit_sec:g}s 未返回",
+            "elapsed": round(time.monotonic() - start, 3),
+        }
+
+
+register(ClaudeAdapter("claude", "Claude", lambda: U.HOME / ".claude" / "settings.json"))
+register(CodexAdapter("codex", "Codex", lambda: U.HOME / ".codex" / "config.toml"))
+register(GeminiAdapter("gemini", "Gemini", lambda: U.HOME / ".gemini" / "settings.json"))
+register(TargetAdapter("iflow", "iFlow", lambda: U.HOME / ".iflow" / "settings.json"))
+register(DroidAdapter("droid", "Droid", lambda: U.HOME / ".factory" / "mcp.json"))
+register(TargetAdapter("cursor", "Cursor", lambda: U.HOME / ".cursor" / "mcp.json"))
+register(
+    TargetAdapter("vscode-user", "VS Code(User)", lambda: U._vscode_user_path(), top_key="servers")
+)
+register(
+    TargetAdapter(
+        "vscode-insiders",
+        "VS Code(Insiders)",
+        lambda: U._vscode_insiders_path(),
+        top_key="servers",
+    )
+)
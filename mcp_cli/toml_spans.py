@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Codex config.toml 的区间索引编辑：单遍线性扫描定位表头，只删除目标区间，其余字节原样保留。
+
+- 扫描识别多行字符串（三引号）、跨行数组与引号键，字符串/数组内形如 `[x]` 的行不会被误判为表头；
+- 表的区间为 [表头行首, 下一个表头行首)，表头前的注释/空行归属上一个表（与原正则语义一致）；
+- 删除多个区间时按偏移合并、一次拼接，整体为 O(文件大小)。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterable
+from typing import Any
+
+# 本工具写入的整段标记（兼容旧名 MCP Central）
+_MANAGED_RE = re.compile(r"\s*# === MCP Servers 配置（由 MCP (?:Local Manager|Central) 生成）===")
+# UI 逐条追加 server 时写入的单条目标记
+_MARKER_RE = re.compile(r"\s*# === MCP Server: (\S+)")
+_BARE_KEY_RE = re.compile(r"[A-Za-z0-9_-]+")
+# 值扫描中需要关注的字符：字符串起止、注释、数组括号
+_SPECIAL_RE = re.compile(r"[\"'#\[\]]")
+# 快速路径：连续的“平凡行”（不是表头/段标记行；字符串均闭合；数组至多两层且闭合，可跨行）
+# 由正则引擎一次跳过，并顺带匹配其后的裸键表头（[a.b] / [[a.b]]）。
+# 其余情况（引号键表头、更深的嵌套、未闭合结构、注释标记行）逐行走下方的状态机。
+# 各分支首字符互斥，配合占有量词（*+ / ++）不回溯，匹配耗时与文本长度成线性。
+_STR = r"""(?:"(?!"")(?:[^"\\\n]++|\\.)*+"|'(?!'')[^'\n]*+')"""
+_MLSTR = r'(?:"""(?:[^"\\]++|\\[\s\S]|"(?!""))*+"""(?:"{1,2})?|' + r"'''[\s\S]*?'''(?:'{1,2})?)"
+_ARR1 = r"""\[(?:[^"'\[\]#]++|""" + _MLSTR + "|" + _STR + r"|#[^\n]*+)*+\]"
+_ARR2 = r"""\[(?:[^"'\[\]#]++|""" + _MLSTR + "|" + _STR + "|" + _ARR1 + r"|#[^\n]*+)*+\]"
+_LINE = (
+    r"""[ \t]*+(?!\[|# ===)(?:[^\n"'\[\]#]++|"""
+    + _MLSTR
+    + "|"
+    + _STR
+    + "|"
+    + _ARR2
+    + r")*+(?:#[^\n]*+)?\n"
+)
+_RUN_RE = re.compile(
+    "(?:"
+    + _LINE
+    + r")*+(?:(?P<ind>[ \t]*)(?P<open>\[\[?)(?P<key>[A-Za-z0-9_-]+(?:\.[A-Za-z0-9_-]+)*)"
+    + r"(?P<close>\]\]?)[ \t]*(?:#[^\n]*)?(?:\n|\Z))?"
+)
+
+
+def _parse_key(s: str, i: int) -> tuple[list[str] | None, int]:
+    parts: list[str] = []
+    n = len(s)
+    while True:
+        while i < n and s[i] in " \t":
+            i += 1
+        if i >= n:
+            return None, i
+        c = s[i]
+        if c == '"':
+            j = i + 1
+            while j < n and s[j] != '"':
+                j += 2 if s[j] == "\\" else 1
+            if j >= n:
+                return None, i
+            try:
+                parts.append(json.loads(s[i : j + 1]))
+            except ValueError:
+                parts.append(s[i + 1 : j])
+            i = j + 1
+        elif c == "'":
+            j = s.find("'", i + 1)
+            if j < 0:
+                return None, i
+            parts.append(s[i + 1 : j])
+            i = j + 1
+        else:
+            m = _BARE_KEY_RE.match(s, i)
+            if m is None:
+                return None, i
+            parts.append(m.group(0))
+            i = m.end()
+        while i < n and s[i] in " \t":
+            i += 1
+        if i < n and s[i] == ".":
+            i += 1
+            continue
+        return parts, i
+
+
+def _parse_header(s: str) -> tuple[tuple[str, ...], bool] | None:
+    """解析已去掉行首空白的表头行；不是合法表头时返回 None。"""
+    is_array = s.startswith("[[")
+    key, i = _parse_key(s, 2 if is_array else 1)
+    if not key:
+        return None
+    close = "]]" if is_array else "]"
+    if not s.startswith(close, i):
+        return None
+    rest = s[i + len(close) :].strip()
+    if rest and not rest.startswith("#"):
+        return None
+    return tuple(key), is_array
+
+
+def _scan_value(line: str, ml: str | None, depth: int) -> tuple[str | None, int]:
+    """扫描一行（非表头）的剩余部分，返回行尾时的 (多行字符串定界符, 数组层数)。"""
+    i = 0
+    n = len(line)
+    while i < n:
+        if ml is not None:
+            j = line.find(ml, i)
+            while j > 0 and ml == '"""' and (j - len(line[:j].rstrip("\\"))) % 2 == 1:
+                j = line.find(ml, j + 1)
+            if j < 0:
+                return ml, depth
+            i = j + 3
+            while i < n and line[i] == ml[0]:  # 结尾允许紧跟至多两个引号
+                i += 1
+            ml = None
+            continue
+        m = _SPECIAL_RE.search(line, i)
+        if m is None:
+            break
+        c = m.group(0)
+        i = m.start()
+        if c == "#":
+            break
+        if c in "\"'":
+            if line.startswith(c * 3, i):
+                ml = c * 3
+                i += 3
+                continue
+            j = i + 1
+            while j < n and line[j] != c and line[j] != "\n":
+                j += 2 if (c == '"' and line[j] == "\\") else 1
+            i = j + 1
+            continue
+        depth = depth + 1 if c == "[" else max(0, depth - 1)
+        i += 1
+    return ml, depth
+
+
+def scan(text: str) -> dict[str, Any]:
+    """单遍扫描 text，返回表与顶层注释行的区间索引。
+
+    - tables: [{"key": ("mcp_servers", "a", ...), "array": bool, "start": int, "end": int}]
+    - comments: [(start, end, line)]（仅顶层、不在字符串/数组内的注释行）
+    """
+    heads: list[tuple[int, tuple[str, ...], bool]] = []  # (行首偏移, 键, 是否 [[数组表]])
+    comments: list[tuple[int, int, str]] = []
+    ml: str | None = None
+    depth = 0
+    pos = 0
+    n = len(text)
+    run = _RUN_RE.match
+    while pos < n:
+        if ml is None and depth == 0:
+            m = run(text, pos)
+            opn, key, close = m.group("open", "key", "close")
+            if key is not None and len(opn) == len(close):
+                heads.append((m.start("ind"), tuple(key.split(".")), len(opn) == 2))
+                pos = m.end()
+                continue
+            pos = m.start("ind") if key is not None else m.end()
+            if pos >= n:
+                break
+        nl = text.find("\n", pos)
+        end = n if nl < 0 else nl + 1
+        line = text[pos:end]
+        if ml is None and depth == 0:
+            s = line.lstrip(" \t")
+            if s.startswith("["):
+                parsed = _parse_header(s.rstrip("\r\n"))
+                if parsed is not None:
+                    heads.append((pos, parsed[0], parsed[1]))
+                    pos = end
+                    continue
+            elif s.startswith("#"):
+                comments.append((pos, end, line.rstrip("\r\n")))
+                pos = end
+                continue
+        ml, depth = _scan_value(line, ml, depth)
+        pos = end
+        if ml is not None:
+            # 多行字符串：直接跳到闭合定界符所在行
+            j = text.find(ml, pos)
+            while j > 0 and ml == '"""' and (j - len(text[pos:j].rstrip("\\")) - pos) % 2 == 1:
+                j = text.find(ml, j + 1)
+            if j < 0:
+                break
+            pos = text.rfind("\n", 0, j) + 1
+    ends = [h[0] for h in heads[1:]] + [n]
+    tables = [
+        {"key": key, "array": arr, "start": start, "end": end}
+        for (start, key, arr), end in zip(heads, ends, strict=False)
+    ]
+    return {"tables": tables, "comments": comments}
+
+
+def server_names(text: str) -> set[str]:
+    """[mcp_servers.<name>]（及其子表）中出现的 server 名称。"""
+    return {t["key"][1] for t in scan(text)["tables"] if _is_server(t["key"])}
+
+
+def _is_server(key: tuple[str, ...]) -> bool:
+    return len(key) >= 2 and key[0] == "mcp_servers"
+
+
+def _back_over_blank(text: str, start: int) -> int:
+    """把区间起点向前扩展到紧邻的空白行之前（保留上一行的换行符）。"""
+    while start > 0:
+        prev = text.rfind("\n", 0, start - 1) + 1
+        if text[prev:start].strip():
+            break
+        start = prev
+    return start
+
+
+def splice(text: str, spans: Iterable[tuple[int, int]]) -> str:
+    """删除给定区间（可重叠、无序），一次拼接保留部分。"""
+    out: list[str] = []
+    last = 0
+    for start, end in sorted(spans):
+        if end <= last:
+            continue
+        start = max(start, last)
+        out.append(text[last:start])
+        last = end
+    if not out:
+        return text
+    out.append(text[last:])
+    return "".join(out)
+
+
+def server_spans(
+    text: str, names: Iterable[str] | None = None, idx: dict[str, Any] | None = None
+) -> list[tuple[int, int]]:
+    """指定 server（names 为 None 时为全部）的表区间与单条目标记行区间。
+
+    names 为 None 时也包含裸 `[mcp_servers]` 表；idx 为已有的 scan(text) 结果。
+    """
+    want = None if names is None else {str(n) for n in names}
+    if want is not None and not any(n in text for n in want):
+        return []  # 名称根本未出现（如 UI 新开启一个 server）：无需扫描
+    idx = idx or scan(text)
+    spans = []
+    for t in idx["tables"]:
+        key = t["key"]
+        if want is None and key and key[0] == "mcp_servers":
+            spans.append((t["start"], t["end"]))
+        elif want is not None and _is_server(key) and key[1] in want:
+            spans.append((t["start"], t["end"]))
+    for start, end, line in idx["comments"]:
+        m = _MARKER_RE.match(line)
+        if m and (want is None or m.group(1) in want):
+            spans.append((_back_over_blank(text, start), end))
+    return spans
+
+
+def strip_servers(text: str, names: Iterable[str] | None = None) -> str:
+    """移除指定 server（含 .env 等子表）与其标记行；names 为 None 时移除全部 server。"""
+    return splice(text, server_spans(text, names))
+
+
+def strip_managed(text: str) -> str:
+    """移除本工具写入的整段标记行与全部 [mcp_servers.*] 表，其余内容逐字节保留。"""
+    idx = scan(text)
+    spans = server_spans(text, None, idx)
+    for start, end, line in idx["comments"]:
+        if _MANAGED_RE.match(line):
+            spans.append((_back_over_blank(text, start), end))
+    return splice(text, spans)
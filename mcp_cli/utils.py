@@ -9,13 +9,19 @@ from __future__ import annotations
 import json
 import os
 import platform
-import re
 import shutil
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
+from . import atomic as ATOMIC
+from . import backups as BACKUPS
+from . import central_cache
+from . import toml_spans as TOML
+
 # HOME/CENTRAL 由 Path.home() 推导，受环境变量 HOME 影响，测试已隔离
 HOME = Path.home()
 CENTRAL = HOME / ".mcp-central" / "config" / "mcp-servers.json"
@@ -50,15 +56,13 @@ except ImportError:
         return f"❌ 配置错误: {str(error)}"
 
 
-def load_json(p: Path, default: Any, error_context: str = "") -> Any:
-    if not p.exists():
+def _parse_json(content: str, p: Path, default: Any, error_context: str = "") -> Any:
+    """解析 JSON 文本；空内容/解析错误返回 default（有 error_context 时输出提示）。"""
+    if not content.strip():
+        if error_context:
+            print(f"⚠️ 警告: {error_context} - 文件为空: {p}", file=sys.stderr)
         return default
     try:
-        content = p.read_text(encoding="utf-8")
-        if not content.strip():
-            if error_context:
-                print(f"⚠️ 警告: {error_context} - 文件为空: {p}", file=sys.stderr)
-            return default
         return json.loads(content)
     except json.JSONDecodeError as e:
         if error_context:
@@ -67,6 +71,13 @@ def load_json(p: Path, default: Any, error_context: str = "") -> Any:
             if e.msg:
                 print(f"   错误信息: {e.msg}", file=sys.stderr)
         return default
+
+
+def load_json(p: Path, default: Any, error_context: str = "") -> Any:
+    if not p.exists():
+        return default
+    try:
+        return _parse_json(p.read_text(encoding="utf-8"), p, default, error_context)
     except Exception as e:
         if error_context:
             print(f"❌ {error_context} - 读取文件失败: {p}", file=sys.stderr)
@@ -75,12 +86,21 @@ def load_json(p: Path, default: Any, error_context: str = "") -> Any:
 
 
 def save_json(p: Path, obj: dict[str, Any]) -> None:
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    """持久化写入 JSON（唯一临时文件 + fsync + 原子替换，见 mcp_cli.atomic）。"""
+    ATOMIC.write_json(p, obj)
+
+
+def backup_root() -> Path:
+    return HOME / ".mcp-central" / "backups"
 
 
 def backup(p: Path) -> Path | None:
-    if not p.exists():
+    """写入前为 p 登记一个版本（内容寻址去重，见 mcp_cli.backups），返回兼容的 `<p>.backup`。
+
+    `<p>.backup` 为独立副本（保留原文件权限）：不与备份库 blob 共享 inode，改写它不会
+    破坏 `mcp undo` 所依据的版本。
+    """
+    if BACKUPS.snapshot(backup_root(), p) is None:
         return None
     b = p.with_name(p.name + ".backup")
     shutil.copy2(p, b)
@@ -116,18 +136,8 @@ def _json_keys(path: Path, pref_key: str = "mcpServers", error_context: str = ""
 
 
 def strip_toml_mcp_servers_block(text: str) -> str:
-    """移除 Codex config.toml 中我们写入的 MCP 段与所有 [mcp_servers.*] 段。"""
-    pattern = (
-        r"\n*# === MCP Servers 配置（由 MCP (?:Local Manager|Central) 生成）===\n"
-        r"(?:.|\n)*?(?=\n?# ===|\Z)"
-    )
-    text = re.sub(
-        pattern,
-        "\n",
-        text,
-    )
-    text = re.sub(r"(?ms)^\[mcp_servers\.[^\]]+\][\s\S]*?(?=^\[|\Z)", "", text)
-    return text
+    """移除 Codex config.toml 中我们写入的 MCP 段标记与所有 [mcp_servers.*] 段（其余原样保留）。"""
+    return TOML.strip_managed(text)
 
 
 def _codex_keys() -> set[str]:
@@ -141,15 +151,7 @@ def _codex_keys() -> set[str]:
         m = conf.get("mcp_servers", {}) or {}
         return {k for k in m.keys() if not k.endswith(".env")}
     except Exception:
-        names = set()
-        for line in p.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            m = re.match(r"^\[mcp_servers\.([^\]]+)\]$", line)
-            if m:
-                name = m.group(1)
-                if not name.endswith(".env"):
-                    names.add(name)
-        return names
+        return TOML.server_names(p.read_text(encoding="utf-8"))
 
 
 def _claude_registered() -> set[str]:
@@ -158,16 +160,60 @@ def _claude_registered() -> set[str]:
     - 当 scope=user 时，优先直接读取 ~/.claude/settings.json 的 mcpServers，
       并兼容旧版 ~/.claude.json。
       （更快且不受 `claude mcp list` 变慢影响）。
-    - 其它 scope 回退到 `claude mcp list` 解析输出。
+    - local/project scope 直接读取 ~/.claude.json projects[<cwd>] / ./.mcp.json；
+      仅当 MCP_CLAUDE_BACKEND=cli 或文件无法解析时回退到 `claude mcp list` 解析输出。
     """
 
     scope = claude_registry_scope()
     if scope == "user":
         return claude_user_mcp_servers()
 
+    from . import targets as TARGETS
+
+    claude = TARGETS.get("claude")
+    if claude.native_registry(scope):
+        return set(claude.registry_entries(scope).keys())
+
+    return set(_claude_list_names(scope))
+
+
+# (scope, cwd) -> (到期时刻 monotonic, 名称集合)：`claude mcp list` 结果的短期缓存
+_CLAUDE_LIST_CACHE: dict[tuple[str, str], tuple[float, frozenset[str]]] = {}
+_CLAUDE_LIST_LOCK = threading.Lock()
+
+
+def claude_list_ttl() -> float:
+    """`claude mcp list` 结果缓存时长（秒），MCP_CLAUDE_LIST_TTL 覆盖，0 表示不缓存。"""
     try:
-        t = float(os.environ.get("CLAUDE_LIST_TIMEOUT", "10"))
-        out = subprocess.run(["claude", "mcp", "list"], capture_output=True, text=True, timeout=t)
+        return max(0.0, float(os.environ.get("MCP_CLAUDE_LIST_TTL", "10")))
+    except ValueError:
+        return 10.0
+
+
+def invalidate_claude_registry() -> None:
+    """本工具改写 Claude 注册表后调用，使下一次读取重新执行 `claude mcp list`。"""
+    with _CLAUDE_LIST_LOCK:
+        _CLAUDE_LIST_CACHE.clear()
+
+
+def _claude_list_names(scope: str) -> frozenset[str]:
+    """`claude mcp list` 解析出的名称（按 scope + cwd 缓存 TTL 秒；失败不缓存）。
+
+    持锁执行：UI 并发请求同一状态时只启动一个 claude 子进程。
+    """
+    key = (scope, os.getcwd())
+    ttl = claude_list_ttl()
+    with _CLAUDE_LIST_LOCK:
+        hit = _CLAUDE_LIST_CACHE.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            return hit[1]
+        try:
+            t = float(os.environ.get("CLAUDE_LIST_TIMEOUT", "10"))
+            out = subprocess.run(
+                ["claude", "mcp", "list"], capture_output=True, text=True, timeout=t
+            )
+        except Exception:
+            return frozenset()
         text = (out.stdout or "") + "\n" + (out.stderr or "")
         reg = set()
         for line in text.splitlines():
@@ -176,9 +222,10 @@ def _claude_registered() -> set[str]:
                 continue
             if ":" in line:
                 reg.add(line.split(":", 1)[0].strip())
-        return reg
-    except Exception:
-        return set()
+        names = frozenset(reg)
+        if ttl > 0:
+            _CLAUDE_LIST_CACHE[key] = (time.monotonic() + ttl, names)
+        return names
 
 
 def claude_registry_scope() -> str:
@@ -202,6 +249,19 @@ def claude_registry_scope() -> str:
     return "user"
 
 
+def claude_registry_backend() -> str:
+    """Claude local/project scope 注册表的读写方式。
+
+    - file（默认）: 直接读写 ~/.claude.json 的 projects.<cwd>.mcpServers 与 ./.mcp.json
+    - cli: 调用 `claude mcp list/add/remove`
+
+    通过环境变量 `MCP_CLAUDE_BACKEND` 覆盖。
+    """
+
+    backend = (os.environ.get("MCP_CLAUDE_BACKEND") or "file").strip().lower()
+    return backend if backend in ("file", "cli") else "file"
+
+
 def claude_user_mcp_servers() -> set[str]:
     """读取 Claude Code user scope 下的 server 名称集合。
 
@@ -256,12 +316,24 @@ def _normalize_client(alias: str | None) -> str | None:
 
 
 def load_central_servers() -> tuple[dict[str, Any], dict[str, Any]]:
-    validation_passed = False
+    """读取 central 并返回 (obj, servers)。
+
+    文件未变化且此前已通过校验时直接复用 central_cache（跳过解析与 schema 校验）；
+    返回对象与缓存共享，调用方只读。
+    """
     obj = {}
+    entry = central_cache.load(CENTRAL)
+    cached = central_cache.get_verdict(entry, "schema") if entry is not None else None
+    if cached is not None and cached[0] and isinstance(entry["data"], dict):
+        obj = entry["data"]
+        servers = obj.get("servers") or {}
+        if isinstance(servers, dict):
+            return obj, servers
     if VALIDATION_AVAILABLE and CENTRAL.exists():
         try:
             obj = validate_mcp_servers_config(CENTRAL)
-            validation_passed = True
+            if entry is not None:
+                central_cache.put_verdict(CENTRAL, entry, "schema", True, "ok")
         except (MCPValidationError, MCPSchemaError) as e:
             print(format_validation_error(e), file=sys.stderr)
             print("⚠️  警告: Schema 验证失败，使用基本 JSON 解析（功能可能受限）", file=sys.stderr)
@@ -278,15 +350,7 @@ def load_central_servers() -> tuple[dict[str, Any], dict[str, Any]]:
         print("❌ 错误: 'servers' 字段必须是对象格式", file=sys.stderr)
         servers = {}
 
-    if VALIDATION_AVAILABLE and validation_passed:
-        from mcp_validation import validate_server_config
-
-        for server_name, server_info in servers.items():
-            try:
-                validate_server_config(server_name, server_info)
-            except MCPValidationError as e:
-                print(f"⚠️  服务器配置警告 - {server_name}: {e}", file=sys.stderr)
-
+    # validate_mcp_servers_config 已单遍校验过全部 server，无需再逐个复核
     return obj, servers
 
 
@@ -320,6 +384,12 @@ def split_enabled_servers(servers: dict[str, Any]) -> tuple[dict[str, Any], dict
     return enabled, disabled
 
 
+def _str_map(mp: dict[Any, Any]) -> dict[str, str]:
+    if all(type(k) is str and type(v) is str for k, v in mp.items()):
+        return mp
+    return {str(k): str(v) for k, v in mp.items() if v is not None}
+
+
 def to_target_server_info(info: dict[str, Any], client: str | None = None) -> dict[str, Any]:
     """将 central 的 server 配置裁剪为"可写入目标端"的形态（去除元数据字段）。
 
@@ -343,17 +413,19 @@ def to_target_server_info(info: dict[str, Any], client: str | None = None) -> di
     if "command" in info and info.get("command"):
         out["command"] = str(info["command"])
 
+    # 嵌套对象已是规范形态（全为字符串）时直接共享（条目按写时复制约定不被原地修改），
+    # 仅在需要转换时才分配新对象
     args = info.get("args")
     if isinstance(args, list) and args:
-        out["args"] = [str(x) for x in args]
+        out["args"] = args if all(type(x) is str for x in args) else [str(x) for x in args]
 
     env = info.get("env")
     if isinstance(env, dict) and env:
-        out["env"] = {str(k): str(v) for k, v in env.items() if v is not None}
+        out["env"] = _str_map(env)
 
     headers = info.get("headers")
     if isinstance(headers, dict) and headers:
-        out["headers"] = {str(k): str(v) for k, v in headers.items() if v is not None}
+        out["headers"] = _str_map(headers)
 
     url = info.get("url")
     if url:
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""central 配置校验的共享组件。
+
+- schema 只读取、检查、编译一次（Draft7Validator），按 schema 文件内容哈希记忆化；
+- central._validate 与 bin/mcp_validation 共用同一个已编译校验器，避免每次调用
+  `jsonschema.validate` 时重复加载 schema 并重建校验器。
+- jsonschema 未安装时 `schema_validator()` 返回 None，调用方回退到手工校验。
+
+单遍校验：
+- `collect_errors()` 一次遍历清单，手工规则与 schema 规则合并，返回全部错误及 JSON pointer；
+  central._validate、bin/mcp_validation 与 utils.load_central_servers 共用这一入口。
+
+增量校验：
+- 校验拆为「顶层信封」与「单个 server」两部分（schema 对 servers 按条目可分解）；
+- 单个 server 的结论按 (name, 内容摘要) 记忆化，未变化的条目直接复用；
+- `validate_changes()` 在基线已通过校验时只校验信封 + 变更条目，单条编辑为 O(1)。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Iterable
+from typing import Any
+
+from .central_cache import SCHEMA_PATH, schema_hash
+
+_COMPILED: tuple[str, Any] | None = None
+_COMPILED_SERVER: tuple[str, Any] | None = None
+
+# (schema 哈希, name, 内容摘要) -> 错误列表（空表示通过）；超过上限整体清空，避免常驻进程无限增长
+_VERDICTS: dict[tuple[str, str, str], tuple[tuple[str, str], ...]] = {}
+_VERDICTS_MAX = 16384
+
+ALLOWED_TOP = frozenset({"version", "description", "servers"})
+ALLOWED_SERVER = frozenset(
+    {
+        "enabled",
+        "type",
+        "command",
+        "args",
+        "env",
+        "url",
+        "timeout",
+        "headers",
+        "source",
+        "client_overrides",
+    }
+)
+
+
+def load_schema() -> dict[str, Any] | None:
+    if not SCHEMA_PATH.exists():
+        return None
+    try:
+        obj = json.loads(SCHEMA_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def schema_validator() -> Any | None:
+    """返回已编译的 Draft7Validator（进程内共享）；依赖或 schema 缺失时返回 None。"""
+    global _COMPILED
+    digest = schema_hash()
+    if _COMPILED is not None and _COMPILED[0] == digest:
+        return _COMPILED[1]
+    try:
+        from jsonschema import Draft7Validator
+    except ImportError:
+        return None
+    schema = load_schema()
+    if schema is None:
+        return None
+    Draft7Validator.check_schema(schema)
+    validator = Draft7Validator(schema)
+    _COMPILED = (digest, validator)
+    return validator
+
+
+def _server_validator() -> Any | None:
+    """servers.<name> 子 schema 的已编译校验器。"""
+    global _COMPILED_SERVER
+    digest = schema_hash()
+    if _COMPILED_SERVER is not None and _COMPILED_SERVER[0] == digest:
+        return _COMPILED_SERVER[1]
+    full = schema_validator()
+    if full is None:
+        return None
+    sub = ((full.schema.get("properties") or {}).get("servers") or {}).get("additionalProperties")
+    if not isinstance(sub, dict):
+        return None
+    validator = type(full)(sub)
+    _COMPILED_SERVER = (digest, validator)
+    return validator
+
+
+def first_schema_error(data: Any) -> Any | None:
+    """按 jsonschema.validate 的同等规则挑选最相关的一条错误；无错误返回 None。"""
+    validator = schema_validator()
+    if validator is None:
+        return None
+    from jsonschema.exceptions import best_match
+
+    return best_match(validator.iter_errors(data))
+
+
+def format_error(err: Any) -> str:
+    try:
+        from mcp_validation import format_validation_error
+
+        return format_validation_error(err)
+    except Exception:
+        return str(err)
+
+
+Issue = tuple[str, str]  # (JSON pointer, 中文错误信息)
+
+
+def pointer(*parts: Any) -> str:
+    """按 RFC 6901 拼接 JSON pointer（如 /servers/s1/args/0）。"""
+    return "".join("/" + str(p).replace("~", "~0").replace("/", "~1") for p in parts)
+
+
+def _schema_issues(validator: Any, instance: Any, prefix: tuple[Any, ...]) -> list[Issue]:
+    """jsonschema 错误转为 Issue 列表（best_match 排首位，其余按出现顺序）。"""
+    from jsonschema.exceptions import best_match
+
+    errors = list(validator.iter_errors(instance))
+    if not errors:
+        return []
+    best = best_match(errors)
+    ordered = [best] + [e for e in errors if e is not best]
+    out: list[Issue] = []
+    for err in ordered:
+        err.path.extendleft(reversed(prefix))
+        out.append((pointer(*err.path), format_error(err)))
+    return out
+
+
+def _merge(manual: list[Issue], schema: list[Issue]) -> list[Issue]:
+    # 手工规则与 schema 常对同一位置报错：同一 pointer（或其父/子路径）只保留手工信息；
+    # 根 pointer "" 是所有路径的父路径，只有手工规则同样报在根上时才视为重复
+    seen = [p for p, _ in manual]
+    out = list(manual)
+    for ptr, msg in schema:
+        if any(
+            ptr == p or ptr.startswith(p + "/") or (ptr and p.startswith(ptr + "/")) for p in seen
+        ):
+            continue
+        out.append((ptr, msg))
+    return out
+
+
+def envelope_errors(data: Any) -> list[Issue]:
+    """顶层信封校验（不含各 server 内容），返回全部错误。"""
+    if not isinstance(data, dict):
+        return [("", "配置必须是对象格式")]
+    out: list[Issue] = []
+    for k in ("version", "description", "servers"):
+        if k not in data:
+            out.append((pointer(k), f"缺少必需字段: '{k}'"))
+    if "version" in data and (
+        not isinstance(data.get("version"), str) or not str(data.get("version")).strip()
+    ):
+        out.append((pointer("version"), "'version' 字段必须是非空字符串"))
+    if "description" in data and (
+        not isinstance(data.get("description"), str) or not str(data.get("description")).strip()
+    ):
+        out.append((pointer("description"), "'description' 字段必须是非空字符串"))
+    if "servers" in data and not isinstance(data.get("servers"), dict):
+        out.append((pointer("servers"), "'servers' 字段必须是对象格式"))
+    for k in sorted(set(data.keys()) - ALLOWED_TOP, key=str):
+        out.append((pointer(k), f"不允许的顶层字段: '{k}'"))
+    try:
+        validator = schema_validator()
+        if validator is not None:
+            envelope = {**data, "servers": {}} if isinstance(data.get("servers"), dict) else data
+            out = _merge(out, _schema_issues(validator, envelope, ()))
+    except Exception as e:
+        out.append(("", str(e)))
+    return out
+
+
+def _str_map_errors(obj: Any, ptr: tuple[Any, ...], what: str, item: str) -> list[Issue]:
+    if not isinstance(obj, dict):
+        return [(pointer(*ptr), f"{what} 必须是对象")]
+    return [
+        (pointer(*ptr, k), f"{item} '{k}' 必须是字符串")
+        for k, v in obj.items()
+        if not isinstance(v, str)
+    ]
+
+
+def _str_list_errors(obj: Any, ptr: tuple[Any, ...], what: str, item: str) -> list[Issue]:
+    # item 为元素描述模板，含 {i} 占位
+    if not isinstance(obj, list):
+        return [(pointer(*ptr), f"{what} 必须是数组")]
+    return [
+        (pointer(*ptr, i), f"{item.format(i=i)} 必须是字符串")
+        for i, arg in enumerate(obj)
+        if not isinstance(arg, str)
+    ]
+
+
+def _nonempty_str(v: Any) -> bool:
+    return isinstance(v, str) and bool(v.strip())
+
+
+def server_errors(name: str, info: Any) -> list[Issue]:
+    """单个 server 的全部错误（手工规则 + 已编译的 servers.<name> 子 schema）。"""
+    at = ("servers", name)
+    base = f"服务器 '{name}'"
+    if not isinstance(info, dict):
+        return [(pointer(*at), f"{base} 配置必须是对象格式")]
+    out: list[Issue] = []
+    for k in sorted(set(info.keys()) - ALLOWED_SERVER, key=str):
+        out.append((pointer(*at, k), f"{base} 包含不支持的字段: '{k}'"))
+
+    if not _nonempty_str(info.get("command")):
+        out.append((pointer(*at, "command"), f"{base} 缺少必需字段: 'command'"))
+    if "enabled" in info and not isinstance(info.get("enabled"), bool):
+        out.append((pointer(*at, "enabled"), f"{base} 的 'enabled' 必须是布尔值"))
+    for key in ("type", "url", "source"):
+        if key in info and not _nonempty_str(info.get(key)):
+            out.append((pointer(*at, key), f"{base} 的 '{key}' 必须是非空字符串"))
+    if "args" in info:
+        out += _str_list_errors(
+            info.get("args"), (*at, "args"), f"{base} 的 'args'", f"{base} 的 'args[{{i}}]'"
+        )
+    if "env" in info:
+        out += _str_map_errors(
+            info.get("env"), (*at, "env"), f"{base} 的 'env'", f"{base} 的环境变量"
+        )
+    if "headers" in info:
+        out += _str_map_errors(
+            info.get("headers"), (*at, "headers"), f"{base} 的 'headers'", f"{base} 的 HTTP 头"
+        )
+    if "timeout" in info:
+        timeout = info.get("timeout")
+        if isinstance(timeout, bool) or not isinstance(timeout, int):
+            out.append((pointer(*at, "timeout"), f"{base} 的 'timeout' 必须是整数（秒）"))
+        elif timeout < 1 or timeout > 3600:
+            out.append(
+                (pointer(*at, "timeout"), f"{base} 的 'timeout' 超出范围（1-3600）: {timeout}")
+            )
+
+    if "client_overrides" in info:
+        overrides = info.get("client_overrides")
+        if not isinstance(overrides, dict):
+            out.append(
+                (pointer(*at, "client_overrides"), f"{base} 的 'client_overrides' 必须是对象")
+            )
+            overrides = {}
+        for client, override in overrides.items():
+            oat = (*at, "client_overrides", client)
+            obase = f"{base} 的 client_overrides.{client}"
+            if not isinstance(override, dict):
+                out.append((pointer(*oat), f"{obase} 必须是对象"))
+                continue
+            if "command" in override and not _nonempty_str(override.get("command")):
+                out.append((pointer(*oat, "command"), f"{obase}.command 必须是非空字符串"))
+            if "args" in override:
+                out += _str_list_errors(
+                    override.get("args"), (*oat, "args"), f"{obase}.args", f"{obase}.args[{{i}}]"
+                )
+            if "env" in override:
+                out += _str_map_errors(
+                    override.get("env"), (*oat, "env"), f"{obase}.env", f"{obase} 环境变量"
+                )
+
+    validator = _server_validator()
+    if validator is not None:
+        out = _merge(out, _schema_issues(validator, info, at))
+    return out
+
+
+def check_envelope(data: Any) -> str | None:
+    """顶层信封的第一条错误（兼容旧调用方）。"""
+    issues = envelope_errors(data)
+    return issues[0][1] if issues else None
+
+
+def check_server(name: str, info: Any) -> str | None:
+    """单个 server 的第一条错误（兼容旧调用方）。"""
+    issues = server_errors(name, info)
+    return issues[0][1] if issues else None
+
+
+def _server_issues(name: Any, info: Any, digest: str) -> list[Issue]:
+    """带记忆化的 server_errors：按写盘后的 JSON 形态（tuple -> list 等）校验。"""
+    try:
+        raw = json.dumps(info, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    except (TypeError, ValueError) as e:
+        return [(pointer("servers", name), f"配置无法序列化为 JSON: {e}")]
+    key = (digest, str(name), hashlib.sha1(raw.encode("utf-8")).hexdigest())
+    cached = _VERDICTS.get(key)
+    if cached is None:
+        cached = tuple(server_errors(str(name), json.loads(raw)))
+        if len(_VERDICTS) >= _VERDICTS_MAX:
+            _VERDICTS.clear()
+        _VERDICTS[key] = cached
+    return list(cached)
+
+
+def collect_errors(data: Any, names: Iterable[str] | None = None) -> list[Issue]:
+    """单遍遍历清单，返回全部错误 [(JSON pointer, 信息)]；无错误返回空列表。
+
+    names 给出时只校验这些 server（增量场景），否则校验全部；未变化的条目复用记忆化结论。
+    """
+    out = envelope_errors(data)
+    servers = data.get("servers") if isinstance(data, dict) else None
+    if not isinstance(servers, dict):
+        return out
+    digest = schema_hash()
+    for name in servers if names is None else names:
+        if name in servers:
+            out += _server_issues(name, servers[name], digest)
+    return out
+
+
+def validate_servers(servers: dict[str, Any], names: Iterable[str]) -> str | None:
+    """逐个校验 names 中的 server，返回第一条错误。"""
+    digest = schema_hash()
+    for name in names:
+        if name in servers:
+            issues = _server_issues(name, servers[name], digest)
+            if issues:
+                return issues[0][1]
+    return None
+
+
+def validate_all(data: Any) -> tuple[bool, str]:
+    """全量校验：返回 (ok, 第一条错误信息)。"""
+    issues = collect_errors(data)
+    return (False, issues[0][1]) if issues else (True, "ok")
+
+
+def validate_changes(data: Any, changed: Iterable[str], *, base_ok: bool) -> tuple[bool, str]:
+    """增量校验：基线已通过时只校验信封与 changed 中的条目，否则退回全量。"""
+    issues = collect_errors(data, None if not base_ok else changed)
+    return (False, issues[0][1]) if issues else (True, "ok")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Codex config.toml 编辑耗时基准：对比旧的整文件正则剥离与区间索引编辑（mcp_cli.toml_spans）。
+
+用法：python3 scripts/bench-toml.py [--sizes 1,4,16] [--repeat 5]
+
+按目标大小（MB）生成配置：大量用户表 + 多行字符串 + 本工具写入的 MCP 段，输出中位耗时（毫秒）：
+- regex-all : 旧 strip_toml_mcp_servers_block（段标记正则 + [mcp_servers.*] 正则）
+- spans-all : toml_spans.strip_managed
+- regex-one : 旧单 server 剥离（标记行 + 表段两次正则）
+- spans-one : toml_spans.strip_servers(text, [name])
+并校验两种实现剥离后的 TOML 语义一致。
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import sys
+import time
+import tomllib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from mcp_cli import toml_spans as TOML  # noqa: E402
+from mcp_cli.targets import CodexAdapter  # noqa: E402
+
+
+def legacy_strip_all(text: str) -> str:
+    pattern = (
+        r"\n*# === MCP Servers 配置（由 MCP (?:Local Manager|Central) 生成）===\n"
+        r"(?:.|\n)*?(?=\n?# ===|\Z)"
+    )
+    text = re.sub(pattern, "\n", text)
+    return re.sub(r"(?ms)^\[mcp_servers\.[^\]]+\][\s\S]*?(?=^\[|\Z)", "", text)
+
+
+def legacy_strip_one(text: str, name: str) -> str:
+    name_esc = re.escape(name)
+    text = re.sub(rf"(?m)^\s*# === MCP Server: {name_esc} .*?\n", "", text)
+    return re.sub(rf"(?ms)^\[mcp_servers\.{name_esc}(?:\.[^\]]+)?\][\s\S]*?(?=^\[|\Z)", "", text)
+
+
+def make_config(mb: float) -> str:
+    budget = mb * 1024 * 1024
+    user: list[str] = ['model = "o3"\n']
+    size = 0
+    i = 0
+    while size < budget * 0.7:
+        chunk = (
+            f"\n[profiles.p{i:06d}]\n"
+            f'model = "m{i}"\n'
+            f'instructions = """\nline one {i} [not a table]\nline two\n"""\n'
+            f'tags = ["a", "b", "c{i}"]\n'
+        )
+        user.append(chunk)
+        size += len(chunk)
+        i += 1
+    servers = ["\n" + CodexAdapter.HEADER]
+    j = 0
+    while size < budget:
+        chunk = (
+            f"\n[mcp_servers.s{j:06d}]\n"
+            "startup_timeout_sec = 60\ntool_timeout_sec = 60\n"
+            f'command = "npx"\nargs = ["-y", "pkg-{j}@latest"]\n'
+            f'\n[mcp_servers.s{j:06d}.env]\nTOKEN = "t{j}"\n'
+        )
+        servers.append(chunk)
+        size += len(chunk)
+        j += 1
+    return "".join(user) + "".join(servers) + "\n"
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1,4,16")
+    ap.add_argument("--repeat", type=int, default=5)
+    opts = ap.parse_args()
+
+    print(
+        f"{'MB':>6}  {'regex-all':>10}  {'spans-all':>10}  {'regex-one':>10}  {'spans-one':>10}"
+        "  (ms, median)"
+    )
+    for mb in [float(x) for x in opts.sizes.split(",") if x.strip()]:
+        text = make_config(mb)
+        a, b = tomllib.loads(legacy_strip_all(text)), tomllib.loads(TOML.strip_managed(text))
+        if a != b:
+            print(f"[ERR] {mb}MB: 两种实现剥离结果不一致", file=sys.stderr)
+            return 1
+        t_ra = _median_ms(lambda t=text: legacy_strip_all(t), opts.repeat)
+        t_sa = _median_ms(lambda t=text: TOML.strip_managed(t), opts.repeat)
+        t_ro = _median_ms(lambda t=text: legacy_strip_one(t, "s000000"), opts.repeat)
+        t_so = _median_ms(lambda t=text: TOML.strip_servers(t, ["s000000"]), opts.repeat)
+        size = len(text.encode("utf-8")) / 1024 / 1024
+        print(f"{size:>6.1f}  {t_ra:>10.1f}  {t_sa:>10.1f}  {t_ro:>10.1f}  {t_so:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""校验耗时基准：对比「每次加载 schema + jsonschema.validate」与共享的已编译校验器。
+
+用法：python3 scripts/bench-validation.py [--sizes 10,1000,10000] [--repeat 5]
+
+输出每个目录规模下单次校验的中位耗时（毫秒）：
+- legacy   : 旧实现（读 schema 文件 + jsonschema.validate，每次重建校验器）
+- compiled : mcp_cli.validation 共享的 Draft7Validator
+- central  : central._validate 全流程（信封 + 逐 server 校验，冷启动，不复用结论）
+- incr     : 单条编辑后的增量校验（信封 + 1 个变更条目）
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "bin"))
+
+from mcp_cli import validation as V  # noqa: E402
+from mcp_cli.commands import central as CENTRAL  # noqa: E402
+
+
+def make_catalog(n: int) -> dict:
+    servers = {}
+    for i in range(n):
+        servers[f"server-{i:05d}"] = {
+            "enabled": i % 7 != 0,
+            "command": "npx",
+            "args": ["-y", f"pkg-{i}@latest", "--flag"],
+            "env": {"TOKEN": f"t{i}", "MODE": "standard"},
+            "timeout": 60 + (i % 300),
+        }
+    return {"version": "1.1.0", "description": "bench", "servers": servers}
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10,1000,10000")
+    ap.add_argument("--repeat", type=int, default=5)
+    opts = ap.parse_args()
+
+    try:
+        import jsonschema
+    except ImportError:
+        print("需要 jsonschema：pip install -r requirements-dev.txt", file=sys.stderr)
+        return 2
+
+    def legacy(data: dict) -> None:
+        schema = json.loads(V.SCHEMA_PATH.read_text(encoding="utf-8"))
+        jsonschema.validate(instance=data, schema=schema)
+
+    V.schema_validator()  # 预热：编译一次
+    def cold(data: dict) -> None:
+        V._VERDICTS.clear()  # noqa: SLF001
+        CENTRAL._validate(data)  # noqa: SLF001
+
+    def incr(data: dict) -> None:
+        data["servers"]["server-00000"]["timeout"] += 1
+        V.validate_changes(data, {"server-00000"}, base_ok=True)
+
+    print(
+        f"{'servers':>8}  {'legacy':>10}  {'compiled':>10}  {'central':>10}  {'incr':>10}"
+        "  (ms, median)"
+    )
+    for n in [int(x) for x in opts.sizes.split(",") if x.strip()]:
+        data = make_catalog(n)
+        t_legacy = _median_ms(lambda d=data: legacy(d), opts.repeat)
+        t_compiled = _median_ms(lambda d=data: V.first_schema_error(d), opts.repeat)
+        t_central = _median_ms(lambda d=data: cold(d), opts.repeat)
+        t_incr = _median_ms(lambda d=data: incr(d), opts.repeat)
+        print(f"{n:>8}  {t_legacy:>10.2f}  {t_compiled:>10.2f}  {t_central:>10.2f}  {t_incr:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,19 @@ set -euo pipefail
 
 # 只读健康检查（跨 macOS/Linux）
 
-python3 - "$@" <<'PY'
+MCP_REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)" python3 - "$@" <<'PY'
 import json, os, shutil, subprocess, sys, platform, re
 from pathlib import Path
 
+# 复用主 CLI 的 PATH 索引：PATH 只扫描一次（并跨进程缓存），大清单逐条检查不再逐条遍历 PATH
+try:
+    _REPO_ROOT = os.environ.get('MCP_REPO_ROOT') or ''
+    if _REPO_ROOT and _REPO_ROOT not in sys.path:
+        sys.path.insert(0, _REPO_ROOT)
+    from mcp_cli import pathindex as _PATHS  # type: ignore
+except Exception:
+    _PATHS = None
+
 HOME = Path.home()
 OS = platform.system().lower()
 OK, WARN, FAIL = 'OK', 'WARN', 'FAIL'
@@ -28,7 +37,7 @@ def which_ok(cmd):
     p = Path(cmd)
     if p.is_absolute():
         return (p.exists() and os.access(p, os.X_OK)), str(p)
-    found = shutil.which(cmd)
+    found = _PATHS.which(cmd) if _PATHS is not None else shutil.which(cmd)
     return (found is not None), (found or cmd)
 
 def load_central():
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""测试用最小 MCP stdio server：逐行 JSON-RPC，支持 initialize / tools/list。
+
+参数：
+  --tools N        tools/list 返回 N 个工具（默认 2；超过 page 大小时分页）
+  --page N         每页工具数（默认 100）
+  --delay S        收到 initialize 后先等待 S 秒（模拟冷启动慢）
+  --crash          收到 initialize 后向 stderr 输出错误并以 3 退出
+  --noise          启动时先向 stdout 输出一行非 JSON 日志
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tools", type=int, default=2)
+    ap.add_argument("--page", type=int, default=100)
+    ap.add_argument("--delay", type=float, default=0.0)
+    ap.add_argument("--crash", action="store_true")
+    ap.add_argument("--noise", action="store_true")
+    args = ap.parse_args()
+
+    def reply(msg_id, result):
+        sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": msg_id, "result": result}) + "\n")
+        sys.stdout.flush()
+
+    if args.noise:
+        print("fake server starting...", flush=True)
+
+    tools = [{"name": f"t{i}", "inputSchema": {"type": "object"}} for i in range(args.tools)]
+    for line in sys.stdin:
+        msg = json.loads(line)
+        method = msg.get("method")
+        if method == "initialize":
+            if args.crash:
+                print("fatal: missing API key", file=sys.stderr, flush=True)
+                return 3
+            time.sleep(args.delay)
+            reply(
+                msg["id"],
+                {
+                    "protocolVersion": msg["params"]["protocolVersion"],
+                    "capabilities": {"tools": {}},
+                    "serverInfo": {"name": "fake", "version": "0.1"},
+                },
+            )
+        elif method == "tools/list":
+            start = int((msg.get("params") or {}).get("cursor") or 0)
+            result = {"tools": tools[start : start + args.page]}
+            if start + args.page < len(tools):
+                result["nextCursor"] = str(start + args.page)
+            reply(msg["id"], result)
+        elif "id" in msg:
+            sys.stdout.write(
+                json.dumps({"jsonrpc": "2.0", "id": msg["id"], "error": {"code": -32601, "message": "not found"}})
+                + "\n"
+            )
+            sys.stdout.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
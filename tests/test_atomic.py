@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+持久化写入（mcp_cli.atomic）：唯一临时文件 + fsync + 原子替换；组提交按目录合并 fsync。
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from mcp_cli import atomic as ATOMIC
+
+
+def test_write_replaces_atomically_and_keeps_mode_and_symlink(tmp_path: Path):
+    real = tmp_path / "real" / "settings.json"
+    ATOMIC.write_json(real, {"a": 1})
+    os.chmod(real, 0o600)
+    link = tmp_path / "settings.json"
+    link.symlink_to(real)
+
+    ATOMIC.write_text(link, '{"a": 2}')
+    assert link.is_symlink()
+    assert real.read_text(encoding="utf-8") == '{"a": 2}'
+    assert (real.stat().st_mode & 0o777) == 0o600
+    # 不残留临时文件
+    assert sorted(p.name for p in real.parent.iterdir()) == ["settings.json"]
+
+
+def test_failed_write_keeps_old_content(tmp_path: Path, monkeypatch):
+    p = tmp_path / "d" / "c.json"
+    ATOMIC.write_text(p, "old")
+
+    def boom(src, dst):  # noqa: ANN001
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ATOMIC.os, "replace", boom)
+    with pytest.raises(OSError):
+        ATOMIC.write_text(p, "new")
+    assert p.read_text(encoding="utf-8") == "old"
+    assert [x.name for x in p.parent.iterdir()] == ["c.json"]
+
+
+def test_group_commit_fsyncs_each_directory_once(tmp_path: Path, monkeypatch):
+    synced: list[Path] = []
+    monkeypatch.setattr(ATOMIC, "fsync_dir", lambda d: synced.append(Path(d)))
+
+    with ATOMIC.group_commit():
+        for name in ("a.json", "b.json", "c.json"):
+            ATOMIC.write_json(tmp_path / "x" / name, {})
+        ATOMIC.write_json(tmp_path / "y" / "d.json", {})
+        assert synced == []
+    assert sorted(synced) == [tmp_path / "x", tmp_path / "y"]
+
+    synced.clear()
+    ATOMIC.write_json(tmp_path / "x" / "a.json", {"k": 1})
+    assert synced == [tmp_path / "x"]
+
+
+def test_new_file_mode_uses_cached_umask(tmp_path: Path, monkeypatch):
+    # 不得在写入时临时把进程 umask 改为 0（多线程 UI 中其它线程会受影响）
+    def _no_umask(_mask):  # noqa: ANN001
+        raise AssertionError("os.umask called during write")
+
+    monkeypatch.setattr(ATOMIC.os, "umask", _no_umask)
+    p = tmp_path / "new.json"
+    ATOMIC.write_json(p, {"a": 1})
+    assert p.stat().st_mode & 0o777 == 0o666 & ~ATOMIC._UMASK
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+内容寻址备份库（mcp_cli.backups）与 `mcp undo` 的版本列表/恢复。
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from mcp_cli import backups as BACKUPS
+from mcp_cli import locks as LOCKS
+from mcp_cli import utils as U
+from mcp_cli.commands import undo as UNDO
+
+
+def _objects(root: Path) -> list[Path]:
+    return sorted(p for p in (root / "objects").rglob("*") if p.is_file())
+
+
+def test_backup_dedups_and_compresses_superseded(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    root = U.backup_root()
+    cfg = tmp_path / ".cursor" / "mcp.json"
+    cfg.parent.mkdir(parents=True)
+
+    cfg.write_text('{"v": 1}', encoding="utf-8")
+    b = U.backup(cfg)
+    assert b is not None and b.read_text(encoding="utf-8") == '{"v": 1}'
+    # 内容未变：不新增版本，也不新增 blob
+    U.backup(cfg)
+    assert len(BACKUPS.versions(root, cfg)) == 1
+
+    cfg.write_text('{"v": 2}', encoding="utf-8")
+    U.backup(cfg)
+    assert [r["size"] for r in BACKUPS.versions(root, cfg)] == [8, 8]
+    names = [p.name for p in _objects(root)]
+    assert sum(n.endswith(".gz") for n in names) == 1 and len(names) == 2
+    assert b.read_text(encoding="utf-8") == '{"v": 2}'
+
+    # 旧版本仍可读取（压缩 blob 透明解压）
+    old = BACKUPS.versions(root, cfg)[-1]
+    assert BACKUPS.read_blob(root, old["sha256"]) == b'{"v": 1}'
+
+    # .backup 是独立副本：原地改写它不影响备份库中的版本，权限跟随原文件
+    cfg.chmod(0o640)
+    U.backup(cfg)
+    assert b.stat().st_mode & 0o777 == 0o640
+    with open(b, "r+b") as f:
+        f.write(b"XX")
+    latest = BACKUPS.versions(root, cfg)[0]
+    assert BACKUPS.read_blob(root, latest["sha256"]) == b'{"v": 2}'
+
+
+def test_retention_budget_drops_oldest_versions(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("MCP_BACKUP_KEEP", "3")
+    root = tmp_path / "store"
+    cfg = tmp_path / "a.json"
+    for i in range(6):
+        cfg.write_text(f'{{"v": {i}}}', encoding="utf-8")
+        BACKUPS.snapshot(root, cfg)
+    recs = BACKUPS.versions(root, cfg)
+    assert [BACKUPS.read_blob(root, r["sha256"]) for r in recs] == [
+        b'{"v": 5}',
+        b'{"v": 4}',
+        b'{"v": 3}',
+    ]
+    assert len(_objects(root)) == 3
+
+
+
+def test_snapshot_keeps_running_total_and_scans_only_over_budget(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("MCP_BACKUP_MAX_BYTES", "100000")
+    root = tmp_path / "store"
+    files = [tmp_path / f"{n}.json" for n in "ab"]
+    scans = []
+    read_index = BACKUPS.read_index
+    monkeypatch.setattr(BACKUPS, "read_index", lambda r: scans.append(r) or read_index(r))
+
+    def disk_bytes() -> int:
+        return sum(p.stat().st_size for p in _objects(root))
+
+    for i in range(10):
+        for f in files:
+            f.write_text(f'{{"{f.stem}": {i}}}' + " " * 200, encoding="utf-8")
+            BACKUPS.snapshot(root, f)
+    # 首次登记（无摘要）重建一次，之后只读写摘要
+    assert len(scans) == 1
+    assert BACKUPS._load_summary(root)["bytes"] == disk_bytes()  # noqa: SLF001
+
+    # 合计超出预算：才全量扫描并淘汰，摘要随之重建
+    budget = disk_bytes()
+    monkeypatch.setenv("MCP_BACKUP_MAX_BYTES", str(budget))
+    files[0].write_text('{"a": "new"}' + " " * 200, encoding="utf-8")
+    BACKUPS.snapshot(root, files[0])
+    assert len(scans) == 2
+    assert BACKUPS._load_summary(root)["bytes"] == disk_bytes() <= budget  # noqa: SLF001
+
+    # 索引被外部改动：摘要失效并重建
+    with open(root / BACKUPS.INDEX, "a", encoding="utf-8") as fh:
+        fh.write("garbage\n")
+    BACKUPS._load_summary(root)  # noqa: SLF001
+    assert len(scans) == 3
+
+
+def test_undo_lists_and_restores_previous_version(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    cfg = tmp_path / ".gemini" / "settings.json"
+    U.save_json(cfg, {"mcpServers": {"a": {}}})
+    U.backup(cfg)
+    U.save_json(cfg, {"mcpServers": {}})
+
+    def ns(**kw):
+        base = {"backup": None, "list": False, "version": None, "dest": None}
+        return argparse.Namespace(**{**base, **kw})
+
+    assert UNDO.run(ns(list=True)) == 0
+    assert str(cfg) in capsys.readouterr().out
+
+    assert UNDO.run(ns(backup=str(cfg))) == 0
+    assert U.load_json(cfg, {}) == {"mcpServers": {"a": {}}}
+
+    # 恢复前的内容已登记：再次 undo 回到恢复前
+    assert UNDO.run(ns(backup=str(cfg))) == 0
+    assert U.load_json(cfg, {}) == {"mcpServers": {}}
+
+
+def test_restore_snapshots_and_writes_under_target_lock(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    root = U.backup_root()
+    cfg = tmp_path / "a.json"
+    cfg.write_text('{"v": 1}', encoding="utf-8")
+    rec, _ = BACKUPS.snapshot(root, cfg)
+    cfg.write_text('{"v": 2}', encoding="utf-8")
+
+    held = []
+    snapshot = BACKUPS.snapshot
+
+    def _spy(r: Path, path: Path):
+        slot = LOCKS._HELD.get(str(LOCKS.lock_path(path)))  # noqa: SLF001
+        held.append(bool(slot and slot[1]))
+        return snapshot(r, path)
+
+    monkeypatch.setattr(BACKUPS, "snapshot", _spy)
+    BACKUPS.restore(root, cfg, rec)
+    assert held == [True]
+    assert cfg.read_text(encoding="utf-8") == '{"v": 1}'
+    assert [r["sha256"] for r in BACKUPS.versions(root, cfg)][0] != rec["sha256"]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+central_cache：central 清单的解析/校验缓存（进程内 + ~/.mcp-central/cache）。
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from mcp_cli import central_cache as CACHE
+from mcp_cli import utils as U
+from mcp_cli.commands import central as CENTRAL
+
+
+@pytest.fixture
+def central_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / ".mcp-central" / "config" / "mcp-servers.json"
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setattr(U, "CENTRAL", path)
+    U.save_json(
+        path,
+        {
+            "version": "1.1.0",
+            "description": "test",
+            "servers": {"s1": {"command": "npx", "args": ["-y", "s1@latest"]}},
+        },
+    )
+    CACHE.invalidate(path)
+    return path
+
+
+def test_verdict_is_reused_across_processes(central_path: Path, monkeypatch):
+    data, ok, _ = CENTRAL._validated_central()  # noqa: SLF001
+    assert ok is True and "s1" in data["servers"]
+    assert (central_path.parent.parent / "cache" / "central.json").exists()
+
+    # 模拟新进程：清空进程内缓存，只剩磁盘上的校验结论
+    CACHE._MEM.clear()  # noqa: SLF001
+
+    def _boom(_obj):  # noqa: ANN001
+        raise AssertionError("未变化的 central 不应重新校验")
+
+    monkeypatch.setattr(CENTRAL, "_validate", _boom)
+    _, ok2, msg2 = CENTRAL._validated_central()  # noqa: SLF001
+    assert ok2 is True and msg2 == "ok"
+
+
+def test_in_process_hit_and_invalidation_on_save(central_path: Path):
+    first = CACHE.load(central_path)
+    assert first is not None
+    assert CACHE.load(central_path) is first
+
+    data = CENTRAL._load_central_or_new()  # noqa: SLF001
+    data["servers"]["s2"] = {"command": "npx"}
+    CENTRAL._save_central(data, dry=False)  # noqa: SLF001
+
+    again = CACHE.load(central_path)
+    assert again is not first
+    assert "s2" in again["data"]["servers"]
+    # 写入方为新内容预置结论，下一次编辑可走增量校验
+    assert CACHE.get_verdict(again, "central") == (True, "ok")
+
+
+def test_external_edit_with_same_stat_is_detected(central_path: Path):
+    entry = CACHE.load(central_path)
+    assert entry is not None
+    raw = central_path.read_bytes()
+    # 同长度改写（racy 窗口内 stat 可能不变）：必须按内容识别
+    changed = raw.replace(b'"s1"', b'"s9"')
+    central_path.write_bytes(changed)
+    fresh = CACHE.load(central_path)
+    assert "s9" in fresh["data"]["servers"]
+    assert json.loads(central_path.read_text(encoding="utf-8"))["servers"].keys() == {"s9"}
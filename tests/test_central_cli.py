@@ -122,3 +122,80 @@ def test_central_interactive_menu_quit():
     # 打开中央管理主菜单后直接退出
     r = subprocess.run([BIN, 'central'], input='0\n', text=True, capture_output=True, timeout=30)
     assert r.returncode == 0
+
+
+def test_central_validate_json_lists_all_errors():
+    central = Path.home() / '.mcp-central' / 'config' / 'mcp-servers.json'
+    obj = json.loads(central.read_text(encoding='utf-8'))
+    obj['servers']['bad-one'] = {'command': '', 'timeout': 0}
+    obj['servers']['bad-two'] = {'command': 'npx', 'args': [1]}
+    central.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding='utf-8')
+    r = run_cmd(['central', 'validate', '--json'])
+    assert r.returncode == 1
+    j = json.loads(r.stdout)
+    assert j['ok'] is False
+    pointers = [e['pointer'] for e in j['errors']]
+    assert '/servers/bad-one/command' in pointers
+    assert '/servers/bad-one/timeout' in pointers
+    assert '/servers/bad-two/args/0' in pointers
+
+
+def _central_path() -> Path:
+    return Path.home() / '.mcp-central' / 'config' / 'mcp-servers.json'
+
+
+def test_central_batch_applies_all_ops_with_one_write():
+    ops = "\n".join(
+        json.dumps(o)
+        for o in [
+            {"op": "add", "name": "b1", "command": "npx", "args": ["-y", "b1@latest"]},
+            {"op": "update", "name": "b1", "set_env": {"K": "V"}, "append_arg": ["--x"]},
+            {"op": "dup", "src": "b1", "dest": "b2"},
+            {"op": "disable", "name": "b2"},
+        ]
+    )
+    r = subprocess.run(
+        [BIN, 'central', 'batch', '-', '--json'],
+        input=ops, text=True, capture_output=True, timeout=30,
+    )
+    assert r.returncode == 0, r.stdout + r.stderr
+    j = json.loads(r.stdout)
+    assert j['ok'] is True and j['written'] is True
+    assert [x['ok'] for x in j['results']] == [True, True, True, True]
+    servers = json.loads(_central_path().read_text(encoding='utf-8'))['servers']
+    assert servers['b1']['env'] == {'K': 'V'}
+    assert servers['b1']['args'][-1] == '--x'
+    assert servers['b2']['enabled'] is False
+
+
+def test_central_batch_is_all_or_nothing(tmp_path):
+    before = _central_path().read_text(encoding='utf-8')
+    ops_file = tmp_path / 'ops.json'
+    ops_file.write_text(
+        json.dumps(
+            [
+                {"op": "add", "name": "c1", "command": "npx"},
+                {"op": "add", "name": "c2", "command": "npx", "timeout": 0},
+                {"op": "remove", "name": "does-not-exist"},
+            ]
+        ),
+        encoding='utf-8',
+    )
+    r = run_cmd(['central', 'batch', str(ops_file), '--json'])
+    assert r.returncode == 3
+    j = json.loads(r.stdout)
+    assert j['ok'] is False and j['written'] is False
+    # 第三个操作失败；其余操作未写入
+    assert j['results'][2]['ok'] is False and 'does-not-exist' in j['results'][2]['error']
+    assert _central_path().read_text(encoding='utf-8') == before
+
+    # 校验失败定位到对应操作（JSON pointer），同样不写入
+    ops_file.write_text(
+        json.dumps([{"op": "add", "name": "c3", "entry": {"command": "npx", "timeout": 0}}]),
+        encoding='utf-8',
+    )
+    r = run_cmd(['central', 'batch', str(ops_file), '--json'])
+    assert r.returncode == 3
+    j = json.loads(r.stdout)
+    assert j['results'][0]['pointer'] == '/servers/c3/timeout'
+    assert _central_path().read_text(encoding='utf-8') == before
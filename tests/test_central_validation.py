@@ -31,3 +31,132 @@ def test_validate_fails_fast_when_jsonschema_missing(monkeypatch):
     ok, msg = CENTRAL._validate(data)  # noqa: SLF001
     assert ok is False
     assert "timeout" in msg
+
+
+def _catalog(n: int) -> dict:
+    return {
+        "version": "1.1.0",
+        "description": "test",
+        "servers": {f"s{i}": {"command": "npx", "args": ["-y", f"p{i}@latest"]} for i in range(n)},
+    }
+
+
+def test_incremental_validation_only_checks_changed_servers(monkeypatch):
+    """基线已通过校验时，单条编辑只校验信封 + 变更条目。"""
+    from mcp_cli import validation as V
+
+    data = _catalog(50)
+    calls: list[str] = []
+    real_check = V.server_errors
+
+    def counting(name, info):  # noqa: ANN001
+        calls.append(name)
+        return real_check(name, info)
+
+    monkeypatch.setattr(V, "server_errors", counting)
+    monkeypatch.setattr(V, "_VERDICTS", {})
+
+    data["servers"]["s7"]["args"] = ["-y", "p7@next"]
+    ok, msg = V.validate_changes(data, {"s7"}, base_ok=True)
+    assert (ok, msg) == (True, "ok")
+    assert calls == ["s7"]
+
+    # 变更条目非法时必须拦截
+    data["servers"]["s7"]["timeout"] = 0
+    ok, msg = V.validate_changes(data, {"s7"}, base_ok=True)
+    assert ok is False and "timeout" in msg
+
+    # 基线未知时退回全量校验（其余条目的结论按内容摘要复用）
+    data["servers"]["s7"].pop("timeout")
+    calls.clear()
+    ok, _ = V.validate_changes(data, {"s7"}, base_ok=False)
+    assert ok is True
+    assert "s7" not in calls and len(calls) == 49
+
+
+def test_save_central_uses_incremental_validation(tmp_path, monkeypatch):
+    """经 _save_central 写入后，下一次单条编辑无需重新校验整个目录。"""
+    from mcp_cli import central_cache as CACHE
+    from mcp_cli import utils as U
+    from mcp_cli import validation as V
+    from mcp_cli.commands import central as CENTRAL
+
+    path = tmp_path / ".mcp-central" / "config" / "mcp-servers.json"
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setattr(U, "CENTRAL", path)
+    CACHE.invalidate(path)
+    CENTRAL._save_central(_catalog(20), dry=False)  # noqa: SLF001
+
+    seen: list[str] = []
+    real_check = V.server_errors
+    monkeypatch.setattr(V, "server_errors", lambda n, i: seen.append(n) or real_check(n, i))
+    monkeypatch.setattr(V, "_VERDICTS", {})
+
+    data = CENTRAL._load_central_or_new()  # noqa: SLF001
+    data["servers"]["s3"]["enabled"] = False
+    CENTRAL._save_central(data, dry=False, changed={"s3"})  # noqa: SLF001
+    assert seen == ["s3"]
+    assert U.load_json(path, {})["servers"]["s3"]["enabled"] is False
+
+
+def test_collect_errors_reports_every_problem_with_pointer():
+    """单遍校验返回全部错误（而非遇到第一处就停止），并附 JSON pointer。"""
+    from mcp_cli import validation as V
+
+    data = {
+        "version": "1.1.0",
+        "description": "test",
+        "servers": {
+            "ok": {"command": "npx"},
+            "a": {"command": "", "args": ["-y", 1], "timeout": 0},
+            "b/c": {"command": "npx", "env": {"K": 2}},
+        },
+    }
+    issues = V.collect_errors(data)
+    pointers = [p for p, _ in issues]
+    assert pointers == [
+        "/servers/a/command",
+        "/servers/a/args/1",
+        "/servers/a/timeout",
+        "/servers/b~1c/env/K",
+    ]
+    # 首条错误与 _validate 一致（CLI 提示不变）
+    from mcp_cli.commands import central as CENTRAL
+
+    assert CENTRAL._validate(data) == (False, issues[0][1])  # noqa: SLF001
+
+
+
+def test_merge_keeps_root_schema_error_unless_manual_reports_root():
+    """schema 报在根（pointer ""）的错误只在手工规则同样报在根上时才去重。"""
+    from mcp_cli import validation as V
+
+    root = ("", "Additional properties are not allowed ('junk' was unexpected)")
+    merged = V._merge([("/version", "bad")], [root])  # noqa: SLF001
+    assert merged == [("/version", "bad"), root]
+    assert V._merge([("", "配置必须是对象格式")], [root]) == [("", "配置必须是对象格式")]  # noqa: SLF001
+    # 非根路径的父/子去重不变
+    assert V._merge([("/servers/a", "x")], [("/servers/a/args", "y"), ("/servers", "z")]) == [  # noqa: SLF001
+        ("/servers/a", "x")
+    ]
+
+
+def test_bin_validation_uses_single_pass_errors():
+    """bin/mcp_validation 复用同一校验器，异常上携带全部错误。"""
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "bin"))
+    from mcp_validation import MCPConfigError, validate_central_config_format
+
+    data = {
+        "version": "1.1.0",
+        "description": "test",
+        "servers": {"a": {"args": []}, "b": {"command": "npx", "enabled": "yes"}},
+    }
+    try:
+        validate_central_config_format(data)
+    except MCPConfigError as e:
+        assert [p for p, _ in e.errors] == ["/servers/a/command", "/servers/b/enabled"]
+    else:
+        raise AssertionError("应当校验失败")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+写时复制（mcp_cli.cow）：编辑只为改动字段分配新对象，未改动条目在前/后状态与渲染视图间共享。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from mcp_cli import central_cache as CACHE
+from mcp_cli import cow as COW
+from mcp_cli import utils as U
+from mcp_cli.commands import central as CENTRAL
+
+
+def test_derive_shares_unchanged_fields():
+    before = {"command": "npx", "args": ["-y", "a@latest"], "env": {"K": "V"}, "timeout": 5}
+    after = COW.derive(before, enabled=False, timeout=COW.DELETE)
+    assert after is not before
+    assert after["args"] is before["args"] and after["env"] is before["env"]
+    assert "timeout" not in after and before["timeout"] == 5
+    assert "enabled" not in before
+
+
+def test_edit_does_not_touch_cached_state(tmp_path: Path, monkeypatch):
+    path = tmp_path / ".mcp-central" / "config" / "mcp-servers.json"
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setattr(U, "CENTRAL", path)
+    U.save_json(
+        path,
+        {
+            "version": "1.1.0",
+            "description": "test",
+            "servers": {
+                "a": {"command": "npx", "args": ["-y", "a@latest"]},
+                "b": {"command": "npx", "args": ["-y", "b@latest"]},
+            },
+        },
+    )
+    CACHE.invalidate(path)
+    cached = CACHE.load(path)["data"]
+
+    data = CENTRAL._load_central_or_new()  # noqa: SLF001
+    assert data["servers"] is not cached["servers"]
+    assert data["servers"]["b"] is cached["servers"]["b"]
+
+    COW.edit(data["servers"], "a", enabled=False)
+    assert "enabled" not in cached["servers"]["a"]
+    assert data["servers"]["a"]["args"] is cached["servers"]["a"]["args"]
+
+
+def test_render_shares_normalized_nested_objects():
+    info = {"command": "npx", "args": ["-y", "a@latest"], "env": {"K": "V"}, "source": "x"}
+    out = U.to_target_server_info(info, client="cursor")
+    assert out["args"] is info["args"] and out["env"] is info["env"]
+    # 需要转换时仍分配新对象
+    out2 = U.to_target_server_info({"command": "npx", "args": ["-y", 1]}, client="cursor")
+    assert out2["args"] == ["-y", "1"]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+握手探测（mcp_cli.handshake）与 `mcp doctor --probe`：用自带的假 stdio server 验证
+冷启动耗时、工具数与失败原因。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from mcp_cli import handshake as HANDSHAKE
+from mcp_cli import targets as TARGETS
+from mcp_cli import utils as U
+from mcp_cli.commands import doctor as DOCTOR
+
+FAKE = str(Path(__file__).parent / "fixtures" / "fake_mcp_server.py")
+
+
+def _fake(*args: str, **extra) -> dict:
+    return {"command": sys.executable, "args": [FAKE, *args], **extra}
+
+
+def test_probe_all_reports_latency_tools_and_failures():
+    servers = {
+        "ok": _fake("--tools", "5", "--page", "2", "--noise"),
+        "slow": _fake("--delay", "0.3"),
+        "hang": _fake("--delay", "30"),
+        "crash": _fake("--crash"),
+        "missing": {"command": "no-such-mcp-binary-xyz"},
+        "remote": {"url": "https://example.com/mcp"},
+    }
+    t0 = time.monotonic()
+    results = {r["name"]: r for r in HANDSHAKE.probe_all(servers, timeout=3, jobs=6)}
+    # 并发：总耗时约等于最慢的一个（超时），而不是逐个相加
+    assert time.monotonic() - t0 < 6
+
+    ok = results["ok"]
+    assert ok["status"] == "ok" and ok["tools"] == 5  # 跨分页累计，stdout 日志行被忽略
+    assert ok["server"] == "fake 0.1" and ok["protocol"] == HANDSHAKE.PROTOCOL_VERSION
+    assert 0 < ok["ready_ms"] <= ok["elapsed_ms"]
+
+    assert results["slow"]["status"] == "ok" and results["slow"]["ready_ms"] >= 300
+    assert results["hang"]["status"] == "timeout" and "initialize" in results["hang"]["error"]
+    assert results["crash"]["status"] == "failed"
+    assert "returncode=3" in results["crash"]["error"] and "missing API key" in results["crash"]["error"]
+    assert results["missing"]["status"] == "failed" and "命令未找到" in results["missing"]["error"]
+    assert results["remote"]["status"] == "skipped"
+
+
+
+def _alive(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"  # 僵尸进程视为已结束
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+@pytest.mark.skipif(os.name == "nt", reason="进程组回收仅 POSIX")
+def test_probe_reaps_grandchildren_after_wrapper_exits(tmp_path: Path):
+    """包装器（如 npx）先退出、孙进程仍在组内：结束探测时同样整组回收。"""
+    pidfile = tmp_path / "grandchild.pid"
+    script = f"sleep 30 </dev/null >/dev/null 2>&1 & echo $! > {pidfile}; exit 0"
+    res = HANDSHAKE.probe("wrapper", {"command": "sh", "args": ["-c", script]}, timeout=5)
+    assert res["status"] == "failed" and "进程已退出" in res["error"]
+    pid = int(pidfile.read_text(encoding="utf-8"))
+    deadline = time.monotonic() + 3
+    while _alive(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(pid)
+
+
+def test_doctor_probe_json(tmp_path: Path, monkeypatch, capsys):
+    central = tmp_path / ".mcp-central" / "config" / "mcp-servers.json"
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setattr(U, "CENTRAL", central)
+    TARGETS.forget()
+    U.save_json(
+        central,
+        {
+            "servers": {
+                "good": _fake("--tools", "3"),
+                "bad": _fake("--crash"),
+                "off": {**_fake(), "enabled": False},
+            }
+        },
+    )
+    args = argparse.Namespace(
+        json=True, ndjson=False, verbose=False, client=["cursor"], probe=True, probe_timeout=5
+    )
+    rc = DOCTOR.run(args)
+    out = json.loads(capsys.readouterr().out)
+    assert rc == 0 and out["status"] == "warn"
+    assert set(out["probe"]) == {"good", "bad"}  # 只探测启用条目
+    assert out["probe"]["good"]["status"] == "ok" and out["probe"]["good"]["tools"] == 3
+    assert out["probe"]["bad"]["status"] == "failed"
+
+
+@pytest.mark.parametrize("flag", [[], ["--probe"]])
+def test_doctor_without_central_skips_probe(tmp_path: Path, monkeypatch, capsys, flag):
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setattr(U, "CENTRAL", tmp_path / "missing.json")
+    TARGETS.forget()
+    args = argparse.Namespace(
+        json=True, ndjson=False, verbose=False, client=["cursor"], probe=bool(flag), probe_timeout=1
+    )
+    DOCTOR.run(args)
+    out = json.loads(capsys.readouterr().out)
+    assert ("probe" in out) == bool(flag) and not out.get("probe")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+跨进程文件写锁（mcp_cli.locks）：并发写入方不丢更新，等待时间计入统计。
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from mcp_cli import locks as LOCKS
+from mcp_cli import utils as U
+
+ROOT = Path(__file__).resolve().parents[1]
+BIN = str(ROOT / "bin" / "mcp")
+
+
+def test_lock_blocks_other_process_and_records_wait(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    target = tmp_path / ".cursor" / "mcp.json"
+    holder = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import sys, time\n"
+            f"sys.path.insert(0, {str(ROOT)!r})\n"
+            "from pathlib import Path\n"
+            "from mcp_cli import locks, utils\n"
+            f"utils.HOME = Path({str(tmp_path)!r})\n"
+            f"with locks.locked(Path({str(target)!r})):\n"
+            "    print('held', flush=True)\n"
+            "    time.sleep(0.5)\n",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert holder.stdout is not None and holder.stdout.readline().strip() == "held"
+        t0 = time.monotonic()
+        with LOCKS.locked(target):
+            waited = time.monotonic() - t0
+            # 同一线程可重入
+            with LOCKS.locked(target):
+                pass
+    finally:
+        holder.wait(timeout=10)
+    assert waited >= 0.2
+    st = LOCKS.stats()[str(target)]
+    assert st["count"] >= 1 and st["wait_max"] >= 0.2
+
+
+
+def test_symlink_and_target_share_one_lock(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    real = tmp_path / "dotfiles" / "mcp.json"
+    real.parent.mkdir()
+    real.write_text("{}", encoding="utf-8")
+    link = tmp_path / ".cursor" / "mcp.json"
+    link.parent.mkdir()
+    link.symlink_to(real)
+    # 尚不存在的文件也按解析后的目录定位
+    (tmp_path / "cfg").symlink_to(real.parent, target_is_directory=True)
+    assert LOCKS.lock_path(link) == LOCKS.lock_path(real)
+    assert LOCKS.lock_path(tmp_path / "cfg" / "new.json") == LOCKS.lock_path(real.parent / "new.json")
+    assert LOCKS.lock_path(link) != LOCKS.lock_path(tmp_path / "other.json")
+
+
+def test_concurrent_central_edits_do_not_lose_updates(tmp_path: Path):
+    procs = [
+        subprocess.Popen(
+            [BIN, "central", "add", f"par{i}", "--command", "npx", "--args", f"p{i}@latest"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for i in range(6)
+    ]
+    for p in procs:
+        _, err = p.communicate(timeout=60)
+        assert p.returncode == 0, err
+    central = tmp_path / ".mcp-central" / "config" / "mcp-servers.json"
+    servers = json.loads(central.read_text(encoding="utf-8"))["servers"]
+    assert {f"par{i}" for i in range(6)} <= set(servers)
@@ -175,3 +175,135 @@ def test_to_target_server_info_does_not_force_type_when_omitted():
     assert "type" not in U.to_target_server_info(info_remote_like, client="cursor")
     assert "type" not in U.to_target_server_info(info_remote_like, client="vscode-user")
     assert "type" not in U.to_target_server_info(info_remote_like, client="claude-file")
+
+
+def test_apply_claude_registry_only_touches_changed_entries(tmp_path, monkeypatch, capsys):
+    """Claude 注册表按差异对齐：相同条目不动，只 remove 多余、add 缺失、替换内容变化的条目。"""
+    from mcp_cli import procs as PROCS
+    from mcp_cli import utils as U
+    from mcp_cli.commands import run as RUN
+
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setenv("MCP_CLAUDE_SCOPE", "user")
+    # 串行执行以便断言调用顺序（并发路径见下一个用例）
+    monkeypatch.setenv("MCP_PROC_JOBS", "1")
+    U.save_json(
+        tmp_path / ".claude.json",
+        {
+            "mcpServers": {
+                "same": {"type": "stdio", "command": "npx", "args": ["-y", "same@latest"], "env": {}},
+                "stale": {"type": "stdio", "command": "npx", "args": ["stale"]},
+                "changed": {"type": "stdio", "command": "npx", "args": ["old"]},
+            }
+        },
+    )
+    calls = []
+
+    class _R:
+        returncode = 0
+
+    def _fake_run(cmd, **_kw):  # noqa: ANN001
+        calls.append(cmd[:4])
+        return _R()
+
+    monkeypatch.setattr(PROCS.subprocess, "run", _fake_run)
+    subset = {
+        "same": {"command": "npx", "args": ["-y", "same@latest"]},
+        "changed": {"command": "npx", "args": ["new"]},
+        "fresh": {"command": "uvx", "args": ["fresh"]},
+    }
+    assert RUN.apply_claude(subset) == 0
+    assert calls == [
+        ["claude", "mcp", "remove", "stale"],
+        ["claude", "mcp", "remove", "changed"],
+        ["claude", "mcp", "add", "--transport"],
+        ["claude", "mcp", "add", "--transport"],
+    ]
+    # 旧做法：3 次 remove + 3×(remove+add) = 9 次
+    assert "省去 5 次" in capsys.readouterr().out
+
+
+def test_apply_claude_registry_runs_serially_without_lost_writes(tmp_path, monkeypatch):
+    """claude CLI 读改写 ~/.claude.json 不加锁：即使 MCP_PROC_JOBS>1 也串行执行，不丢失写入。"""
+    import threading
+    import time
+
+    from mcp_cli import procs as PROCS
+    from mcp_cli import utils as U
+    from mcp_cli.commands import run as RUN
+
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setenv("MCP_CLAUDE_SCOPE", "user")
+    monkeypatch.setenv("MCP_PROC_JOBS", "4")
+    reg = tmp_path / ".claude.json"
+    U.save_json(reg, {"mcpServers": {"stale": {"type": "stdio", "command": "npx", "args": ["stale"]}}})
+    active = []
+    peak = []
+    guard = threading.Lock()
+
+    class _R:
+        returncode = 0
+        stdout = stderr = ""
+
+    def _fake_claude(cmd, **_kw):  # noqa: ANN001
+        with guard:
+            active.append(1)
+            peak.append(len(active))
+        obj = U.load_json(reg, {})
+        time.sleep(0.05)  # 模拟 claude CLI 无锁的读改写
+        servers = obj.setdefault("mcpServers", {})
+        if cmd[2] == "remove":
+            servers.pop(cmd[3], None)
+        else:
+            i = cmd.index("--")
+            entry = {"type": "stdio", "command": cmd[i + 1]}
+            if cmd[i + 2 :]:
+                entry["args"] = cmd[i + 2 :]
+            servers[cmd[i - 1]] = entry
+        U.save_json(reg, obj)
+        with guard:
+            active.pop()
+        return _R()
+
+    monkeypatch.setattr(PROCS.subprocess, "run", _fake_claude)
+    subset = {f"s{i}": {"command": "npx", "args": [f"s{i}"]} for i in range(4)}
+    assert RUN.apply_claude(subset) == 0
+    assert max(peak) == 1
+    assert sorted(U.load_json(reg, {})["mcpServers"]) == sorted(subset)
+
+
+def test_claude_list_cache_ttl_and_write_invalidation(monkeypatch):
+    """`claude mcp list` 结果按 scope+cwd 缓存；本工具改写注册表后立即失效。"""
+    from mcp_cli import utils as U
+    from mcp_cli.commands import ui as UI
+
+    monkeypatch.setenv("MCP_CLAUDE_SCOPE", "local")
+    monkeypatch.setenv("MCP_CLAUDE_BACKEND", "cli")
+    monkeypatch.setenv("MCP_CLAUDE_LIST_TTL", "60")
+    U.invalidate_claude_registry()
+    calls = []
+
+    class _R:
+        returncode = 0
+        stdout = "a: npx -y a - ✓ Connected\nplugin:x: y\n"
+        stderr = ""
+
+    def _fake_run(cmd, **_kw):  # noqa: ANN001
+        calls.append(cmd[2])
+        return _R()
+
+    monkeypatch.setattr(U.subprocess, "run", _fake_run)
+    assert U._claude_registered() == {"a"}
+    assert U._claude_registered() == {"a"}
+    assert calls == ["list"]
+
+    # 经 UI 改写注册表后缓存失效
+    assert UI._sync_claude_registry("b", {"command": "npx"}, True) == []
+    assert U._claude_registered() == {"a"}
+    assert calls == ["list", "add", "list"]
+
+    monkeypatch.setenv("MCP_CLAUDE_LIST_TTL", "0")
+    U.invalidate_claude_registry()
+    U._claude_registered()
+    U._claude_registered()
+    assert calls.count("list") == 4
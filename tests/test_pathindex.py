@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+PATH 索引（mcp_cli.pathindex）：一次扫描 PATH、跨进程复用索引，目录变化即失效，结果与 shutil.which 一致。
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from mcp_cli import pathindex as PATHS
+from mcp_cli import utils as U
+
+
+@pytest.fixture
+def bins(tmp_path: Path, monkeypatch) -> tuple[Path, Path]:
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    monkeypatch.setenv("PATH", f"{a}{os.pathsep}{b}")
+    PATHS.forget()
+    yield a, b
+    PATHS.forget()
+
+
+def _exe(p: Path, mode: int = 0o755) -> Path:
+    p.write_text("#!/bin/sh\n", encoding="utf-8")
+    p.chmod(mode)
+    return p
+
+
+def _age(d: Path, seconds: int = 60) -> None:
+    """把目录 mtime 调到过去，避开 racy 窗口（否则不写磁盘缓存）。"""
+    st = d.stat()
+    os.utime(d, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def test_which_scans_once_and_matches_shutil(bins):
+    a, b = bins
+    _exe(a / "tool", 0o644)  # 不可执行：跳过，落到 b
+    _exe(b / "tool")
+    _exe(b / "other")
+    (a / "sub").mkdir()
+    _age(a)
+    _age(b)
+
+    before = PATHS.stats()["scans"]
+    for name in ["tool", "other", "sub", "missing"] * 50:
+        assert PATHS.which(name) == shutil.which(name)
+    assert PATHS.stats()["scans"] - before == 1
+    assert PATHS.resolved() == {
+        "tool": str(b / "tool"),
+        "other": str(b / "other"),
+        "sub": None,
+        "missing": None,
+    }
+    assert PATHS.command_exists(str(b / "tool")) and not PATHS.command_exists(str(a / "tool"))
+
+    # 新进程：按 PATH 与目录签名命中磁盘缓存，不再列目录
+    PATHS.forget()
+    before = PATHS.stats()
+    assert PATHS.which("tool") == str(b / "tool")
+    after = PATHS.stats()
+    assert after["scans"] == before["scans"] and after["disk_hits"] == before["disk_hits"] + 1
+
+    # chmod +x 不改变目录 mtime：可执行位在查找时检查
+    (a / "tool").chmod(0o755)
+    assert PATHS.which("tool") == str(a / "tool")
+
+    # 目录新增文件（mtime 变化）后重新扫描
+    PATHS.forget()
+    _exe(a / "fresh")
+    assert PATHS.which("fresh") == str(a / "fresh")
+    assert PATHS.stats()["scans"] == after["scans"] + 1
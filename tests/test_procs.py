@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+外部命令执行器（mcp_cli.procs）：有界并行、同 key 串行、暂时性失败重试、总截止时间。
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+from mcp_cli import procs as PROCS
+
+
+def _py(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+def test_parallel_wall_time_close_to_slowest_call():
+    tasks = [(f"s{i}", _py("import time; time.sleep(0.4)"), 10) for i in range(4)]
+    t0 = time.monotonic()
+    results = PROCS.run_all(tasks, jobs=4)
+    elapsed = time.monotonic() - t0
+    assert [r["key"] for r in results] == ["s0", "s1", "s2", "s3"]
+    assert all(r["ok"] and r["attempts"] == 1 for r in results)
+    # 串行需要 ≥1.6s；并行应接近单条耗时
+    assert elapsed < 1.2
+
+
+def test_same_key_runs_in_order(tmp_path: Path):
+    log = tmp_path / "log.txt"
+    append = "import sys; open(sys.argv[1], 'a').write(sys.argv[2] + chr(10))"
+    tasks = [
+        ("a", _py("import time; time.sleep(0.3)"), 10),
+        ("a", _py(append) + [str(log), "a-add"], 10),
+        ("b", _py(append) + [str(log), "b-add"], 10),
+    ]
+    results = PROCS.run_all(tasks, jobs=2)
+    assert all(r["ok"] for r in results)
+    # b 与 a 并行，不必等待 a 的第一条命令；a 的第二条必须在第一条之后
+    assert log.read_text(encoding="utf-8").split() == ["b-add", "a-add"]
+
+
+def test_retries_transient_failure_only(tmp_path: Path):
+    marker = tmp_path / "seen"
+    flaky = (
+        "import pathlib, sys; p = pathlib.Path(sys.argv[1])\n"
+        "if not p.exists():\n"
+        "    p.write_text('x'); sys.stderr.write('config file is locked'); sys.exit(1)\n"
+    )
+    r = PROCS.run_one(_py(flaky) + [str(marker)], 10, retries=2)
+    assert r["ok"] and r["attempts"] == 2 and r["returncode"] == 0
+
+    hard = PROCS.run_one(_py("import sys; sys.stderr.write('bad args'); sys.exit(2)"), 10, retries=2)
+    assert not hard["ok"] and hard["attempts"] == 1
+    assert hard["returncode"] == 2 and PROCS.failure_text(hard) == "bad args"
+
+    missing = PROCS.run_one([str(tmp_path / "no-such-cli")], 10, retries=2)
+    assert not missing["ok"] and missing["attempts"] == 1 and missing["returncode"] is None
+
+
+def test_overall_deadline_stops_remaining_work():
+    tasks = [("a", _py("import time; time.sleep(5)"), 30), ("a", _py("pass"), 30)]
+    t0 = time.monotonic()
+    first, second = PROCS.run_all(tasks, jobs=1, deadline=0.5, retries=0)
+    assert time.monotonic() - t0 < 3
+    assert first["error"] == "timeout" and not first["ok"]
+    assert second["error"] == "deadline" and second["attempts"] == 0
+
+
+def test_mutating_command_not_retried_on_timeout(tmp_path: Path):
+    log = tmp_path / "log.txt"
+    slow = "import sys, time; open(sys.argv[1], 'a').write('x'); time.sleep(2)"
+    # `<cli> mcp add` 超时后可能已生效：不重试
+    add = PROCS.run_one(_py(slow) + [str(log), "mcp", "add", "a"], 0.5, retries=2)
+    assert add["error"] == "timeout" and add["attempts"] == 1
+    # 只读命令超时仍按暂时性错误重试
+    ls = PROCS.run_one(_py(slow) + [str(log), "mcp", "list"], 0.5, retries=1)
+    assert ls["error"] == "timeout" and ls["attempts"] == 2
+    assert log.read_text(encoding="utf-8") == "xxx"
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+ServerSpec：解析一次、规范哈希比较、按客户端记忆化渲染。
+"""
+
+from __future__ import annotations
+
+from mcp_cli import spec as SPEC
+from mcp_cli import utils as U
+
+
+def test_digest_ignores_key_order_and_metadata():
+    a = SPEC.ServerSpec("s", {"command": "npx", "args": ["-y", "x"], "enabled": True})
+    b = SPEC.ServerSpec("s", {"args": ["-y", "x"], "command": "npx", "source": "imported:cursor"})
+    c = SPEC.ServerSpec("s", {"command": "npx", "args": ["-y", "y"]})
+    assert a == b and a.digest == b.digest
+    assert a != c
+    assert not hasattr(a, "__dict__")
+
+
+def test_render_is_memoized_per_client_and_matches_targets():
+    info = {"command": "npx", "args": ["-y", "x"], "type": "stdio", "enabled": True}
+    s = SPEC.ServerSpec("s", info)
+    cursor = s.render("cursor")
+    assert cursor is s.render("cursor")
+    assert cursor == U.to_target_server_info(info, client="cursor")
+    assert cursor["type"] == "local" and "type" not in s.render("gemini")
+    # 目标端键顺序不同也视为一致
+    assert s.matches({"type": "local", "args": ["-y", "x"], "command": "npx"}, "cursor")
+    assert not s.matches({"command": "npx"}, "cursor")
+
+
+def test_load_specs_parses_once_per_servers_object():
+    servers = {"a": {"command": "npx"}, "b": {"command": "npx", "enabled": False}}
+    first = SPEC.load_specs(servers)
+    assert SPEC.load_specs(servers) is first
+    assert SPEC.split_enabled(first) == (["a"], ["b"])
+
+
+def test_render_cache_is_shared_and_keyed_by_content_and_client(monkeypatch):
+    from mcp_cli import targets as TARGETS
+
+    calls: list[str | None] = []
+    real = U.to_target_server_info
+
+    def counting(info, client=None):
+        calls.append(client)
+        return real(info, client=client)
+
+    monkeypatch.setattr(U, "to_target_server_info", counting)
+    servers = {
+        "a": {"command": "npx", "args": ["-y", "a"], "type": "stdio"},
+        "b": {"command": "uvx", "args": ["b"], "client_overrides": {"cursor": {"args": ["b2"]}}},
+    }
+    specs = SPEC.load_specs(servers)
+    cursor = TARGETS.get("cursor")
+    first = {n: cursor.render(info) for n, info in servers.items()}
+    assert len(calls) == 2
+    # 不同写入方（ServerSpec / 适配器 / 内容相同的副本、仅 enabled 不同）共用同一渲染结果
+    assert specs["a"].render("cursor") is first["a"]
+    assert cursor.render({**servers["b"], "enabled": False}) is first["b"]
+    assert first["b"]["args"] == ["b2"] and first["a"]["type"] == "local"
+    # 另一个客户端对同一内容只渲染一次
+    gemini = [TARGETS.get("gemini").render(servers["a"]) for _ in range(3)]
+    assert calls.count("gemini") == 1 and "type" not in gemini[0]
+    # 只改动一个条目（UI 开关后的新 dict）时只重新渲染这一个
+    calls.clear()
+    edited = {**servers, "a": {**servers["a"], "args": ["-y", "a@2"]}}
+    for info in edited.values():
+        cursor.render(info)
+    assert calls == ["cursor"]
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+目标端观测状态（mcp_cli.state）：state.json 按文件指纹跨进程复用读取结果，文件变化即重新读取。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from mcp_cli import state as STATE
+from mcp_cli import targets as TARGETS
+from mcp_cli import utils as U
+
+
+@pytest.fixture
+def home(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setenv("MCP_CLAUDE_SCOPE", "user")
+    TARGETS.forget()
+    return tmp_path
+
+
+def _new_process() -> None:
+    """模拟新进程：丢弃进程内的快照与 state.json 副本。"""
+    TARGETS.forget()
+    STATE._MEM.update(sig=None, path=None, data=None)
+
+
+def _age(p: Path, seconds: int = 60) -> None:
+    """把 mtime 调到过去，避开 racy 窗口（模拟“很久以前写入”的文件）。"""
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def test_observe_reuses_value_until_fingerprint_changes(home: Path):
+    f = home / "a.json"
+    f.write_text('{"x": 1}', encoding="utf-8")
+    _age(f)
+    calls: list[int] = []
+
+    def compute() -> list[str]:
+        calls.append(1)
+        return sorted(json.loads(f.read_text(encoding="utf-8")))
+
+    assert STATE.observe("k", [f, home / "missing.json"], compute) == ["x"]
+    _new_process()
+    assert STATE.observe("k", [f, home / "missing.json"], compute) == ["x"]
+    assert len(calls) == 1
+    assert "k" in json.loads((home / ".mcp-central" / "state.json").read_text(encoding="utf-8"))["views"]
+
+    # 依赖文件出现/内容变化都会重新读取
+    (home / "missing.json").write_text("{}", encoding="utf-8")
+    STATE.observe("k", [f, home / "missing.json"], compute)
+    assert len(calls) == 2
+
+    # racy：刚写入的文件被同一 mtime、同样大小的内容改写（inode 不变），按内容哈希识别
+    f.write_text('{"z": 1}', encoding="utf-8")
+    assert STATE.observe("k", [f, home / "missing.json"], compute) == ["z"]
+    st = f.stat()
+    f.write_text('{"y": 1}', encoding="utf-8")
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert f.stat().st_ino == st.st_ino and f.stat().st_size == st.st_size
+    assert STATE.observe("k", [f, home / "missing.json"], compute) == ["y"]
+
+
+def test_warm_status_views_skip_parsing(home: Path):
+    U.save_json(home / ".claude" / "settings.json", {"mcpServers": {"a": {"command": "x"}}})
+    U.save_json(home / ".cursor" / "mcp.json", {"mcpServers": {"c": {"command": "x"}}})
+    for p in (home / ".claude" / "settings.json", home / ".cursor" / "mcp.json"):
+        _age(p)
+
+    cold = {key: fn() for key, _label, fn in TARGETS.views()}
+    assert cold["claude-file"] == cold["claude-reg"] == {"a"} and cold["cursor"] == {"c"}
+
+    _new_process()
+    before = TARGETS.stats()["parses"]
+    warm = {key: fn() for key, _label, fn in TARGETS.views()}
+    assert warm == cold
+    assert TARGETS.stats()["parses"] == before  # 无变化：只 stat，不解析任何目标文件
+
+    # 经适配器写入后（inode/mtime 变化）立即反映
+    assert TARGETS.get("cursor").toggle("d", {"command": "npx"})
+    assert TARGETS.present("cursor") == {"c", "d"}
@@ -110,6 +110,20 @@ class TestSyncOperations:
         assert result is True
         assert mock_config_path.write_text.called
 
+    @patch('mcp_auto_sync.SERVERS', {'test': {'command': 'npx', 'args': ['test']}})
+    def test_sync_json_map_skips_unchanged(self, tmp_path):
+        """Re-syncing identical content neither backs up nor rewrites the file."""
+        from mcp_auto_sync import sync_json_map
+
+        p = tmp_path / 'mcp.json'
+        with patch('mcp_auto_sync.backup') as mock_backup:
+            assert sync_json_map('Cursor', p, key_client='cursor') is True
+            st = p.stat()
+            mock_backup.reset_mock()
+            assert sync_json_map('Cursor', p, key_client='cursor') is True
+        assert not mock_backup.called
+        assert (p.stat().st_ino, p.stat().st_mtime_ns) == (st.st_ino, st.st_mtime_ns)
+
 
 class TestErrorRecovery:
     """Tests for error recovery in sync operations."""
@@ -144,3 +158,27 @@ class TestErrorRecovery:
         # Should return empty set on error
         assert isinstance(result, set)
         assert len(result) == 0
+
+    def test_sync_claude_cmd_runs_claude_adds_serially(self, monkeypatch, capsys):
+        """claude CLI 读改写不加锁：缺失项经 procs 串行补齐（任一 scope），执行失败计入结果。"""
+        import mcp_auto_sync as S
+
+        if S._PROCS is None:
+            pytest.skip("mcp_cli.procs 不可用")
+        monkeypatch.setattr(S, 'SERVERS', {n: {'command': 'npx', 'args': [n]} for n in 'abc'})
+        monkeypatch.setattr(S, '_claude_scope', lambda: 'local')
+        monkeypatch.setattr(S, '_claude_native', lambda scope: None)
+        monkeypatch.setattr(S, 'claude_registered', lambda: set())
+        calls = []
+
+        def _run_all(tasks, jobs=None, **_kw):
+            calls.append(([t[0] for t in tasks], jobs))
+            return [
+                {'key': t[0], 'ok': t[0] != 'c', 'returncode': None if t[0] == 'c' else 0, 'error': 'timeout'}
+                for t in tasks
+            ]
+
+        monkeypatch.setattr(S._PROCS, 'run_all', _run_all)
+        assert S.sync_claude_cmd() is False
+        assert calls == [(['a', 'b', 'c'], 1)]
+        assert 'Claude 同步 c 失败: timeout' in capsys.readouterr().out
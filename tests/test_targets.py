@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+目标端适配器注册表（mcp_cli.targets）：快照缓存只解析一次、toggle/apply/diff 行为一致。
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from mcp_cli import backups as BACKUPS
+from mcp_cli import targets as TARGETS
+from mcp_cli import utils as U
+from mcp_cli.commands import run as RUN
+
+
+@pytest.fixture
+def home(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setenv("MCP_CLAUDE_SCOPE", "user")
+    TARGETS.forget()
+    return tmp_path
+
+
+def test_snapshot_parses_each_file_once(home: Path):
+    U.save_json(home / ".claude" / "settings.json", {"mcpServers": {"a": {"command": "x"}}})
+    before = TARGETS.stats()["parses"]
+    # claude-file 与 claude-reg（user scope）读取同一文件；多次遍历仍只解析一次
+    for _ in range(3):
+        views = {key: fn() for key, _label, fn in TARGETS.views()}
+    assert views["claude-file"] == views["claude-reg"] == {"a"}
+    # settings.json + ~/.claude.json 不存在，其余目标文件均缺失：仅解析一次
+    assert TARGETS.stats()["parses"] - before == 1
+
+    # 内容变化（即使同一秒内、大小相同）会重新解析
+    U.save_json(home / ".claude" / "settings.json", {"mcpServers": {"b": {"command": "x"}}})
+    assert TARGETS.get("claude").names() == {"b"}
+
+
+def test_gemini_toggle_keeps_allowed_and_skips_noop(home: Path):
+    p = home / ".gemini" / "settings.json"
+    U.save_json(p, {"theme": "dark", "mcpServers": {}})
+    g = TARGETS.get("gemini")
+    info = {"command": "npx", "args": ["-y", "ctx@latest"], "type": "stdio", "enabled": True}
+
+    assert g.toggle("ctx", info) is True
+    shared = g.read()
+    assert shared["theme"] == "dark" and shared["mcp"]["allowed"] == ["ctx"]
+    assert "type" not in shared["mcpServers"]["ctx"]
+
+    # 内容未变：不落盘
+    st = os.stat(p)
+    assert g.toggle("ctx", info) is False
+    assert os.stat(p).st_ino == st.st_ino
+
+    assert g.diff({"ctx": info}) == {"add": [], "remove": [], "change": []}
+    assert g.toggle("ctx", None) is True
+    assert g.read()["mcp"]["allowed"] == [] and "ctx" in shared["mcpServers"]
+
+
+def test_codex_apply_toggle_and_entry(home: Path):
+    p = home / ".codex" / "config.toml"
+    p.parent.mkdir(parents=True)
+    p.write_text('model = "o3"\n', encoding="utf-8")
+    c = TARGETS.get("codex")
+    spec_a = {"command": "npx", "args": ["-y", "a"], "env": {"K": "v"}, "timeout": 30}
+    assert c.apply({"a": spec_a}) is True
+    assert c.apply({"a": spec_a}) is False
+    assert c.names() == {"a"}
+    assert c.entry("a") == {"command": "npx", "args": ["-y", "a"], "env": {"K": "v"}, "timeout": 30}
+
+    assert c.toggle("b", {"command": "uvx", "args": ["b"]}) is True
+    assert c.names() == {"a", "b"}
+    assert c.diff({"a": {"command": "npx", "args": ["-y", "a"], "env": {"K": "v"}, "timeout": 30}}) == {
+        "add": [],
+        "remove": ["b"],
+        "change": [],
+    }
+    assert c.toggle("a", None) is True
+    text = p.read_text(encoding="utf-8")
+    assert text.startswith('model = "o3"') and "[mcp_servers.a" not in text
+
+
+def test_apply_skips_unchanged_file(home: Path):
+    p = home / ".cursor" / "mcp.json"
+    U.save_json(p, {"keep": 1, "mcpServers": {}})
+    cur = TARGETS.get("cursor")
+    subset = {"a": {"command": "npx", "args": ["-y", "a"], "type": "stdio"}}
+    assert cur.apply(subset) is True
+    st = os.stat(p)
+    versions = BACKUPS.versions(U.backup_root(), p)
+
+    # 再次下发相同集合：不备份、不改写，mtime/inode 不变
+    assert cur.apply(dict(reversed(list(subset.items())))) is False
+    assert (os.stat(p).st_ino, os.stat(p).st_mtime_ns) == (st.st_ino, st.st_mtime_ns)
+    assert BACKUPS.versions(U.backup_root(), p) == versions
+
+
+def test_aliases_and_unknown_client():
+    assert TARGETS.get("vscode-ins").key == "vscode-insiders"
+    assert TARGETS.view_key("claude") == "claude-file"
+    assert TARGETS.resolve("nope") is None
+    with pytest.raises(ValueError):
+        TARGETS.get("nope")
+
+
+def test_claude_local_and_project_scope_native_backend(home: Path, monkeypatch):
+    from mcp_cli import procs as PROCS
+    from mcp_cli.commands import clear as CLEAR
+    from mcp_cli.commands import run as RUN
+
+    proj = home / "proj"
+    proj.mkdir()
+    monkeypatch.chdir(proj)
+    key = str(Path.cwd())
+    other = {"mcpServers": {"z": {"type": "stdio", "command": "z", "args": [], "env": {}}}}
+    U.save_json(
+        home / ".claude.json",
+        {"numStartups": 3, "projects": {key: {"allowedTools": []}, "/other": other}},
+    )
+    calls = []
+    monkeypatch.setattr(PROCS.subprocess, "run", lambda *a, **_kw: calls.append(a))
+    c = TARGETS.get("claude")
+
+    # local scope：直接改写 projects[<cwd>].mcpServers，不调用 claude CLI
+    monkeypatch.setenv("MCP_CLAUDE_SCOPE", "local")
+    assert c.native_registry("local")
+    assert RUN.apply_claude({"a": {"command": "npx", "args": ["-y", "a"], "env": {"K": "v"}}}) == 0
+    obj = U.load_json(home / ".claude.json", {})
+    assert obj["numStartups"] == 3 and obj["projects"]["/other"] == other
+    assert obj["projects"][key] == {
+        "allowedTools": [],
+        "mcpServers": {"a": {"type": "stdio", "command": "npx", "args": ["-y", "a"], "env": {"K": "v"}}},
+    }
+    assert U._claude_registered() == c.registered() == {"a"}
+    CLEAR._clear_claude_registry()
+    assert U.load_json(home / ".claude.json", {})["projects"][key]["mcpServers"] == {}
+
+    # project scope：./.mcp.json
+    monkeypatch.setenv("MCP_CLAUDE_SCOPE", "project")
+    assert c.write_registry("project", {"b": c.registry_entry({"command": "uvx", "args": ["b"]})})
+    assert not c.write_registry("project", {"b": c.registry_entry({"command": "uvx", "args": ["b"]})})
+    assert U.load_json(proj / ".mcp.json", {})["mcpServers"]["b"]["command"] == "uvx"
+    assert U._claude_registered() == {"b"}
+    assert calls == []
+
+    # 文件无法解析或显式要求时回退 claude CLI
+    (proj / ".mcp.json").write_text("{oops", encoding="utf-8")
+    assert not c.native_registry("project")
+    monkeypatch.setenv("MCP_CLAUDE_BACKEND", "cli")
+    assert not c.native_registry("local")
+
+
+def test_probe_views_concurrent_with_deadline(home: Path, monkeypatch):
+    import json
+    import time
+    from argparse import Namespace
+    from contextlib import redirect_stdout
+    from io import StringIO
+
+    from mcp_cli.commands import doctor as DOCTOR
+
+    def _slow() -> set[str]:
+        time.sleep(3)
+        return {"late"}
+
+    def _fast(names: set[str], delay: float):
+        def fn() -> set[str]:
+            time.sleep(delay)
+            return names
+
+        return fn
+
+    def _boom() -> set[str]:
+        raise RuntimeError("bad file")
+
+    fake = [
+        ("claude-reg", "Claude(register)", _slow),
+        ("cursor", "Cursor", _fast({"a"}, 0.2)),
+        ("codex", "Codex", _fast({"b"}, 0.2)),
+        ("gemini", "Gemini", _boom),
+    ]
+    monkeypatch.setattr(TARGETS, "views", lambda: fake)
+
+    t0 = time.monotonic()
+    rows = list(TARGETS.probe_views(deadline=0.6))
+    assert time.monotonic() - t0 < 1.5  # 并发：不是 0.2+0.2+3 的串行总和，也不等慢探测
+    by_key = {r["key"]: r for r in rows}
+    assert rows[-1]["key"] == "claude-reg" and by_key["claude-reg"]["status"] == "timeout"
+    assert by_key["cursor"]["present"] == {"a"} and by_key["codex"]["status"] == "ok"
+    assert by_key["gemini"]["status"] == "error" and "bad file" in by_key["gemini"]["error"]
+
+    # doctor --ndjson：每个目标端一行（按完成顺序），末行为汇总
+    buf = StringIO()
+    with redirect_stdout(buf):
+        DOCTOR.run(Namespace(ndjson=True, deadline=0.6, client=None, verbose=False))
+    lines = [json.loads(x) for x in buf.getvalue().splitlines()]
+    assert [x["type"] for x in lines] == ["target"] * 4 + ["summary"]
+    assert lines[0]["key"] == "gemini" and lines[3]["key"] == "claude-reg"
+    assert lines[3]["timeout"] is True and lines[-1]["status"] in ("warn", "failed")
+
+
+def test_drift_reports_changed_fields_only(home: Path, monkeypatch):
+    central = home / ".mcp-central" / "config" / "mcp-servers.json"
+    monkeypatch.setattr(U, "CENTRAL", central)
+    servers = {
+        "a": {"command": "npx", "args": ["-y", "a"], "env": {"K": "v"}},
+        "b": {"command": "uvx", "args": ["b"]},
+        "off": {"command": "x", "enabled": False},
+    }
+    U.save_json(central, {"servers": servers})
+    for key in ("cursor", "codex"):
+        adapter = TARGETS.get(key)
+        adapter.apply({n: adapter.render(servers[n]) for n in ("a", "b")})
+        assert RUN.target_drift(key, servers) == {}
+
+    # 目标端被手改：只报告不一致的条目与字段
+    cur = home / ".cursor" / "mcp.json"
+    data = U.load_json(cur, {})
+    data["mcpServers"]["a"]["args"] = ["-y", "a@old"]
+    data["mcpServers"]["a"]["env"] = {"K": "x"}
+    U.save_json(cur, data)
+    assert RUN.target_drift("cursor", servers) == {"a": ["args", "env"]}
+
+    # central 变化（指纹失效）后重新比对
+    servers["b"]["args"] = ["b", "--new"]
+    U.save_json(central, {"servers": servers})
+    assert RUN.target_drift("codex", servers) == {"b": ["args"]}
+    assert RUN.target_drift("cursor", servers) == {"a": ["args", "env"], "b": ["args"]}
+
+
+def test_snapshot_stats_exact_under_threads(home: Path):
+    import sys
+    import threading
+
+    p = home / ".cursor" / "mcp.json"
+    U.save_json(p, {"mcpServers": {}})
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns - 60_000_000_000))
+    TARGETS.snapshot(p)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # 放大线程切换，暴露计数竞争
+    before = TARGETS.stats()
+
+    def _read() -> None:
+        for _ in range(2000):
+            TARGETS.snapshot(p)
+
+    threads = [threading.Thread(target=_read) for _ in range(8)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    after = TARGETS.stats()
+    assert after["hits"] - before["hits"] == 8 * 2000 and after["parses"] == before["parses"]
+
+
+def test_drift_follows_local_binary_availability(home: Path, monkeypatch):
+    central = home / ".mcp-central" / "config" / "mcp-servers.json"
+    monkeypatch.setattr(U, "CENTRAL", central)
+    servers = {"a": {"command": "npx", "args": ["-y", "a@latest", "--flag"]}}
+    U.save_json(central, {"servers": servers})
+    exe = home / ".mcp-local" / "bin" / "a"
+    exe.parent.mkdir(parents=True)
+    exe.write_text("#!/bin/sh\n", encoding="utf-8")
+    exe.chmod(0o755)
+    U.save_json(home / ".mcp-local" / "resolved.json", {"a": str(exe)})
+
+    cur = TARGETS.get("cursor")
+    cur.apply(RUN._apply_local_override(servers, client="cursor"))
+    assert cur.entry("a")["command"] == str(exe)
+    assert RUN.target_drift("cursor", servers) == {}
+
+    # 本地二进制失去可执行位（不改变任何依赖文件的指纹）：期望条目回退到 npx，应报告漂移
+    exe.chmod(0o644)
+    assert RUN.target_drift("cursor", servers) == {"a": ["args", "command"]}
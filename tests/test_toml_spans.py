@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Codex config.toml 区间索引编辑（mcp_cli.toml_spans）：只删除目标表，其余内容逐字节保留。
+"""
+
+from __future__ import annotations
+
+import tomllib
+
+from mcp_cli import toml_spans as TOML
+from mcp_cli import targets as TARGETS
+
+USER_HEAD = (
+    'model = "o3"\r\n'
+    'notes = """\n'
+    "[mcp_servers.not_a_table]\n"
+    '"""\n'
+    "matrix = [\n"
+    "  [1, 2],\n"
+    "[3, 4],\n"
+    "]\n"
+    "\n"
+    "[profiles.fast]  # 用户自己的表\n"
+    'model = "o4-mini"\n'
+)
+
+MANAGED = (
+    "\n"
+    f"{TARGETS.CodexAdapter.HEADER}\n"
+    "\n"
+    "[mcp_servers.a]\n"
+    'command = "npx"\n'
+    'args = ["-y", "a"]\n'
+    "\n"
+    '[mcp_servers."my.server"]\n'
+    'command = "uvx"\n'
+    "\n"
+    '[mcp_servers."my.server".env]\n'
+    'TOKEN = "x"\n'
+)
+
+USER_TAIL = "\n[[profiles.list]]\nname = 'later'\n"
+
+
+def test_strip_managed_keeps_everything_else_byte_for_byte():
+    text = USER_HEAD + MANAGED + USER_TAIL
+    out = TOML.strip_managed(text)
+    # 多行字符串/跨行数组内的 `[...]` 行不被当作表头；其后的用户表不被吞掉
+    assert out.startswith(USER_HEAD)
+    assert out.endswith(USER_TAIL)
+    assert "mcp_servers.a" not in out and "my.server" not in out
+    before = tomllib.loads(text)
+    before.pop("mcp_servers")
+    assert tomllib.loads(out) == before
+
+
+def test_server_names_and_strip_single_server():
+    text = USER_HEAD + MANAGED + USER_TAIL
+    assert TOML.server_names(text) == {"a", "my.server"}
+
+    out = TOML.strip_servers(text, ["my.server"])
+    assert TOML.server_names(out) == {"a"}
+    assert out.startswith(USER_HEAD) and out.endswith(USER_TAIL)
+    assert tomllib.loads(out)["mcp_servers"] == {"a": {"command": "npx", "args": ["-y", "a"]}}
+
+
+def test_strip_server_removes_marker_line():
+    block = TARGETS.get("codex").render_block("b", {"command": "npx"})
+    text = 'model = "o3"\n' + block
+    assert "# === MCP Server: b" in text
+    assert TOML.strip_servers(text, ["b"]) == 'model = "o3"\n'
+    # 未命中的 server 不改动文本
+    assert TOML.strip_servers(text, ["zzz"]) is text
+
+
+def test_splice_merges_overlapping_spans():
+    assert TOML.splice("0123456789", [(6, 8), (1, 3), (2, 4)]) == "04589"
+
+
+def test_scan_text_without_tables():
+    assert TOML.scan('model = "o3"\n') == {"tables": [], "comments": []}
+    assert TOML.strip_managed("") == ""
@@ -1,11 +1,13 @@
 import json
 import threading
+import time
 import urllib.error
 import urllib.request
 from pathlib import Path
 
 import pytest
 
+from mcp_cli import procs as PROCS
 from mcp_cli import utils as U
 from mcp_cli.commands import ui as UI
 
@@ -180,7 +182,7 @@ def test_ui_targets_remove_everywhere(tmp_path: Path, monkeypatch: pytest.Monkey
     def _fake_run(*_a, **_kw):  # noqa: ANN001
         raise FileNotFoundError("fake")
 
-    monkeypatch.setattr(UI.subprocess, "run", _fake_run)
+    monkeypatch.setattr(PROCS.subprocess, "run", _fake_run)
 
     cursor_path = home / ".cursor" / "mcp.json"
     U.save_json(cursor_path, {"mcpServers": {"x": {"command": "npx", "args": ["-y", "x@latest"]}}})
@@ -212,3 +214,117 @@ def test_ui_targets_remove_everywhere(tmp_path: Path, monkeypatch: pytest.Monkey
     finally:
         srv.shutdown()
         srv.server_close()
+
+
+def test_ui_toggle_batch_writes_each_target_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    home = tmp_path
+    monkeypatch.setattr(U, "HOME", home)
+    monkeypatch.setattr(U, "CENTRAL", home / ".mcp-central" / "config" / "mcp-servers.json")
+    servers = {n: {"enabled": True, "command": "npx", "args": ["-y", f"{n}@latest"]} for n in "abc"}
+    servers["off"] = {"enabled": False, "command": "npx"}
+    U.save_json(U.CENTRAL, {"version": "1.1.0", "description": "test", "servers": servers})
+    cursor_path = home / ".cursor" / "mcp.json"
+    U.save_json(cursor_path, {"mcpServers": {"stale": {"command": "x"}}})
+    codex_path = home / ".codex" / "config.toml"
+    codex_path.parent.mkdir(parents=True)
+    codex_path.write_text('model = "o3"\n', encoding="utf-8")
+
+    backups: list[str] = []
+    real_backup = U.backup
+    monkeypatch.setattr(U, "backup", lambda p: (backups.append(Path(p).name), real_backup(p))[1])
+
+    token = "test-token"
+    srv = UI.create_server("127.0.0.1", 0, token=token)
+    th = threading.Thread(target=srv.serve_forever, daemon=True)
+    th.start()
+    try:
+        base = f"http://127.0.0.1:{srv.server_address[1]}"
+        changes = [{"client": "cursor", "server": n, "on": True} for n in "abc"]
+        changes += [
+            {"client": "cursor", "server": "stale", "on": False},
+            {"client": "codex", "server": "a", "on": True},
+            {"client": "codex", "server": "b", "on": True},
+            {"client": "cursor", "server": "off", "on": True},
+            {"client": "nope", "server": "a", "on": True},
+        ]
+        res = _http_json(base + "/api/toggle-batch", token, method="POST", payload={"changes": changes})
+        assert res["ok"] is True and res["failed"] == 2
+        rows = res["results"]
+        assert [r["server"] for r in rows] == ["a", "b", "c", "stale", "a", "b", "off", "a"]
+        assert all(r["ok"] and r["changed"] for r in rows[:6])
+        assert not rows[6]["ok"] and "已禁用" in rows[6]["error"]
+        assert not rows[7]["ok"]
+
+        # 每个目标文件只备份/写入一次
+        assert sorted(backups) == ["config.toml", "mcp.json"]
+        assert set(json.loads(cursor_path.read_text(encoding="utf-8"))["mcpServers"]) == {"a", "b", "c"}
+        assert UI.TARGETS.get("codex").names() == {"a", "b"}
+
+        with pytest.raises(urllib.error.HTTPError):
+            _http_json(base + "/api/toggle-batch", token, method="POST", payload={"changes": []})
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_ui_rapid_toggles_coalesce_into_one_write(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    home = tmp_path
+    monkeypatch.setattr(U, "HOME", home)
+    monkeypatch.setattr(U, "CENTRAL", home / ".mcp-central" / "config" / "mcp-servers.json")
+    monkeypatch.setenv("MCP_UI_COALESCE_MS", "400")
+    servers = {n: {"enabled": True, "command": "npx", "args": ["-y", n]} for n in "abcd"}
+    U.save_json(U.CENTRAL, {"version": "1.1.0", "description": "test", "servers": servers})
+    cursor_path = home / ".cursor" / "mcp.json"
+    U.save_json(cursor_path, {"mcpServers": {}})
+
+    backups: list[str] = []
+    real_backup = U.backup
+    monkeypatch.setattr(U, "backup", lambda p: (backups.append(Path(p).name), real_backup(p))[1])
+
+    state = UI._central_state()
+    monkeypatch.setattr(UI, "_central_state", lambda: state)
+
+    clicks = [("a", True), ("b", True), ("c", True), ("d", True), ("d", False)]
+    results: dict[int, dict] = {}
+
+    def _click(i: int) -> None:
+        time.sleep(0.04 * i)  # 依次点击，均落在同一个合并窗口内
+        name, on = clicks[i]
+        results[i] = UI.apply_toggle("cursor", name, on)
+
+    threads = [threading.Thread(target=_click, args=(i,)) for i in range(len(clicks))]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join(timeout=5)
+
+    assert backups == ["mcp.json"]
+    assert set(json.loads(cursor_path.read_text(encoding="utf-8"))["mcpServers"]) == {"a", "b", "c"}
+    # 每个请求都拿到合并后的最终结果（d 的两次点击均返回最终的关闭状态）
+    assert all(r["coalesced"] == len(clicks) for r in results.values())
+    assert results[3]["changed"] == {"server": "d", "on": False}
+    assert results[0]["changed"] == {"server": "a", "on": True}
+
+
+def test_ui_claude_user_registry_batch_runs_serially(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(U, "HOME", tmp_path)
+    monkeypatch.setenv("MCP_PROC_JOBS", "8")
+    active = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    # claude CLI 改写 ~/.claude.json 不加锁：同一文件的命令不得并发执行
+    def _fake_run(cmd, **_kw):  # noqa: ANN001
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        return PROCS.subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(PROCS.subprocess, "run", _fake_run)
+    changes = {n: {"command": "npx", "args": ["-y", n]} for n in "abcd"}
+    changes["old"] = None
+    notes = UI._sync_registry_many("claude", changes, "user")
+    assert notes == {n: [] for n in changes}
+    assert active["max"] == 1
@@ -211,3 +211,22 @@ class TestGracefulFallback:
             assert isinstance(config_data, dict)
         finally:
             mcp_validation.JSONSCHEMA_AVAILABLE = original_available
+
+
+class TestSharedValidator:
+    """The compiled schema validator is built once and shared with mcp_cli."""
+
+    @pytest.mark.skipif(not JSONSCHEMA_AVAILABLE, reason="jsonschema not installed")
+    def test_validator_is_compiled_once_and_shared(self):
+        import mcp_validation
+        from mcp_cli import validation as V
+
+        first = mcp_validation.get_schema_validator()
+        assert first is not None
+        assert mcp_validation.get_schema_validator() is first
+        assert V.schema_validator() is first
+
+    @pytest.mark.skipif(not JSONSCHEMA_AVAILABLE, reason="jsonschema not installed")
+    def test_shared_validator_reports_schema_errors(self, invalid_config_path):
+        with pytest.raises(MCPSchemaError):
+            validate_mcp_servers_config(invalid_config_path)